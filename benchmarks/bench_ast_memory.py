@@ -0,0 +1,37 @@
+"""Memory held by the parsed AST of a large program, measured with
+tracemalloc.
+
+    $ poetry run python benchmarks/bench_ast_memory.py
+"""
+
+import gc
+import time
+import tracemalloc
+
+from pythonlisp.parser_ import Parser
+
+FORM = """(define fact_iter_{i}
+  (lambda (acc n)
+    (if (= n 0) acc (fact_iter_{i} (* n acc) (- n 1)))))
+(print "result" (fact_iter_{i} 1 {i}) (quote (a b c d)))
+"""
+
+
+def main():
+    source = "".join(FORM.format(i=i) for i in range(20_000))
+    parser = Parser()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    ast = parser.parse(source)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"source {len(source) / 1024 / 1024:.1f} MiB, {len(ast)} forms")
+    mib = 1024 * 1024
+    print(f"retained {current / mib:.1f} MiB, peak {peak / mib:.1f} MiB")
+    print(f"parse time (under tracemalloc) {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
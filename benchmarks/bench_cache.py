@@ -0,0 +1,42 @@
+"""Startup time of a large library file without a cache, when the cache is
+written (cold) and when it is read back (warm).
+
+    $ poetry run python benchmarks/bench_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+from pythonlisp import cache
+from pythonlisp.interpreter import Interpreter
+
+FORM = """(define fact_iter_{i}
+  (lambda (acc n)
+    (if (= n 0) acc (fact_iter_{i} (* n acc) (- n 1)))))
+(define table_{i} (quote (a b "c" 1.5 (d e) #t)))
+"""
+
+
+def timed(path: str, use_cache: bool) -> float:
+    start = time.perf_counter()
+    Interpreter().interpret_file(path, use_cache)
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "library.lsp")
+        for forms in (2_000, 20_000):
+            with open(path, "w") as f:
+                f.write("".join(FORM.format(i=i) for i in range(forms)))
+            cache.clear(path)
+            size = os.path.getsize(path) / 1024 / 1024
+            print(f"{2 * forms} forms, {size:.1f} MiB")
+            print(f"  no cache {timed(path, False):6.2f}s")
+            print(f"  cold     {timed(path, True):6.2f}s")
+            print(f"  warm     {timed(path, True):6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
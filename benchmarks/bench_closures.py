@@ -0,0 +1,67 @@
+"""Memory kept alive by closures made in a loop, measured with tracemalloc
+after the loop returns. Each closure uses one variable of a frame that
+also holds a large list. The compile engine captures only that variable.
+The tree and machine engines keep the whole defining environment.
+
+    $ poetry run python benchmarks/bench_closures.py
+"""
+
+import gc
+import time
+import tracemalloc
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+
+PRELUDE = """
+(define range (lambda (n acc) (if (= n 0) acc (range (- n 1) (cons n acc)))))
+(define collect
+  (lambda (make n acc) (if (= n 0) acc (collect make (- n 1) (cons (make n) acc)))))
+"""
+
+WORKLOADS = {
+    # a closure returned past a large temporary
+    "adder": "(lambda (i) (let ((scratch (range 200 (list))))"
+    " (lambda (x) (+ x i))))",
+    # README's repeat, made inside a procedure with a large argument
+    "repeat": "(lambda (i) ((lambda (f data) (lambda (x) (f (f x)))) "
+    "(lambda (x) (* x 2)) (range 200 (list))))",
+    # closures that assign a captured variable share a cell with the frame
+    "counter": "(lambda (i) ((lambda (n data)"
+    " (lambda () (begin (set! n (+ n 1)) n))) i (range 200 (list))))",
+}
+
+CLOSURES = 300
+
+
+def retained(engine: str, make: str) -> tuple[float, float]:
+    interpreter = Interpreter(engine)
+    interpreter.interpret(PRELUDE)
+    interpreter.interpret(f"(define make {make})")
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    interpreter.interpret(f"(define kept (collect make {CLOSURES} (list)))")
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current, elapsed
+
+
+def main():
+    print(f"{CLOSURES} closures kept")
+    print(
+        f"{'workload':<10}{'engine':<10}{'retained':>12}{'per closure':>14}"
+        f"{'time':>10}"
+    )
+    for name, make in WORKLOADS.items():
+        for engine in ENGINES:
+            current, elapsed = retained(engine, make)
+            print(
+                f"{name:<10}{engine:<10}{current / 1024:>10.0f}KiB"
+                f"{current / CLOSURES:>12.0f}B{elapsed * 1000:>8.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
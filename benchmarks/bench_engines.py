@@ -0,0 +1,45 @@
+"""Compare the closure compiler with the tree-walking evaluator.
+
+    $ poetry run python benchmarks/bench_engines.py
+"""
+
+import timeit
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+
+PROGRAMS = {
+    "fib": (
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))",
+        "(fib 18)",
+    ),
+    "fact": (
+        "(define fact (lambda (n) (if (= n 0) 1 (* n (fact (- n 1))))))",
+        "(fact 40)",
+    ),
+    "fact_iter": (
+        "(define fact_iter (lambda (acc n)"
+        " (if (= n 0) acc (fact_iter (* n acc) (- n 1)))))",
+        "(fact_iter 1 1000)",
+    ),
+}
+
+
+def bench(engine: str, setup: str, program: str, number: int = 5) -> float:
+    interpreter = Interpreter(engine)
+    interpreter.interpret(setup)
+    return min(
+        timeit.repeat(lambda: interpreter.interpret(program), number=1, repeat=number)
+    )
+
+
+def main():
+    print(f"{'program':<12}" + "".join(f"{engine:>12}" for engine in ENGINES))
+    for name, (setup, program) in PROGRAMS.items():
+        timings = {engine: bench(engine, setup, program) for engine in ENGINES}
+        row = "".join(f"{timings[engine] * 1000:>10.2f}ms" for engine in ENGINES)
+        speedup = timings["tree"] / timings["compile"]
+        print(f"{name:<12}{row}   x{speedup:.2f}")
+
+
+if __name__ == "__main__":
+    main()
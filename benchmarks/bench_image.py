@@ -0,0 +1,47 @@
+"""Startup time of a process that needs a large library: evaluating the
+library source against loading a saved image of it.
+
+    $ poetry run python benchmarks/bench_image.py
+"""
+
+import os
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+
+FORM = """(define fact_iter_{i}
+  (lambda (acc n)
+    (if (= n 0) acc (fact_iter_{i} (* n acc) (- n 1)))))
+(define table_{i} (quote (a b "c" 1.5 (d e) #t)))
+"""
+JOB = "(print (fact_iter_7 1 20))\n"
+
+
+def timed(*args: str) -> float:
+    start = time.perf_counter()
+    command = [sys.executable, "-m", "pythonlisp.main", *args]
+    subprocess.run(command, check=True, capture_output=True)  # nosec B603
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        library = os.path.join(tmp, "lib.lsp")
+        job = os.path.join(tmp, "job.lsp")
+        img = os.path.join(tmp, "lib.img")
+        with open(job, "w") as f:
+            f.write(JOB)
+        for forms in (1_000, 10_000):
+            with open(library, "w") as f:
+                f.write("".join(FORM.format(i=i) for i in range(forms)))
+                f.write(JOB)
+            timed("--no-cache", "-f", library, "--save-image", img)
+            print(f"{2 * forms} library forms, image {os.path.getsize(img) >> 10} KiB")
+            print(f"  source        {timed('--no-cache', '-f', library):6.2f}s")
+            print(f"  image + job   {timed('--image', img, '-f', job):6.2f}s")
+        print(f"  empty start   {timed('--no-cache', '-f', job):6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
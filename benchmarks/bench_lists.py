@@ -0,0 +1,29 @@
+"""Time building and walking lists with cons/car/cdr at growing sizes.
+
+With shared-structure pairs the time per element stays flat.
+
+    $ poetry run python benchmarks/bench_lists.py
+"""
+
+import time
+
+from pythonlisp.interpreter import Interpreter
+
+PROGRAM = """
+(define build (lambda (n acc) (if (= n 0) acc (build (- n 1) (cons n acc)))))
+(define sum (lambda (xs acc) (if (null? xs) acc (sum (cdr xs) (+ acc (car xs))))))
+"""
+
+
+def main():
+    interpreter = Interpreter()
+    interpreter.interpret(PROGRAM)
+    for n in (25_000, 50_000, 100_000, 200_000):
+        start = time.perf_counter()
+        interpreter.interpret(f"(sum (build {n} (quote ())) 0)")
+        elapsed = time.perf_counter() - start
+        print(f"n={n:>7}  {elapsed * 1000:8.1f}ms  {elapsed / n * 1e6:6.2f}us/elem")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compare the explicit-stack machine with the tree-walking evaluator: the
+time of ordinary programs, and how deep a non-tail recursion each can go.
+
+    $ poetry run python benchmarks/bench_machine.py
+"""
+
+import timeit
+
+from pythonlisp.interpreter import Interpreter
+
+PROGRAMS = {
+    "fib": (
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))",
+        "(fib 18)",
+    ),
+    "fact_iter": (
+        "(define fact_iter (lambda (acc n)"
+        " (if (= n 0) acc (fact_iter (* n acc) (- n 1)))))",
+        "(fact_iter 1 1000)",
+    ),
+    "lists": (
+        "(define range (lambda (a b)"
+        " (if (= a b) (quote ()) (cons a (range (+ a 1) b)))))",
+        "(reduce + (map (lambda (x) (* x x)) (range 0 50)) 0)",
+    ),
+}
+SUM = "(define sum (lambda (n) (if (= n 0) 0 (+ n (sum (- n 1))))))"
+ENGINES = ("tree", "machine")
+
+
+def bench(engine: str, setup: str, program: str) -> float:
+    interpreter = Interpreter(engine)
+    interpreter.interpret(setup)
+    return min(
+        timeit.repeat(lambda: interpreter.interpret(program), number=1, repeat=5)
+    )
+
+
+def max_depth(engine: str, limit: int = 1_000_000) -> int:
+    """The deepest `(sum n)` that runs, doubling n until it fails."""
+    interpreter = Interpreter(engine)
+    interpreter.interpret(SUM)
+    n = 10
+    while n <= limit:
+        try:
+            interpreter.interpret(f"(sum {n})")
+        except RecursionError:
+            return n // 2
+        n *= 2
+    return n // 2
+
+
+def main():
+    print(f"{'program':<12}" + "".join(f"{engine:>12}" for engine in ENGINES))
+    for name, (setup, program) in PROGRAMS.items():
+        timings = {engine: bench(engine, setup, program) for engine in ENGINES}
+        row = "".join(f"{timings[engine] * 1000:>10.2f}ms" for engine in ENGINES)
+        print(f"{name:<12}{row}   x{timings['tree'] / timings['machine']:.2f}")
+    depths = "".join(f"{max_depth(engine):>12}" for engine in ENGINES)
+    print(f"{'max depth':<12}{depths}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Time the derived forms shipped as macros against the nested lambdas and
+ifs they replace. Macros are expanded before evaluation, so both columns
+should run the same code.
+
+    $ poetry run python benchmarks/bench_macros.py
+"""
+
+import timeit
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+
+LOOP = "(define loop (lambda (i acc) (if (= i 0) acc (loop (- i 1) (+ acc (f i))))))"
+
+PROGRAMS = {
+    "let": (
+        "(define f (lambda (i) (let ((a (* i 2)) (b (+ i 1))) (+ a b))))",
+        "(define f (lambda (i) ((lambda (a b) (+ a b)) (* i 2) (+ i 1))))",
+    ),
+    "let*": (
+        "(define f (lambda (i) (let* ((a (* i 2)) (b (+ a 1))) (+ a b))))",
+        "(define f (lambda (i)"
+        " ((lambda (a) ((lambda (b) (+ a b)) (+ a 1))) (* i 2))))",
+    ),
+    "cond": (
+        "(define f (lambda (i)"
+        " (cond ((< i 100) 1) ((< i 1000) 2) (else 3))))",
+        "(define f (lambda (i) (if (< i 100) 1 (if (< i 1000) 2 3))))",
+    ),
+    "and/or": (
+        "(define f (lambda (i) (if (and (> i 10) (or (< i 50) (> i 90))) 1 0)))",
+        "(define f (lambda (i)"
+        " (if (if (> i 10) ((lambda (t) (if t t (> i 90))) (< i 50)) #f) 1 0)))",
+    ),
+}
+
+
+def bench(engine: str, definition: str, number: int = 5) -> float:
+    interpreter = Interpreter(engine)
+    interpreter.interpret(definition)
+    interpreter.interpret(LOOP)
+    return min(
+        timeit.repeat(
+            lambda: interpreter.interpret("(loop 5000 0)"), number=1, repeat=number
+        )
+    )
+
+
+def main():
+    print(f"{'form':<10}{'engine':<10}{'macro':>12}{'by hand':>12}")
+    for name, (macro, by_hand) in PROGRAMS.items():
+        for engine in ENGINES:
+            with_macro = bench(engine, macro)
+            without = bench(engine, by_hand)
+            print(
+                f"{name:<10}{engine:<10}{with_macro * 1000:>10.2f}ms"
+                f"{without * 1000:>10.2f}ms   x{without / with_macro:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
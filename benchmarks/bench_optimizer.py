@@ -0,0 +1,46 @@
+"""Time programs with and without the optimiser (`-O`).
+
+    $ poetry run python benchmarks/bench_optimizer.py
+"""
+
+import timeit
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+
+PROGRAMS = {
+    "fib": (
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))",
+        "(fib 18)",
+    ),
+    "constants": (
+        "(define area (lambda (r)"
+        " (if (> 2 1) (* (/ 355 113) (* r r)) (* (* 2 (+ 3 4)) r))))"
+        " (define loop (lambda (i acc)"
+        " (if (= i 0) acc (loop (- i 1) (+ acc (area (* 2 (+ 1 2))))))))",
+        "(loop 20000 0)",
+    ),
+}
+
+
+def bench(engine: str, optimize: bool, setup: str, program: str) -> float:
+    interpreter = Interpreter(engine, optimize=optimize)
+    interpreter.interpret(setup)
+    return min(
+        timeit.repeat(lambda: interpreter.interpret(program), number=1, repeat=5)
+    )
+
+
+def main():
+    print(f"{'program':<12}{'engine':<10}{'plain':>12}{'-O':>12}")
+    for name, (setup, program) in PROGRAMS.items():
+        for engine in ENGINES:
+            plain = bench(engine, False, setup, program)
+            optimized = bench(engine, True, setup, program)
+            print(
+                f"{name:<12}{engine:<10}{plain * 1000:>10.2f}ms"
+                f"{optimized * 1000:>10.2f}ms   x{plain / optimized:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
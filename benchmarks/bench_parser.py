@@ -0,0 +1,44 @@
+"""Compare the explicit-stack parser with the recursive one on wide and
+deep inputs.
+
+    $ poetry run python benchmarks/bench_parser.py
+"""
+
+import sys
+import timeit
+
+from pythonlisp.parser_ import Parser, RecursiveParser
+
+
+def wide(n: int) -> str:
+    return "(list " + " ".join(f"(f {i} x)" for i in range(n)) + ")"
+
+
+def deep(depth: int) -> str:
+    return "(f " * depth + "x" + ")" * depth
+
+
+def best(parser, source: str) -> str:
+    try:
+        seconds = min(timeit.repeat(lambda: parser.parse(source), number=1, repeat=3))
+    except RecursionError:
+        return "RecursionError"
+    return f"{seconds * 1000:.1f}ms"
+
+
+def main():
+    inputs = {
+        "wide 100k": wide(100_000),
+        "deep 300": deep(300),
+        "deep 100k": deep(100_000),
+    }
+    print(f"recursion limit {sys.getrecursionlimit()}")
+    print(f"{'input':<12}{'Parser':>16}{'RecursiveParser':>18}")
+    for name, source in inputs.items():
+        iterative = best(Parser(), source)
+        recursive = best(RecursiveParser(), source)
+        print(f"{name:<12}{iterative:>16}{recursive:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Scaling of `pmap` over a CPU-bound lambda with the number of worker
+processes, against serial `map`.
+
+    $ poetry run python benchmarks/bench_pmap.py
+"""
+
+import time
+
+from pythonlisp.interpreter import Interpreter
+from pythonlisp.parallel import cpu_count, pmap
+
+SOURCE = """
+(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+(define work (lambda (x) (fib 16)))
+"""
+ITEMS = 64
+
+
+def main():
+    interpreter = Interpreter()
+    interpreter.interpret(SOURCE)
+    work = interpreter.interpret("work")
+    items = list(range(ITEMS))
+    start = time.perf_counter()
+    interpreter.env.env["map"](work, items)
+    serial = time.perf_counter() - start
+    cpus = cpu_count()
+    print(f"{ITEMS} x (fib 16), {cpus} cpus available")
+    print(f"  map            {serial:6.2f}s")
+    workers = 1
+    while workers <= max(cpus, 2):
+        # start the workers before timing
+        pmap(work, items[: workers * 2], workers=workers, min_items=1)
+        start = time.perf_counter()
+        pmap(work, items, workers=workers, min_items=1)
+        elapsed = time.perf_counter() - start
+        print(f"  pmap {workers:>2} workers {elapsed:6.2f}s  x{serial / elapsed:.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
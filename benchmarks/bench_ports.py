@@ -0,0 +1,84 @@
+"""Throughput of the file ports in MB/s, and the peak memory of walking a
+file with `file-lines`, which should not grow with the file.
+
+    $ poetry run python benchmarks/bench_ports.py
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pythonlisp.interpreter import Interpreter
+
+LINE = "{i},sensor-{s},{v:.3f},ok\n"
+
+PROGRAM = """
+(define count
+  (lambda (s n)
+    (if (stream-null? s) n (count (stream-cdr s) (+ n 1)))))
+(define count-lines (lambda (path) (count (file-lines path) 0)))
+(define count-read-line
+  (lambda (port n)
+    (if (eof-object? (read-line port)) n (count-read-line port (+ n 1)))))
+(define copy
+  (lambda (in out)
+    ((lambda (line)
+       (if (eof-object? line)
+           (close-port out)
+           (begin (display line out) (newline out) (copy in out))))
+     (read-line in))))
+"""
+
+BENCHMARKS = {
+    "file-lines": '(count-lines "{path}")',
+    "read-line": '(count-read-line (open-input-file "{path}") 0)',
+    "read-file": '(length (read-file "{path}"))',
+    "read-line + display": (
+        '(copy (open-input-file "{path}") (open-output-file "{path}.out"))'
+    ),
+}
+
+
+def write_data(path: str, lines: int):
+    with open(path, "w") as f:
+        for i in range(lines):
+            f.write(LINE.format(i=i, s=i % 97, v=i * 0.37))
+
+
+def main():
+    interpreter = Interpreter()
+    interpreter.interpret(PROGRAM)
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        print(f"{'lines':>8}{'MB':>8}  {'benchmark':<22}{'time':>10}{'MB/s':>10}")
+        for lines in (100_000, 400_000):
+            write_data(path, lines)
+            mb = os.path.getsize(path) / 1e6
+            for name, source in BENCHMARKS.items():
+                start = time.perf_counter()
+                interpreter.interpret(source.format(path=path))
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{lines:>8}{mb:>8.1f}  {name:<22}"
+                    f"{elapsed * 1000:>8.0f}ms{mb / elapsed:>10.1f}"
+                )
+        print()
+        print(f"{'lines':>8}{'MB':>8}  file-lines peak memory")
+        for lines in (20_000, 80_000):
+            write_data(path, lines)
+            tracemalloc.start()
+            interpreter.interpret(f'(count-lines "{path}")')
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            mb = os.path.getsize(path) / 1e6
+            print(f"{lines:>8}{mb:>8.1f}  {peak / 1024:.0f} KiB")
+    finally:
+        for name in (path, path + ".out"):
+            if os.path.exists(name):
+                os.unlink(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Request latency and sessions per second of the eval server, with a
+local client running many sessions at once.
+
+    $ poetry run python benchmarks/bench_server.py
+"""
+
+import asyncio
+import statistics
+import time
+
+from pythonlisp.server import Server
+
+REQUEST = b"(define sq (lambda (x) (* x x))) (sq 12)\n"
+
+
+async def session(port: int, requests: int, latencies: list[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for _ in range(requests):
+        start = time.perf_counter()
+        writer.write(REQUEST)
+        await writer.drain()
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(port: int, sessions: int, requests: int):
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(session(port, requests, latencies) for _ in range(sessions))
+    )
+    return time.perf_counter() - start, latencies
+
+
+async def main():
+    server = Server()
+    listener = await server.start("127.0.0.1:0")
+    port = listener.sockets[0].getsockname()[1]
+    for sessions in (1, 10, 100):
+        elapsed, latencies = await run(port, sessions, 20)
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{sessions:>4} concurrent sessions x 20 requests: "
+            f"p50 {quantiles[49] * 1000:6.2f}ms  p99 {quantiles[98] * 1000:6.2f}ms"
+            f"  {len(latencies) / elapsed:8.0f} requests/s"
+        )
+    elapsed, _ = await run(port, 1000, 1)
+    print(f"1000 short sessions (connect, 1 request): {1000 / elapsed:.0f} sessions/s")
+    listener.close()
+    await listener.wait_closed()
+    server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
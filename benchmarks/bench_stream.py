@@ -0,0 +1,74 @@
+"""Peak memory and time to first output for whole-file and streaming runs.
+
+    $ poetry run python benchmarks/bench_stream.py
+"""
+
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from pythonlisp.interpreter import Interpreter
+
+FORM = '(define row (list {i} "payload-{i}" (* {i} 2.5) (quote (a b c d e f))))\n'
+
+
+def write_program(path: str, forms: int):
+    with open(path, "w") as f:
+        f.write('(print "started")\n')
+        for i in range(forms):
+            f.write(FORM.format(i=i))
+
+
+def run_whole(path: str):
+    with open(path) as f:
+        Interpreter().interpret(f.read())
+
+
+def run_stream(path: str):
+    with open(path) as f:
+        Interpreter().interpret_stream(f)
+
+
+class FirstOutput(io.StringIO):
+    def __init__(self, start: float):
+        super().__init__()
+        self.start = start
+        self.first = None
+
+    def write(self, text):
+        if self.first is None:
+            self.first = time.perf_counter() - self.start
+        return super().write(text)
+
+
+def measure(run, path: str):
+    tracemalloc.start()
+    out = FirstOutput(time.perf_counter())
+    with redirect_stdout(out):
+        run(path)
+    elapsed = time.perf_counter() - out.start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, out.first, elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.lsp")
+        for forms in (5_000, 20_000):
+            write_program(path, forms)
+            size = os.path.getsize(path) / 1024 / 1024
+            print(f"{forms} forms, {size:.1f} MiB")
+            for name, run in (("interpret", run_whole), ("stream", run_stream)):
+                peak, first, elapsed = measure(run, path)
+                print(
+                    f"  {name:<10} peak {peak / 1024 / 1024:7.2f} MiB"
+                    f"  first output {first * 1000:8.1f}ms  total {elapsed:6.2f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
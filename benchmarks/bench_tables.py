@@ -0,0 +1,128 @@
+"""Lookup-heavy workloads with hash tables and vectors, against the
+association lists and list walks they replace.
+
+    $ poetry run python benchmarks/bench_tables.py
+"""
+
+import random
+import time
+
+from pythonlisp.interpreter import Interpreter
+
+WORDS = 4000
+VOCABULARY = 100
+
+PRELUDE = """
+(define assoc
+  (lambda (key alist)
+    (if (null? alist)
+        #f
+        (if (equal? (car (car alist)) key) (car alist) (assoc key (cdr alist))))))
+(define alist-inc
+  (lambda (key alist)
+    (if (null? alist)
+        (list (cons key 1))
+        (if (equal? (car (car alist)) key)
+            (cons (cons key (+ 1 (cdr (car alist)))) (cdr alist))
+            (cons (car alist) (alist-inc key (cdr alist)))))))
+(define list-ref
+  (lambda (xs i) (if (= i 0) (car xs) (list-ref (cdr xs) (- i 1)))))
+"""
+
+CASES = {
+    "word count": (
+        """
+(define count-alist
+  (lambda (words counts)
+    (if (null? words) counts (count-alist (cdr words) (alist-inc (car words) counts)))))
+(define run (lambda () (length (count-alist words (list)))))""",
+        """
+(define count-hash
+  (lambda (words t)
+    (if (null? words)
+        t
+        (begin
+          (hash-set! t (car words) (+ 1 (hash-ref t (car words) 0)))
+          (count-hash (cdr words) t)))))
+(define run (lambda () (hash-count (count-hash words (make-hash-table)))))""",
+    ),
+    "memo table": (
+        """
+(define memo (list))
+(define fib
+  (lambda (n)
+    ((lambda (hit)
+       (if hit
+           (cdr hit)
+           ((lambda (v) (begin (set! memo (cons (cons n v) memo)) v))
+            (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2)))))))
+     (assoc n memo))))
+(define repeat
+  (lambda (n) (if (= n 0) 0 (begin (set! memo (list)) (fib 80) (repeat (- n 1))))))
+(define run (lambda () (repeat 20)))""",
+        """
+(define memo (make-hash-table))
+(define fib
+  (lambda (n)
+    (if (hash-has-key? memo n)
+        (hash-ref memo n)
+        ((lambda (v) (begin (hash-set! memo n v) v))
+         (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))))
+(define repeat
+  (lambda (n)
+    (if (= n 0) 0 (begin (set! memo (make-hash-table)) (fib 80) (repeat (- n 1))))))
+(define run (lambda () (repeat 20)))""",
+    ),
+    "indexed reads": (
+        """
+(define xs (map (lambda (x) (* x 2)) words-index))
+(define sum-at
+  (lambda (i acc)
+    (if (= i 0) acc (sum-at (- i 1) (+ acc (list-ref xs (mod (* i 7) 100)))))))
+(define run (lambda () (sum-at 2000 0)))""",
+        """
+(define xs (list->vector (map (lambda (x) (* x 2)) words-index)))
+(define sum-at
+  (lambda (i acc)
+    (if (= i 0) acc (sum-at (- i 1) (+ acc (vector-ref xs (mod (* i 7) 100)))))))
+(define run (lambda () (sum-at 2000 0)))""",
+    ),
+}
+
+
+def setup(engine: str, program: str) -> Interpreter:
+    rng = random.Random(1)
+    words = " ".join(f'"w{rng.randrange(VOCABULARY)}"' for _ in range(WORDS))
+    interpreter = Interpreter(engine)
+    interpreter.interpret(PRELUDE)
+    interpreter.interpret(f"(define words (list {words}))")
+    indices = " ".join(str(i) for i in range(VOCABULARY))
+    interpreter.interpret(f"(define words-index (list {indices}))")
+    interpreter.interpret(program)
+    return interpreter
+
+
+def bench(interpreter: Interpreter, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        interpreter.interpret("(run)")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'workload':<16}{'engine':<10}{'list':>12}{'table':>12}")
+    for name, (with_lists, with_tables) in CASES.items():
+        # the list versions recurse too deep for the tree engine
+        for engine in ("compile", "machine"):
+            lists = bench(setup(engine, with_lists))
+            tables = bench(setup(engine, with_tables))
+            print(
+                f"{name:<16}{engine:<10}{lists * 1000:>10.1f}ms"
+                f"{tables * 1000:>10.1f}ms   x{lists / tables:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Tokenizer throughput on a multi-megabyte generated program.
+
+    $ poetry run python benchmarks/bench_tokenizer.py
+"""
+
+import time
+
+from pythonlisp.tokenizer import CharTokenizer, Tokenizer
+
+FORM = """(define fact_iter_{i}
+  (lambda (acc n)
+    (if (= n 0) acc (fact_iter_{i} (* n acc) (- n 1.5)))))
+(print "result of \\"fact\\" number {i}:" (fact_iter_{i} 1 {i}))
+"""
+
+
+def generate(size: int) -> str:
+    forms = []
+    total = 0
+    i = 0
+    while total < size:
+        form = FORM.format(i=i)
+        forms.append(form)
+        total += len(form)
+        i += 1
+    return "".join(forms)
+
+
+def throughput(tokenizer, source: str, repeat: int = 3) -> tuple[int, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in tokenizer.tokenize(source))
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main():
+    source = generate(4 * 1024 * 1024)
+    print(f"source: {len(source) / 1024 / 1024:.1f} MiB")
+    results = {}
+    for tokenizer in (CharTokenizer(), Tokenizer()):
+        count, elapsed = throughput(tokenizer, source)
+        results[type(tokenizer).__name__] = elapsed
+        print(
+            f"{type(tokenizer).__name__:<14}{count:>10} tokens"
+            f"{elapsed:>8.2f}s{count / elapsed:>14,.0f} tokens/s"
+        )
+    print(f"speedup: x{results['CharTokenizer'] / results['Tokenizer']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
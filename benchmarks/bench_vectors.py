@@ -0,0 +1,34 @@
+"""Scaling and summing a million numbers as a list, through a Lisp lambda,
+and as a numvector, with bulk primitives.
+
+    $ poetry run python benchmarks/bench_vectors.py
+"""
+
+import time
+
+from pythonlisp import vectors
+from pythonlisp.interpreter import Interpreter
+
+SIZE = 1_000_000
+
+CASES = [
+    ("list   map + reduce", "(reduce + (map (lambda (x) (* x 2.5)) xs))"),
+    ("vector v* + vsum", "(vsum (v* v 2.5))"),
+    ("list   dot product", "(reduce + (map (lambda (x) (* x x)) xs))"),
+    ("vector vdot", "(vdot v v)"),
+]
+
+
+def main():
+    print(f"{SIZE} elements, backend {'numpy' if vectors.np else 'array'}")
+    interpreter = Interpreter()
+    interpreter.interpret(f"(define v (numvector-range 0 {SIZE}))")
+    interpreter.interpret("(define xs (numvector->list v))")
+    for name, source in CASES:
+        start = time.perf_counter()
+        interpreter.interpret(source)
+        print(f"  {name:<22}{(time.perf_counter() - start) * 1000:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Time reloading a 10k-form file after a one-line edit against evaluating
+the whole file again, as a fresh run would.
+
+    $ poetry run python benchmarks/bench_watch.py
+"""
+
+import os
+import tempfile
+import time
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.watch import Watcher
+
+FORMS = 10_000
+
+
+def program(edited: int = -1) -> str:
+    lines = []
+    for i in range(FORMS // 2):
+        body = "(* x 3)" if i == edited else "(+ x 1)"
+        lines.append(f"(define f{i} (lambda (x) (if (< x 0) 0 {body})))")
+        lines.append(f"(define v{i} (f{i} {i}))")
+    return "\n".join(lines)
+
+
+def main():
+    fd, path = tempfile.mkstemp(suffix=".lsp")
+    os.close(fd)
+    try:
+        print(f"{'engine':<10}{'full load':>12}{'reload':>12}{'evaluated':>12}")
+        for engine in ENGINES:
+            with open(path, "w") as f:
+                f.write(program())
+            watcher = Watcher(path, Interpreter(engine))
+            start = time.perf_counter()
+            watcher.reload()
+            full = time.perf_counter() - start
+            with open(path, "w") as f:
+                f.write(program(edited=FORMS // 4))
+            reload = watcher.reload()
+            print(
+                f"{engine:<10}{full * 1000:>10.1f}ms{reload.seconds * 1000:>10.1f}ms"
+                f"{reload.evaluated:>12}   x{full / reload.seconds:.1f}"
+            )
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Benchmark suite of standard Lisp workloads.
+
+Every workload is timed in three phases: tokenizing its source, parsing
+the tokens and evaluating the forms, each the best of a few runs.
+Results can be saved as JSON and compared against a saved baseline.
+"""
+
+import json
+import platform
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from pythonlisp.interpreter import Interpreter
+from pythonlisp.parser_ import Parser, SourceMap
+from pythonlisp.tokenizer import Tokenizer
+
+PHASES = ("tokenize", "parse", "eval")
+
+
+@dataclass
+class Workload:
+    name: str
+    source: str
+    expected: Any
+
+
+def parse_heavy_source(forms: int) -> str:
+    form = '(quote (record {i} "name-{i}" {i}.5 #t (nested (a b c) "x y z")))\n'
+    return "".join(form.format(i=i) for i in range(forms)) + "(+ 1 1)"
+
+
+WORKLOADS = [
+    Workload(
+        "fib",
+        """
+(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+(fib 20)""",
+        6765,
+    ),
+    Workload(
+        "tak",
+        """
+(define tak
+  (lambda (x y z)
+    (if (< y x)
+        (tak (tak (- x 1) y z) (tak (- y 1) z x) (tak (- z 1) x y))
+        z)))
+(tak 18 12 6)""",
+        7,
+    ),
+    Workload(
+        "ackermann",
+        """
+(define ack
+  (lambda (m n)
+    (if (= m 0)
+        (+ n 1)
+        (if (= n 0) (ack (- m 1) 1) (ack (- m 1) (ack m (- n 1)))))))
+(define times (lambda (n acc) (if (= n 0) acc (times (- n 1) (ack 2 15)))))
+(times 50 0)""",
+        33,
+    ),
+    Workload(
+        "tail-loop",
+        """
+(define loop (lambda (i acc) (if (= i 0) acc (loop (- i 1) (+ acc i)))))
+(loop 200000 0)""",
+        20000100000,
+    ),
+    Workload(
+        "lists",
+        """
+(define build (lambda (n acc) (if (= n 0) acc (build (- n 1) (cons n acc)))))
+(define walk
+  (lambda (xs acc) (if (null? xs) acc (walk (cdr xs) (+ acc (car xs))))))
+(define xs (build 50000 (list)))
+(walk xs 0)""",
+        1250025000,
+    ),
+    Workload(
+        "map-reduce",
+        """
+(define build (lambda (n acc) (if (= n 0) acc (build (- n 1) (cons n acc)))))
+(define square (lambda (x) (* x x)))
+(reduce + (map square (build 50000 (list))))""",
+        41667916675000,
+    ),
+    Workload(
+        "strings",
+        """
+(define repeat
+  (lambda (s n acc) (if (= n 0) acc (repeat s (- n 1) (+ acc s)))))
+(define count
+  (lambda (n acc)
+    (if (= n 0) acc (count (- n 1) (+ acc (length (repeat "ab" 20 "")))))))
+(count 5000 0)""",
+        200000,
+    ),
+    Workload("parse-heavy", parse_heavy_source(5000), 2),
+]
+
+
+def best(run: Callable[[], Any], repeat: int) -> tuple[float, Any]:
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def run_workload(
+    workload: Workload, engine: str = "compile", repeat: int = 3
+) -> dict[str, float]:
+    tokenizer = Tokenizer()
+    tokenize_time, tokens = best(
+        lambda: list(tokenizer.tokenize(workload.source)), repeat
+    )
+    parser = Parser()
+    parse_time, forms = best(
+        lambda: list(parser.parse_tokens(iter(tokens), SourceMap())), repeat
+    )
+
+    def evaluate():
+        interpreter = Interpreter(engine)
+        result = None
+        for sexp in forms:
+            result = interpreter.evaluate(sexp)
+        return result
+
+    eval_time, result = best(evaluate, repeat)
+    if result != workload.expected:
+        raise RuntimeError(
+            f"Error: workload {workload.name} returned {result!r}, "
+            f"expect {workload.expected!r}"
+        )
+    return {"tokenize": tokenize_time, "parse": parse_time, "eval": eval_time}
+
+
+def run_suite(
+    engine: str = "compile",
+    repeat: int = 3,
+    names: Optional[Iterable[str]] = None,
+    workloads: list[Workload] = WORKLOADS,
+) -> dict[str, Any]:
+    selected = set(names) if names else None
+    results = {}
+    for workload in workloads:
+        if selected is None or workload.name in selected:
+            results[workload.name] = run_workload(workload, engine, repeat)
+    return {
+        "engine": engine,
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(
+    report: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float = 0.1,
+    min_delta: float = 0.001,
+) -> list[str]:
+    """Phases at least `threshold` slower than in the baseline. Differences
+    under `min_delta` seconds are taken as noise."""
+    regressions = []
+    for name, phases in report["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        for phase in PHASES:
+            before, after = old.get(phase), phases[phase]
+            if before is None or after - before < min_delta:
+                continue
+            if after > before * (1 + threshold):
+                regressions.append(
+                    f"{name} {phase}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms"
+                    f" ({after / before - 1:+.0%})"
+                )
+    return regressions
+
+
+def format_report(report: dict[str, Any], baseline: Optional[dict] = None) -> str:
+    lines = [
+        f"engine {report['engine']}, python {report['python']}, "
+        f"best of {report['repeat']}",
+        f"{'workload':<14}" + "".join(f"{phase:>12}" for phase in PHASES),
+    ]
+    for name, phases in report["results"].items():
+        row = f"{name:<14}"
+        for phase in PHASES:
+            row += f"{phases[phase] * 1000:10.1f}ms"
+        if baseline and name in baseline["results"]:
+            old = baseline["results"][name].get("eval")
+            if old:
+                row += f"  eval {phases['eval'] / old - 1:+.0%}"
+        lines.append(row)
+    return "\n".join(lines)
+
+
+def save(report: dict[str, Any], filename: str) -> None:
+    with open(filename, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load(filename: str) -> dict[str, Any]:
+    with open(filename) as f:
+        return json.load(f)
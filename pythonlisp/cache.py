@@ -0,0 +1,140 @@
+"""On-disk cache of parsed forms, like `__pycache__` for Lisp sources.
+
+The forms of `dir/name.lsp` are pickled one after another into
+`dir/__lispcache__/name.lsp.<tag>.lspc`, behind a header holding the
+SHA-256 of the source. The tag names the interpreter and Python version,
+and a cache whose digest does not match the source is parsed again and
+replaced. Forms keep their source maps, so errors report the same
+positions as a fresh parse.
+"""
+
+import hashlib
+import importlib.metadata
+import os
+import pickle  # nosec B403: the cache is only ever written by us
+import shutil
+import sys
+import tempfile
+from typing import Generator, Optional
+
+from pythonlisp.parser_ import Parser, SExp
+from pythonlisp.tokenizer import read_chunks
+
+CACHE_DIR = "__lispcache__"
+SUFFIX = ".lspc"
+# bump when the pickled layout of the AST, procedures or images changes
+FORMAT = 3
+
+
+def version() -> str:
+    try:
+        return importlib.metadata.version("pythonlisp")
+    except importlib.metadata.PackageNotFoundError:
+        return "dev"
+
+
+def cache_tag() -> str:
+    python = f"py{sys.version_info[0]}{sys.version_info[1]}"
+    return f"pythonlisp-{version()}-{FORMAT}-{python}"
+
+
+def cache_path(filename: str) -> str:
+    directory, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, CACHE_DIR, f"{name}.{cache_tag()}{SUFFIX}")
+
+
+def source_digest(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clear(filename: Optional[str] = None) -> None:
+    """Remove the cache directory next to `filename`, or in the current
+    directory."""
+    directory = os.path.dirname(os.path.abspath(filename)) if filename else "."
+    shutil.rmtree(os.path.join(directory, CACHE_DIR), ignore_errors=True)
+
+
+def load(path: str, digest: str) -> Optional[Generator[SExp, None, None]]:
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    try:
+        header = pickle.load(f)  # nosec B301
+    except Exception:
+        f.close()
+        return None
+    if header != (cache_tag(), digest):
+        f.close()
+        return None
+
+    def forms():
+        # every form is a pickle of its own, see `parse_and_store`
+        with f:
+            while True:
+                try:
+                    yield pickle.load(f)  # nosec B301
+                except EOFError:
+                    return
+
+    return forms()
+
+
+def parse_and_store(
+    filename: str, path: str, digest: str, parser: Parser
+) -> Generator[SExp, None, None]:
+    """Stream the forms of `filename` while writing them to a new cache.
+    The old cache is only replaced once every form has been read."""
+    out = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        out = os.fdopen(fd, "wb")
+        pickle.dump((cache_tag(), digest), out, pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        out = None
+
+    def store(sexp: SExp) -> None:
+        nonlocal out
+        if out is None:
+            return
+        try:
+            # one pickle per form, so nothing is memoised across forms
+            pickle.dump(sexp, out, pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            out.close()
+            os.remove(tmp)
+            out = None
+
+    complete = False
+    with open(filename, "rb") as f:
+        forms = parser.parse_stream(read_chunks(f))
+        try:
+            for sexp in forms:
+                store(sexp)
+                yield sexp
+            complete = True
+        finally:
+            # when evaluation stopped early the partial cache is dropped,
+            # and the next run parses the file again
+            if out is not None:
+                out.close()
+                if complete:
+                    os.replace(tmp, path)
+                else:
+                    os.remove(tmp)
+
+
+def cached_forms(filename: str, parser: Parser) -> Generator[SExp, None, None]:
+    """The top-level forms of a source file, read from its cache when the
+    cache matches the file's contents."""
+    digest = source_digest(filename)
+    path = cache_path(filename)
+    forms = load(path, digest)
+    if forms is None:
+        forms = parse_and_store(filename, path, digest, parser)
+    return forms
@@ -0,0 +1,582 @@
+"""Closure compiler for the interpreter.
+
+Every SExp is analysed once into a tree of Python closures taking the
+frame to run in. Type dispatch and special-form lookup happen at compile
+time, so evaluating a compiled lambda body is only closure calls.
+
+Expressions compiled in tail position return a `TailCall` instead of
+calling a `Procedure`, which then runs it from its trampoline.
+
+Variables are resolved while compiling. A lambda's frame is a list
+`[captured, arg0, arg1, ...]`, where `captured` holds only the free
+variables the lambda uses, copied from the frame it is made in. Anything
+not bound by an enclosing lambda is a global looked up in the
+interpreter's global dict. Top-level code runs with an empty frame.
+
+A variable that is assigned, by `set!` or an internal `define`, and used
+by a nested lambda lives in a one-item list, a cell, so the frame and
+every closure share it.
+"""
+
+from typing import Any, Callable, Optional
+
+from pythonlisp.env import (Env, Procedure, TailCall, get_symbol,
+                            is_applied_lambda, is_lambda, procedure_name)
+from pythonlisp.memo import DEFAULT_MAXSIZE, Memoized
+from pythonlisp.optimizer import Inlined
+from pythonlisp.parser_ import (NIL, Boolean, List, Number, Pair, SExp,
+                                String, Symbol, datum)
+from pythonlisp.streams import Promise
+
+# `[captured, arg0, arg1, ...]`, captured being a list or None
+Frame = list[Any]
+Code = Callable[[Frame], Any]
+
+
+def run_code(code: Code, frame: Frame) -> Any:
+    return code(frame)
+
+
+# where a variable is: a frame slot, or an item of the captured list
+LOCAL, FREE = 0, 1
+Address = tuple[int, int, bool]
+
+DEFINES = (Symbol("define"), Symbol("define-memo"))
+ASSIGNMENTS = (Symbol("set!"), *DEFINES)
+QUOTE = Symbol("quote")
+
+
+def cell_names(lst: List) -> set[str]:
+    """Names assigned in the body of lambda `lst` and used in a lambda
+    nested in it, whose variables need cells. Shadowing is ignored, which
+    only costs a cell that was not needed."""
+    assigned: set[str] = set()
+    captured: set[str] = set()
+    stack: list[tuple[SExp, bool]] = [(x, False) for x in lst[2:]]
+    while stack:
+        sexp, nested = stack.pop()
+        if isinstance(sexp, Symbol):
+            if nested:
+                captured.add(sexp.val)
+            continue
+        if not isinstance(sexp, List) or not sexp or sexp[0] is QUOTE:
+            continue
+        head = sexp[0]
+        if head in ASSIGNMENTS and len(sexp) > 1 and isinstance(sexp[1], Symbol):
+            assigned.add(sexp[1].val)
+        if is_lambda(sexp):
+            stack.extend((x, True) for x in sexp[2:])
+        elif is_applied_lambda(sexp):
+            # run in the same frame, see Compiler.inline_lambda
+            stack.extend((x, nested) for x in head[2:])
+            stack.extend((x, nested) for x in sexp[1:])
+        else:
+            stack.extend((x, nested) for x in sexp)
+    return assigned & captured
+
+
+def defined_names(body: SExp) -> list[str]:
+    """Names defined in `body` outside of nested lambdas. They are declared
+    before `body` is compiled, so that a lambda ahead of a define already
+    refers to its slot."""
+    names: list[str] = []
+    stack = [body]
+    while stack:
+        sexp = stack.pop()
+        if not isinstance(sexp, List) or not sexp or sexp[0] is QUOTE:
+            continue
+        if is_lambda(sexp):
+            continue
+        head = sexp[0]
+        if head in DEFINES and len(sexp) > 1 and isinstance(sexp[1], Symbol):
+            if sexp[1].val not in names:
+                names.append(sexp[1].val)
+        if is_applied_lambda(sexp):
+            # its body is declared when inlined, see Compiler.inline_lambda
+            stack.extend(sexp[1:])
+        else:
+            stack.extend(sexp)
+    return names
+
+
+class Scope:
+    """The local names of one lambda, in frame slot order, and the free
+    variables it captures."""
+
+    names: list[str]
+    parent: Optional["Scope"]
+    # names bound by an inlined lambda, to the frame slot they use instead
+    renamed: dict[str, str]
+    # names whose slots hold cells
+    cells: set[str]
+    # captured names, their index in the captured list, whether each is a
+    # cell, and the code reading it from the frame the lambda is made in
+    captures: dict[str, int]
+    captured_cells: list[bool]
+    fetch: list[Code]
+
+    def __init__(
+        self,
+        names: list[str],
+        parent: Optional["Scope"],
+        cells: Optional[set[str]] = None,
+    ) -> None:
+        self.names = names
+        self.parent = parent
+        self.renamed = {}
+        self.cells = cells or set()
+        self.captures = {}
+        self.captured_cells = []
+        self.fetch = []
+
+    def resolve(self, name: str) -> Optional[Address]:
+        slot = self.renamed.get(name, name) if self.renamed else name
+        if slot in self.names:
+            # slot 0 of every frame holds the captured list
+            return LOCAL, self.names.index(slot) + 1, name in self.cells
+        index = self.captures.get(name)
+        if index is not None:
+            return FREE, index, self.captured_cells[index]
+        address = self.parent.resolve(name) if self.parent else None
+        if address is None:
+            return None
+        index = self.captures[name] = len(self.fetch)
+        self.captured_cells.append(address[2])
+        self.fetch.append(frame_slot(address))
+        return FREE, index, address[2]
+
+    def declare(self, name: str) -> int:
+        name = self.renamed.get(name, name)
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name) + 1
+
+    def declare_fresh(self, name: str) -> int:
+        """A new slot for `name`, which resolves to it until `renamed` is
+        restored."""
+        # a space never appears in a parsed symbol
+        slot = f"{name} {len(self.names)}"
+        self.renamed[name] = slot
+        self.names.append(slot)
+        return len(self.names)
+
+    def cell_slots(self) -> tuple[int, ...]:
+        return tuple(
+            i + 1
+            for i, slot in enumerate(self.names)
+            if slot.split(" ")[0] in self.cells
+        )
+
+
+class LambdaInfo:
+    """What a compiled lambda was compiled from, shared by every procedure
+    it makes."""
+
+    __slots__ = ("source", "scope", "globals", "cells")
+
+    def __init__(self, source: List, scope: Scope, globals: dict[str, Any]) -> None:
+        self.source = source
+        self.scope = scope
+        self.globals = globals
+        # frame slots made into cells on every call
+        self.cells = scope.cell_slots()
+
+
+class CompiledFunctionDef(Procedure):
+    def __init__(
+        self,
+        params,
+        body: Code,
+        env: Optional[list[Any]],
+        nlocals: int,
+        name: str = "lambda",
+        info: Optional[LambdaInfo] = None,
+    ):
+        super().__init__(params, body, run_code, name, info.source if info else None)
+        # the captured variables, the first slot of every frame
+        self.env = env
+        self.info = info
+        self.cells = info.cells if info else ()
+        # slots for variables introduced by an internal define
+        self.padding = [None] * (nlocals - len(params))
+
+    def captured(self, names: list[str], globals_: bool = True) -> dict[str, Any]:
+        assert self.info is not None
+        scope = self.info.scope
+        values = {}
+        for name in names:
+            index = scope.captures.get(name)
+            if index is not None:
+                value = self.env[index]  # type: ignore
+                values[name] = value[0] if scope.captured_cells[index] else value
+            elif globals_:
+                values[name] = self.info.globals.get(name)
+        return values
+
+    def shared(self, names: list[str]) -> dict[str, int]:
+        assert self.info is not None
+        scope = self.info.scope
+        keys = {}
+        for name in names:
+            index = scope.captures.get(name)
+            if index is not None and scope.captured_cells[index]:
+                keys[name] = id(self.env[index])  # type: ignore
+        return keys
+
+    def bind(self, args) -> Frame:
+        if len(args) != len(self.params):
+            raise RuntimeError(
+                f"Error: expect {len(self.params)} arguments, found: {len(args)}"
+            )
+        frame = [self.env, *args, *self.padding]
+        for index in self.cells:
+            frame[index] = [frame[index]]
+        return frame
+
+
+def frame_slot(address: Address) -> Code:
+    """Code reading what is stored at `address`, a cell if it is one."""
+    kind, index, _ = address
+    if kind == LOCAL:
+        return lambda frame: frame[index]
+    return lambda frame: frame[0][index]
+
+
+def frame_getter(address: Address) -> Code:
+    kind, index, cell = address
+    if not cell:
+        return frame_slot(address)
+    if kind == LOCAL:
+        return lambda frame: frame[index][0]
+    return lambda frame: frame[0][index][0]
+
+
+class Compiler:
+    globals: dict[str, Any]
+
+    def __init__(self, env: Env, profiler=None, stats=None) -> None:
+        self.globals = env.env
+        # lambdas compiled with a profiler on record their calls into it
+        self.function_def: Callable[..., Procedure] = (
+            profiler.function_def(CompiledFunctionDef)
+            if profiler
+            else CompiledFunctionDef
+        )
+        self.stats = stats
+        if stats:
+            self.function_def = stats.function_def(self.function_def, frames=True)
+        self.special_forms: dict[
+            str, Callable[[List, Optional[Scope], bool], Code]
+        ] = {
+            "define": self.define,
+            "define-memo": self.define_memo,
+            "set!": self.set_band,
+            "if": self.if_,
+            "lambda": self.procedure,
+            "quote": self.quote,
+            "begin": self.begin,
+            "delay": self.delay,
+            "delay-force": self.delay_force,
+            "cons-stream": self.cons_stream,
+        }
+
+    def compile(
+        self, sexp: SExp, scope: Optional[Scope] = None, tail: bool = False
+    ) -> Code:
+        if (
+            isinstance(sexp, Number)
+            or isinstance(sexp, String)
+            or isinstance(sexp, Boolean)
+            or isinstance(sexp, Inlined)
+        ):
+            val = sexp.val
+            return lambda frame: val
+        elif isinstance(sexp, Symbol):
+            return self.symbol(sexp.val, scope, f"symbol '{sexp.val}' not found")
+        elif isinstance(sexp, List):
+            return self.compile_list(sexp, scope, tail)
+        return lambda frame: None
+
+    def symbol(self, id: str, scope: Optional[Scope], missing: str) -> Code:
+        address = scope.resolve(id) if scope else None
+        if self.stats:
+            if not address:
+                self.stats.resolved["global"] += 1
+            elif address[0] == LOCAL:
+                self.stats.resolved["local"] += 1
+            else:
+                self.stats.resolved["captured"] += 1
+        if address:
+            return frame_getter(address)
+        globals_ = self.globals
+
+        def lookup(frame: Frame):
+            try:
+                return globals_[id]
+            except KeyError:
+                raise RuntimeError(f"Error: {missing}") from None
+
+        return lookup
+
+    def compile_list(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        if len(lst) == 0:
+            return lambda frame: NIL
+        op = lst[0]
+        if isinstance(op, Symbol):
+            special_form = self.special_forms.get(op.val)
+            if special_form:
+                return special_form(lst, scope, tail)
+        return self.call(lst, scope, tail)
+
+    def define(
+        self,
+        lst: List,
+        scope: Optional[Scope],
+        tail: bool,
+        wrap: Optional[Callable[[Code], Code]] = None,
+    ) -> Code:
+        id = get_symbol(lst, 1)
+        index = scope.declare(id) if scope else 0
+        value = self.compile_value(lst[2], scope, id)
+        if wrap:
+            value = wrap(value)
+        if scope and id in scope.cells:
+
+            def define_cell(frame: Frame):
+                frame[index][0] = value(frame)
+
+            return define_cell
+        if scope:
+
+            def define_local(frame: Frame):
+                frame[index] = value(frame)
+
+            return define_local
+
+        globals_ = self.globals
+
+        def define(frame: Frame):
+            globals_[id] = value(frame)
+
+        return define
+
+    def define_memo(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        maxsize = (
+            self.compile(lst[3], scope)
+            if len(lst) > 3
+            else (lambda frame: DEFAULT_MAXSIZE)
+        )
+
+        def wrap(value: Code) -> Code:
+            return lambda frame: Memoized(value(frame), maxsize(frame))
+
+        return self.define(lst, scope, tail, wrap)
+
+    def compile_value(self, sexp: SExp, scope: Optional[Scope], name: str) -> Code:
+        if is_lambda(sexp):
+            return self.procedure(sexp, scope, False, name)  # type: ignore
+        return self.compile(sexp, scope)
+
+    def set_band(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        id = get_symbol(lst, 1)
+        value = self.compile(lst[2], scope)
+        address = scope.resolve(id) if scope else None
+        if address:
+            kind, index, cell = address
+            # a captured variable is only assigned without a cell in a
+            # procedure rebuilt by pickling, which owns its captured list
+            if cell:
+                slot = frame_slot(address)
+
+                def set_cell(frame: Frame):
+                    slot(frame)[0] = value(frame)
+
+                return set_cell
+            if kind == FREE:
+
+                def set_free(frame: Frame):
+                    frame[0][index] = value(frame)
+
+                return set_free
+
+            def set_local(frame: Frame):
+                frame[index] = value(frame)
+
+            return set_local
+
+        globals_ = self.globals
+
+        def set_band(frame: Frame):
+            if id not in globals_:
+                raise RuntimeError(
+                    f"Error: symbol '{id}' in {lst.child_offset(1)} not found"
+                )
+            globals_[id] = value(frame)
+
+        return set_band
+
+    def if_(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        pred = self.compile(lst[1], scope)
+        success = self.compile(lst[2], scope, tail)
+        failure = (
+            self.compile(lst[3], scope, tail) if len(lst) > 3 else lambda frame: None
+        )
+
+        def if_(frame: Frame):
+            if pred(frame):
+                return success(frame)
+            return failure(frame)
+
+        return if_
+
+    def procedure(
+        self,
+        lst: List,
+        scope: Optional[Scope],
+        tail: bool,
+        name: Optional[str] = None,
+    ) -> Code:
+        params = [get_symbol(lst[1], i) for i in range(len(lst[1]))]
+        inner = Scope(list(params), scope, cell_names(lst))
+        for id in defined_names(lst[2]):
+            inner.declare(id)
+        body = self.compile(lst[2], inner, tail=True)
+        nlocals = len(inner.names)
+        function_def = self.function_def
+        name = procedure_name(lst, name)
+        info = LambdaInfo(lst, inner, self.globals)
+        fetch = inner.fetch
+        if not fetch:
+            return lambda frame: function_def(params, body, None, nlocals, name, info)
+        return lambda frame: function_def(
+            params, body, [get(frame) for get in fetch], nlocals, name, info
+        )
+
+    def quote(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        value = datum(lst[1])
+        return lambda frame: value
+
+    def begin(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        if len(lst) == 1:
+            return lambda frame: None
+        init = [self.compile(x, scope) for x in lst[1:-1]]
+        last = self.compile(lst[-1], scope, tail)
+
+        def begin(frame: Frame):
+            for code in init:
+                code(frame)
+            return last(frame)
+
+        return begin
+
+    def delay(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        expr = self.compile(lst[1], scope)
+        return lambda frame: Promise(lambda: expr(frame))
+
+    def delay_force(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        expr = self.compile(lst[1], scope)
+        return lambda frame: Promise(lambda: expr(frame), chained=True)
+
+    def cons_stream(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        head = self.compile(lst[1], scope)
+        rest = self.compile(lst[2], scope)
+        return lambda frame: Pair(head(frame), Promise(lambda: rest(frame)))
+
+    def call(self, lst: List, scope: Optional[Scope], tail: bool) -> Code:
+        head = lst[0]
+        if scope and is_applied_lambda(lst):
+            return self.inline_lambda(lst, scope, tail)
+        if isinstance(head, Inlined):
+            return self.builtin_call(head.val, lst, scope)
+        if isinstance(head, Symbol):
+            operator = self.symbol(
+                head.val,
+                scope,
+                f"procedure {head.val} in {lst.child_offset(0)} not found",
+            )
+        else:
+            operator = self.compile(head, scope)
+        args = [self.compile(arg, scope) for arg in lst[1:]]
+        if tail:
+            return self.tail_call(operator, args)
+
+        # specialise the common arities to avoid building an argument list
+        if len(args) == 0:
+            return lambda frame: operator(frame)()
+        if len(args) == 1:
+            (a,) = args
+            return lambda frame: operator(frame)(a(frame))
+        if len(args) == 2:
+            a, b = args
+            return lambda frame: operator(frame)(a(frame), b(frame))
+        if len(args) == 3:
+            a, b, c = args
+            return lambda frame: operator(frame)(a(frame), b(frame), c(frame))
+        return lambda frame: operator(frame)(*[arg(frame) for arg in args])
+
+    def inline_lambda(self, lst: List, scope: Scope, tail: bool) -> Code:
+        """`((lambda (params) body) args)` as the body run in the current
+        frame, with the parameters in fresh slots of it. Every expression
+        runs at most once per frame, so the slots are never reused."""
+        head = lst[0]
+        args = [self.compile(arg, scope) for arg in lst[1:]]
+        params = [get_symbol(head[1], i) for i in range(len(head[1]))]
+        renamed = dict(scope.renamed)
+        indexes = [scope.declare_fresh(param) for param in params]
+        for id in defined_names(head[2]):
+            scope.declare(id)
+        body = self.compile(head[2], scope, tail)
+        scope.renamed = renamed
+        if any(param in scope.cells for param in params):
+            # the frame was made with cells in these slots
+            cell_bindings = [
+                (index, arg, param in scope.cells)
+                for index, arg, param in zip(indexes, args, params)
+            ]
+
+            def let_cells(frame: Frame):
+                for index, arg, cell in cell_bindings:
+                    if cell:
+                        frame[index][0] = arg(frame)
+                    else:
+                        frame[index] = arg(frame)
+                return body(frame)
+
+            return let_cells
+        if len(args) == 1:
+            (index,), (a,) = indexes, args
+
+            def let_one(frame: Frame):
+                frame[index] = a(frame)
+                return body(frame)
+
+            return let_one
+        bindings = list(zip(indexes, args))
+
+        def let(frame: Frame):
+            for index, arg in bindings:
+                frame[index] = arg(frame)
+            return body(frame)
+
+        return let
+
+    def builtin_call(self, proc: Callable, lst: List, scope: Optional[Scope]) -> Code:
+        # a builtin never returns a TailCall, so tail position needs nothing
+        args = [self.compile(arg, scope) for arg in lst[1:]]
+        if len(args) == 1:
+            (a,) = args
+            return lambda frame: proc(a(frame))
+        if len(args) == 2:
+            a, b = args
+            return lambda frame: proc(a(frame), b(frame))
+        return lambda frame: proc(*[arg(frame) for arg in args])
+
+    def tail_call(self, operator: Code, args: list[Code]) -> Code:
+        def tail_call(frame: Frame):
+            proc = operator(frame)
+            values = [arg(frame) for arg in args]
+            if isinstance(proc, Procedure):
+                return TailCall(proc, values)
+            return proc(*values)
+
+        return tail_call
@@ -0,0 +1,279 @@
+import math
+import operator as op
+import string
+from abc import ABC, abstractmethod
+from functools import reduce
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from pythonlisp.memo import Memoized, memo_stats
+from pythonlisp.parallel import pmap
+from pythonlisp.parser_ import NIL, List, Nil, Pair, Symbol
+from pythonlisp.ports import PRIMITIVES as PORT_PRIMITIVES
+from pythonlisp.streams import PRIMITIVES as STREAM_PRIMITIVES
+from pythonlisp.tables import PRIMITIVES as TABLE_PRIMITIVES
+from pythonlisp.vectors import PRIMITIVES as VECTOR_PRIMITIVES
+
+
+def map_(f, iterable):
+    return Pair.from_iterable(map(f, iterable))
+
+
+def append(*lists):
+    """The items of all but the last list, ahead of the last one."""
+    if not lists:
+        return NIL
+    items: list = []
+    for xs in lists[:-1]:
+        items.extend(xs)
+    return Pair.from_iterable(items, lists[-1])
+
+
+def car(xs: Pair):
+    try:
+        return xs.car
+    except AttributeError:
+        raise RuntimeError(f"Error: expect pair, found: {type(xs)}") from None
+
+
+def cdr(xs: Pair):
+    try:
+        return xs.cdr
+    except AttributeError:
+        raise RuntimeError(f"Error: expect pair, found: {type(xs)}") from None
+
+
+def is_number(x) -> bool:
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def get_symbol(lst: List, index: int) -> str:
+    s = lst[index]
+    if not isinstance(s, Symbol):
+        raise RuntimeError(
+            f"Error: expect symbol in {lst.child_offset(index)}, found: {type(s)}"
+        )
+    return s.val
+
+
+def is_lambda(sexp) -> bool:
+    return isinstance(sexp, List) and len(sexp) > 0 and sexp[0] is Symbol("lambda")
+
+
+def is_applied_lambda(lst: List) -> bool:
+    """`((lambda (params) body) args)`, with an argument for each parameter."""
+    head = lst[0]
+    return (
+        is_lambda(head)
+        and len(head) > 2
+        and isinstance(head[1], List)
+        and len(head[1]) == len(lst) - 1
+    )
+
+
+def procedure_name(lst: List, name: Optional[str] = None) -> str:
+    """How a lambda shows up in profiles: the name it is defined as, or
+    where it is written."""
+    if name:
+        return name
+    offset = lst.offset
+    if offset is None:
+        return "lambda"
+    return f"lambda@{offset.lineno}:{offset.column}"
+
+
+class Env:
+    parent: Optional["Env"]
+    env: dict[str, Any]
+    # built once and shared, every global environment starts as a copy
+    builtins: Optional[Mapping[str, Any]] = None
+
+    def __init__(self, parent: Optional["Env"] = None):
+        self.parent = parent
+        self.env = dict()
+        if not self.parent:
+            self.env = self.default_env()
+
+    def default_env(self) -> dict[str, Any]:
+        # a shallow copy: definitions stay private to this environment, and
+        # a global is still found with one dict lookup
+        if Env.builtins is None:
+            Env.builtins = MappingProxyType(self.make_builtins())
+        return dict(Env.builtins)
+
+    @staticmethod
+    def make_builtins() -> dict[str, Any]:
+        env = dict()
+        env.update({k: v for k, v in vars(math).items() if callable(v)})
+        env.update({k: v for k, v in vars(op).items() if callable(v)})
+        env.update({k: v for k, v in vars(string).items() if callable(v)})
+        env.update(
+            {
+                "+": op.add,
+                "-": op.sub,
+                "*": op.mul,
+                "/": op.truediv,
+                ">": op.gt,
+                "<": op.lt,
+                ">=": op.ge,
+                "<=": op.le,
+                "=": op.eq,
+                "eq?": op.is_,
+                "equal?": op.eq,
+                "car": car,
+                "cdr": cdr,
+                "cons": Pair,
+                "length": len,
+                "map": map_,
+                "append": append,
+                "pmap": pmap,
+                "reduce": reduce,
+                "max": max,
+                "min": min,
+                "round": round,
+                "apply": lambda proc, args: proc(*args),
+                "list": lambda *xs: Pair.from_iterable(xs),
+                "number?": is_number,
+                "list?": lambda x: isinstance(x, (Pair, Nil)),
+                "pair?": lambda x: isinstance(x, Pair),
+                "str?": lambda x: isinstance(x, str),
+                "symbol?": lambda x: isinstance(x, Symbol),
+                "boolean?": lambda x: isinstance(x, bool),
+                "null?": lambda xs: xs is NIL,
+                "procedure?": callable,
+                "print": print,
+                "memoize": Memoized,
+                "memo-stats": memo_stats,
+            }
+        )
+        env.update(VECTOR_PRIMITIVES)
+        env.update(STREAM_PRIMITIVES)
+        env.update(PORT_PRIMITIVES)
+        env.update(TABLE_PRIMITIVES)
+        return env
+
+    def find(self, key: str) -> Optional[Any]:
+        env: Optional[Env] = self
+        while env:
+            var = env.env.get(key)
+            if var is not None:
+                return var
+            env = env.parent
+        return None
+
+    def add(self, key: str, value: Any):
+        self.env[key] = value
+
+    def set(self, key: str, value: Any):
+        env: Optional[Env] = self
+        while env:
+            if key in env.env:
+                env.env[key] = value
+                return
+            env = env.parent
+        self.env[key] = value
+
+
+class TailCall:
+    """A call left in tail position, returned for the caller to run."""
+
+    __slots__ = ("proc", "args")
+
+    def __init__(self, proc: "Procedure", args) -> None:
+        self.proc = proc
+        self.args = args
+
+
+class Procedure(ABC):
+    """A Lisp procedure of any engine. Subclasses say where its variables
+    live and how `bind` makes the frame its body is evaluated in."""
+
+    def __init__(
+        self,
+        params,
+        body,
+        eval,
+        name: str = "lambda",
+        source: Optional[List] = None,
+    ):
+        self.params = params
+        self.body = body
+        self.eval = eval
+        self.name = name
+        # the lambda expression, to rebuild the procedure from when pickled
+        self.source = source
+
+    @abstractmethod
+    def captured(self, names: list[str], globals_: bool = True) -> dict[str, Any]:
+        """The values of `names` where this procedure was made, leaving out
+        global ones unless `globals_`."""
+
+    @abstractmethod
+    def shared(self, names: list[str]) -> dict[str, int]:
+        """For the `names` whose variables other procedures may share, such
+        as locals of the frame this procedure was made in, an id of where
+        each variable is kept."""
+
+    @abstractmethod
+    def bind(self, args) -> Any:
+        """The frame the body is evaluated in, with `args` bound."""
+
+    def __reduce__(self):
+        from pythonlisp.pickling import reduce_procedure
+
+        return reduce_procedure(self)
+
+    def __call__(self, *args) -> Any:
+        # `eval` evaluates the body with its tail call left unevaluated, so
+        # loops written as tail recursion bounce here in constant stack
+        proc = self
+        while True:
+            result = proc.eval(proc.body, proc.bind(args))
+            if type(result) is not TailCall:
+                return result
+            proc, args = result.proc, result.args
+
+
+class FunctionDef(Procedure):
+    """A procedure whose variables are looked up in a chain of `Env`s."""
+
+    def __init__(
+        self,
+        params,
+        body,
+        eval,
+        env: Env,
+        name: str = "lambda",
+        source: Optional[List] = None,
+    ):
+        super().__init__(params, body, eval, name, source)
+        self.env = env
+
+    def frame(self, name: str) -> Optional[Env]:
+        """The frame `name` is found in from this procedure."""
+        env: Optional[Env] = self.env
+        while env is not None and name not in env.env:
+            env = env.parent
+        return env
+
+    def captured(self, names: list[str], globals_: bool = True) -> dict[str, Any]:
+        values = {}
+        for name in names:
+            env = self.frame(name)
+            if env is not None and (globals_ or env.parent is not None):
+                values[name] = env.env[name]
+        return values
+
+    def shared(self, names: list[str]) -> dict[str, int]:
+        keys = {}
+        for name in names:
+            env = self.frame(name)
+            if env is not None and env.parent is not None:
+                keys[name] = id(env.env)
+        return keys
+
+    def bind(self, args) -> Env:
+        # a frame of the same kind as the one the procedure was made in
+        env_ = type(self.env)(self.env)
+        env_.env.update({k: v for k, v in zip(self.params, args)})
+        return env_
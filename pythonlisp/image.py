@@ -0,0 +1,127 @@
+"""Images: the user-defined globals and macros of an interpreter, saved to
+a file so a new process can start with them without evaluating their
+sources.
+
+Procedures are saved as their lambda source and the values of the local
+variables they close over, and are made again by the engine of the
+interpreter loading the image. Procedures sharing a variable still share
+it once loaded. The globals they use are looked up in the loading
+interpreter, so redefining a global afterwards affects the loaded
+procedures too. Builtins are saved by name.
+"""
+
+import os
+import pickle  # nosec B403: images are only loaded from trusted files
+import tempfile
+from typing import Any, Sequence
+
+from pythonlisp.cache import cache_tag
+from pythonlisp.env import Env, Procedure
+from pythonlisp.interpreter import Interpreter
+from pythonlisp.macros import CORE
+from pythonlisp.parser_ import List
+from pythonlisp.pickling import Cell, rebuild_procedure, reduce_procedure
+
+
+class ImageError(Exception):
+    pass
+
+
+def user_macros(interpreter: Interpreter) -> dict[str, Any]:
+    return {
+        name: macro
+        for name, macro in interpreter.expander.macros.items()
+        if CORE.get(name) is not macro
+    }
+
+
+def user_globals(interpreter: Interpreter) -> dict[str, Any]:
+    builtins = Env.builtins or {}
+    return {
+        name: value
+        for name, value in interpreter.env.env.items()
+        if name not in builtins or builtins[name] is not value
+    }
+
+
+class ImagePickler(pickle.Pickler):
+    def __init__(self, file) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        builtins = Env.builtins or {}
+        self.builtin_names = {id(value): name for name, value in builtins.items()}
+        # the shared variables of the procedures saved so far
+        self.cells: dict[tuple[int, str], Cell] = {}
+
+    def persistent_id(self, obj):
+        name = self.builtin_names.get(id(obj))
+        return None if name is None else ("builtin", name)
+
+    def reducer_override(self, obj):
+        if isinstance(obj, Procedure):
+            return reduce_procedure(obj, capture_globals=False, cells=self.cells)
+        return NotImplemented
+
+
+class ImageUnpickler(pickle.Unpickler):
+    def __init__(self, file, interpreter: Interpreter) -> None:
+        super().__init__(file)
+        self.interpreter = interpreter
+
+    def persistent_load(self, pid):
+        _, name = pid
+        return Env.builtins[name]  # type: ignore
+
+    def find_class(self, module: str, name: str):
+        if (module, name) == ("pythonlisp.pickling", "rebuild_procedure"):
+            return self.rebuild_procedure
+        return super().find_class(module, name)  # nosec B301
+
+    def rebuild_procedure(
+        self, source: List, name: str, names: list[str], cells: Sequence[str] = ()
+    ) -> Procedure:
+        """`rebuild_procedure`, made by the engine of the interpreter."""
+        interpreter = self.interpreter
+        if interpreter.engine == "compile":
+            return rebuild_procedure(source, name, names, cells, interpreter.compiler)
+        # a frame for the captured variables, filled in by `fill_captured`
+        env = type(interpreter.env)(interpreter.env)
+        if interpreter.engine == "machine":
+            return interpreter.machine.procedure(source, env, name)
+        return interpreter.procedure(source, env, name)
+
+
+def save(interpreter: Interpreter, filename: str) -> int:
+    """Write the user globals and macros of `interpreter` to `filename`,
+    returning how many globals there were. An image that cannot be saved
+    leaves the file as it was."""
+    values = user_globals(interpreter)
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(filename)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickler = ImagePickler(f)
+            pickler.dump(cache_tag())
+            pickler.dump(values)
+            pickler.dump(user_macros(interpreter))
+    except Exception as e:
+        os.remove(tmp)
+        raise ImageError(f"Error: cannot save image {filename}: {e}") from None
+    os.replace(tmp, filename)
+    return len(values)
+
+
+def load(interpreter: Interpreter, filename: str) -> int:
+    """Define the globals and macros saved in `filename` in `interpreter`."""
+    with open(filename, "rb") as f:
+        unpickler = ImageUnpickler(f, interpreter)
+        tag = unpickler.load()
+        if tag != cache_tag():
+            raise ImageError(
+                f"Error: image {filename} was saved by {tag}, expect {cache_tag()}"
+            )
+        values = unpickler.load()
+        macros = unpickler.load()
+    interpreter.env.env.update(values)
+    interpreter.expander.macros.update(macros)
+    return len(values)
@@ -1,187 +1,253 @@
-import math
-import operator as op
-import string
-from functools import reduce
-from typing import Any, Optional
-
-from pythonlisp.parser_ import (Boolean, List, Number, Parser, SExp, String,
-                                Symbol)
-
-
-def map_(f, iterable):
-    return List(map(f, iterable))
-
-
-def get_symbol(s: Symbol) -> str:
-    if not isinstance(s, Symbol):
-        raise RuntimeError(f"Error: expect symbol in {s.pos}, found: {type(s)}")
-    return s.val
-
-
-class Env:
-    parent: Optional["Env"]
-    env: dict[str, Any]
-
-    def __init__(self, parent: Optional["Env"] = None):
-        self.parent = parent
-        self.env = dict()
-        if not self.parent:
-            self.env = self.default_env()
-
-    def default_env(self):
-        env = dict()
-        env.update({k: v for k, v in vars(math).items() if callable(v)})
-        env.update({k: v for k, v in vars(op).items() if callable(v)})
-        env.update({k: v for k, v in vars(string).items() if callable(v)})
-        env.update(
-            {
-                "+": op.add,
-                "-": op.sub,
-                "*": op.mul,
-                "/": op.truediv,
-                ">": op.gt,
-                "<": op.lt,
-                ">=": op.ge,
-                "<=": op.le,
-                "=": op.eq,
-                "eq?": op.is_,
-                "equal?": op.eq,
-                "car": lambda xs: xs[0],
-                "cdr": lambda xs: List(xs[1:]),
-                "cons": lambda x, ys: List([x] + ys),
-                "length": len,
-                "map": map_,
-                "reduce": reduce,
-                "max": max,
-                "min": min,
-                "round": round,
-                "apply": lambda proc, args: proc(*args),
-                "list": lambda *xs: List(xs),
-                "number?": lambda x: isinstance(x, Number),
-                "list?": lambda x: isinstance(x, List),
-                "str?": lambda x: isinstance(x, String),
-                "symbol?": lambda x: isinstance(x, Symbol),
-                "boolean?": lambda x: isinstance(x, Boolean),
-                "null?": lambda xs: xs == List([]),
-                "procedure?": callable,
-                "print": print,
-            }
-        )
-        return env
-
-    def find(self, key: str) -> Optional[Any]:
-        env = self
-        while env:
-            var = env.env.get(key)
-            if var is not None:
-                return var
-            env = env.parent
-        return None
-
-    def add(self, key: str, value: Any):
-        self.env[key] = value
+from typing import Iterator, Optional
 
+from pythonlisp import cache
+from pythonlisp.compiler import Compiler
+from pythonlisp.env import (Env, FunctionDef, Procedure,  # noqa: F401
+                            TailCall, get_symbol, is_applied_lambda,
+                            is_lambda, map_, procedure_name)
+from pythonlisp.machine import Machine
+from pythonlisp.macros import Expander
+from pythonlisp.memo import DEFAULT_MAXSIZE, Memoized
+from pythonlisp.optimizer import Inlined, Optimizer
+from pythonlisp.parser_ import (NIL, Boolean, List, Number, Pair, Parser,
+                                SExp, SourceMap, String, Symbol, datum)
+from pythonlisp.streams import Promise
+from pythonlisp.tokenizer import Token, TokenKind, read_chunks
 
-class FunctionDef:
-    def __init__(self, params, body, eval, env: Env):
-        self.params = params
-        self.body = body
-        self.eval = eval
-        self.env = env
-
-    def __call__(self, *args) -> Any:
-        env_ = Env(parent=self.env)
-        env_.env.update({k: v for k, v in zip(self.params, args)})
-        return self.eval(self.body, env_)
+ENGINES = ("compile", "tree", "machine")
 
 
 class Interpreter:
     parser: Parser
     env: Env
-
-    def __init__(self) -> None:
+    engine: str
+
+    def __init__(
+        self,
+        engine: str = "compile",
+        profiler=None,
+        optimize: bool = False,
+        stats=None,
+    ) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine '{engine}', expect one of {ENGINES}")
         self.parser = Parser()
-        self.env = Env()
+        self.env = stats.env() if stats else Env()
+        self.engine = engine
+        self.profiler = profiler
+        self.stats = stats
+        self.compiler = Compiler(self.env, profiler, stats)
+        self.machine = Machine(profiler, stats)
+        self.function_def = (
+            profiler.function_def(FunctionDef) if profiler else FunctionDef
+        )
+        if stats:
+            self.function_def = stats.function_def(self.function_def)
+        self.optimizer = Optimizer(self.env.env) if optimize else None
+        self.expander = Expander(self.evaluate)
 
     def interpret(self, source: str):
-        ast = self.parser.parse(source)
+        if self.stats:
+            tokens = self.parser.tokenizer.tokenize(source)
+            ast = list(self.parse_timed(tokens, SourceMap()))
+        else:
+            ast = self.parser.parse(source)
         result = None
         for sexp in ast:
-            result = self.eval_sexp(sexp, self.env)
+            result = self.evaluate(sexp)
         return result
 
-    def eval_sexp(self, sexp: SExp, env: Env):
+    def interpret_stream(self, stream):
+        """Parse and evaluate one top-level form at a time from a file, an
+        mmap or an iterable of text chunks, so memory stays bounded by the
+        largest form rather than the whole program."""
+        chunks = read_chunks(stream)
+        if self.stats:
+            forms = self.parse_timed(self.parser.tokenizer.tokenize_stream(chunks))
+        else:
+            forms = self.parser.parse_stream(chunks)
+        result = None
+        for sexp in forms:
+            result = self.evaluate(sexp)
+        return result
+
+    def interpret_file(self, filename: str, use_cache: bool = True):
+        """Run a program file, taking its parsed forms from the
+        `__lispcache__` next to it when the file has not changed. Stats
+        are only kept of a file read and parsed again."""
+        if not use_cache or self.stats:
+            with open(filename, "rb") as f:
+                return self.interpret_stream(f)
+        result = None
+        for sexp in cache.cached_forms(filename, self.parser):
+            result = self.evaluate(sexp)
+        return result
+
+    def parse_timed(
+        self, tokens: Iterator[Token], source_map: Optional[SourceMap] = None
+    ) -> Iterator[SExp]:
+        """`Parser.parse_tokens`, timing tokenizing and parsing apart while
+        the forms are streamed, and counting tokens and nodes."""
+        stats = self.stats
+
+        def counted(tokens: Iterator[Token]) -> Iterator[Token]:
+            for token in stats.timed("tokenize", tokens):
+                if token.kind is not TokenKind.EOF:
+                    stats.tokens += 1
+                yield token
+
+        forms = self.parser.parse_tokens(counted(tokens), source_map)
+        for sexp in stats.timed("parse", forms):
+            stats.count_nodes(sexp)
+            yield sexp
+
+    def evaluate(self, sexp: SExp):
+        if self.stats:
+            return self.evaluate_timed(sexp)
+        sexp = self.expander.expand(sexp)
+        if self.optimizer:
+            sexp = self.optimizer.optimize(sexp)
+        if self.engine == "compile":
+            return self.compiler.compile(sexp)([])
+        if self.engine == "machine":
+            return self.machine.execute(sexp, self.env)
+        return self.eval_sexp(sexp, self.env)
+
+    def evaluate_timed(self, sexp: SExp):
+        stats = self.stats
+        with stats.phase("expand"):
+            sexp = self.expander.expand(sexp)
+        if self.optimizer:
+            with stats.phase("optimize"):
+                sexp = self.optimizer.optimize(sexp)
+        if self.engine == "compile":
+            with stats.phase("compile"):
+                code = self.compiler.compile(sexp)
+            with stats.phase("evaluate"):
+                return code([])
+        with stats.phase("evaluate"):
+            if self.engine == "machine":
+                return self.machine.execute(sexp, self.env)
+            return self.eval_sexp(sexp, self.env)
+
+    def eval_sexp(self, sexp: SExp, env: Env, tail: bool = False):
         if (
             isinstance(sexp, Number)
             or isinstance(sexp, String)
             or isinstance(sexp, Boolean)
+            or isinstance(sexp, Inlined)
         ):
             return sexp.val
         elif isinstance(sexp, Symbol):
             value = env.find(sexp.val)
             if value is None:
                 raise RuntimeError(f"Error: symbol '{sexp.val}' not found")
-            # add the symbol to the current environment for cache
-            env.add(sexp.val, value)
             return value
         elif isinstance(sexp, List):
-            return self.eval_list(sexp, env)
+            return self.eval_list(sexp, env, tail)
+
+    def eval_tail(self, sexp: SExp, env: Env):
+        return self.eval_sexp(sexp, env, tail=True)
 
-    def eval_list(self, lst: List, env: Env):
+    def eval_list(self, lst: List, env: Env, tail: bool = False):
         if len(lst) == 0:
-            return lst
+            return NIL
         op = lst[0]
         if isinstance(op, Symbol):
             if op.val == "define":
                 return self.define(lst, env)
+            elif op.val == "define-memo":
+                return self.define_memo(lst, env)
             elif op.val == "set!":
                 return self.set_band(lst, env)
             elif op.val == "if":
-                return self.if_(lst, env)
+                return self.if_(lst, env, tail)
             elif op.val == "lambda":
                 return self.procedure(lst, env)
             elif op.val == "quote":
                 return self.quote(lst, env)
-        return self.call(lst, env)
+            elif op.val == "begin":
+                return self.begin(lst, env, tail)
+            elif op.val == "delay":
+                return Promise(lambda: self.eval_sexp(lst[1], env))
+            elif op.val == "delay-force":
+                return Promise(lambda: self.eval_sexp(lst[1], env), chained=True)
+            elif op.val == "cons-stream":
+                return Pair(
+                    self.eval_sexp(lst[1], env),
+                    Promise(lambda: self.eval_sexp(lst[2], env)),
+                )
+        return self.call(lst, env, tail)
 
     def define(self, lst: List, env: Env):
-        id = get_symbol(lst[1])
-        env.add(id, self.eval_sexp(lst[2], env))
+        id = get_symbol(lst, 1)
+        if is_lambda(lst[2]):
+            env.add(id, self.procedure(lst[2], env, id))
+        else:
+            env.add(id, self.eval_sexp(lst[2], env))
+
+    def define_memo(self, lst: List, env: Env):
+        self.define(lst, env)
+        id = lst[1].val
+        maxsize = self.eval_sexp(lst[3], env) if len(lst) > 3 else DEFAULT_MAXSIZE
+        env.add(id, Memoized(env.env[id], maxsize))
 
     def set_band(self, lst: List, env: Env):
-        id = get_symbol(lst[1])
-        if not env.find(id):
-            raise RuntimeError(f"Error: symbol '{id}' in {lst[1].pos} not found")
-        env.add(id, self.eval_sexp(lst[2], env))
+        id = get_symbol(lst, 1)
+        if env.find(id) is None:
+            raise RuntimeError(
+                f"Error: symbol '{id}' in {lst.child_offset(1)} not found"
+            )
+        env.set(id, self.eval_sexp(lst[2], env))
 
-    def if_(self, lst: list[Any], env: Env):
+    def if_(self, lst: List, env: Env, tail: bool = False):
         pred = lst[1]
         success = lst[2]
-        failure = lst[3]
         if self.eval_sexp(pred, env):
-            return self.eval_sexp(success, env)
-        return self.eval_sexp(failure, env)
+            return self.eval_sexp(success, env, tail)
+        if len(lst) > 3:
+            return self.eval_sexp(lst[3], env, tail)
+        return None
 
-    def call(self, lst: list[Any], env: Env):
+    def call(self, lst: List, env: Env, tail: bool = False):
+        if isinstance(lst[0], List) and is_applied_lambda(lst):
+            return self.applied_lambda(lst, env, tail)
+        if isinstance(lst[0], Inlined):
+            return lst[0].val(*[self.eval_sexp(arg, env) for arg in lst[1:]])
         try:
-            id = get_symbol(lst[0])
+            id = get_symbol(lst, 0)
             proc = env.find(id)
         except Exception:
             proc = self.eval_sexp(lst[0], env)
         if not proc:
-            raise RuntimeError(f"Error: procedure {id} in {lst[0].pos} not found")
+            raise RuntimeError(
+                f"Error: procedure {id} in {lst.child_offset(0)} not found"
+            )
         args = [self.eval_sexp(arg, env) for arg in lst[1:]]
+        if tail and isinstance(proc, Procedure):
+            return TailCall(proc, args)
         return proc(*args)
 
-    def procedure(self, lst: list[Any], env):
-        params = [get_symbol(param) for param in lst[1]]
+    def procedure(self, lst: List, env, name: Optional[str] = None):
+        params = [get_symbol(lst[1], i) for i in range(len(lst[1]))]
         body = lst[2]
-        return FunctionDef(params, body, self.eval_sexp, env)
+        return self.function_def(
+            params, body, self.eval_tail, env, procedure_name(lst, name), lst
+        )
 
-    def quote(self, lst: list[Any], env: Env):
-        items = lst[1]
-        if not isinstance(items, List):
-            raise RuntimeError(
-                f"Error: expect list in {items.pos}, found: {type(items)}"
-            )
-        return items
+    def quote(self, lst: List, env: Env):
+        return datum(lst[1])
+
+    def begin(self, lst: List, env: Env, tail: bool = False):
+        for sexp in lst[1:-1]:
+            self.eval_sexp(sexp, env)
+        if len(lst) > 1:
+            return self.eval_sexp(lst[-1], env, tail)
+
+    def applied_lambda(self, lst: List, env: Env, tail: bool = False):
+        # run the body straight away instead of making a procedure to call
+        head = lst[0]
+        env_ = type(env)(env)
+        for i, arg in enumerate(lst[1:]):
+            env_.env[get_symbol(head[1], i)] = self.eval_sexp(arg, env)
+        return self.eval_sexp(head[2], env_, tail)
@@ -0,0 +1,241 @@
+"""Evaluator keeping its continuations on an explicit stack.
+
+The tree-walking evaluator recurses in Python for every nested form and
+every non-tail call, which limits Lisp recursion to a few hundred calls.
+This engine evaluates the same syntax tree in a single loop. What is
+left to do after a subexpression, evaluating the next argument of a
+call, choosing an `if` branch, storing a definition, is pushed as a
+frame on a list, so the depth of a recursion is only limited by memory.
+
+Applying a procedure made by this engine replaces the current expression
+with its body instead of pushing a frame, so tail calls run in constant
+space without trampolining. Builtins, and procedures called from them
+(by `map`, `reduce`, `force`, ...), are ordinary Python calls.
+
+With a profiler, a RETURN frame marks where each profiled call ends. A
+call made when the top frame is a RETURN is a tail call, and takes over
+that frame and the caller's profiler entry.
+"""
+
+from functools import partial
+from typing import Any, Callable, Optional
+
+from pythonlisp.env import (Env, FunctionDef, Procedure, get_symbol,
+                            is_lambda, procedure_name)
+from pythonlisp.memo import DEFAULT_MAXSIZE, Memoized
+from pythonlisp.optimizer import Inlined
+from pythonlisp.parser_ import NIL, List, Pair, SExp, Symbol, datum
+from pythonlisp.streams import Promise
+
+# continuation frames, tuples starting with one of these
+CALL, IF, DEFINE, DEFINE_MEMO, SET, CONS_STREAM, BEGIN, RETURN = range(8)
+# special forms evaluated without a frame
+QUOTE, LAMBDA, DELAY, DELAY_FORCE = range(8, 12)
+
+SPECIAL_FORMS = {
+    "define": DEFINE,
+    "define-memo": DEFINE_MEMO,
+    "set!": SET,
+    "if": IF,
+    "lambda": LAMBDA,
+    "quote": QUOTE,
+    "begin": BEGIN,
+    "delay": DELAY,
+    "delay-force": DELAY_FORCE,
+    "cons-stream": CONS_STREAM,
+}
+
+# the value passed to a new CALL frame, before any argument is evaluated
+START = object()
+RETURN_FRAME = (RETURN, None)
+
+
+class MachineFunctionDef(FunctionDef):
+    """A procedure whose body the machine enters without calling it."""
+
+    def __call__(self, *args) -> Any:
+        return self.eval(self.body, self.bind(args), self)
+
+
+class Machine:
+    def __init__(self, profiler=None, stats=None) -> None:
+        self.profiler = profiler
+        self.function_def: Callable[..., Procedure] = MachineFunctionDef
+        if stats:
+            self.function_def = stats.function_def(MachineFunctionDef)
+
+    def procedure(self, lst: List, env: Env, name: Optional[str] = None):
+        params = [get_symbol(lst[1], i) for i in range(len(lst[1]))]
+        return self.function_def(
+            params, lst[2], self.execute, env, procedure_name(lst, name), lst
+        )
+
+    def execute(
+        self, sexp: SExp, env: Env, proc: Optional[MachineFunctionDef] = None
+    ) -> Any:
+        """The value of `sexp` in `env`, which is the body of `proc` when
+        it is called from Python."""
+        profiler = self.profiler
+        stack: list[tuple] = []
+        if profiler and proc:
+            profiler.enter(proc.name)
+            stack.append(RETURN_FRAME)
+        try:
+            return self.run(sexp, env, stack)
+        except BaseException:
+            if profiler:
+                for _ in range(stack.count(RETURN_FRAME)):
+                    profiler.exit()
+            raise
+
+    def run(self, sexp: SExp, env: Env, stack: list[tuple]) -> Any:
+        profiler = self.profiler
+        value: Any
+        while True:
+            # evaluate `sexp`, either pushing frames and continuing with a
+            # subexpression, or leaving its value in `value`
+            if isinstance(sexp, Symbol):
+                value = env.find(sexp.val)
+                if value is None:
+                    raise RuntimeError(f"Error: symbol '{sexp.val}' not found")
+            elif not isinstance(sexp, List):
+                value = getattr(sexp, "val", None)
+            elif not sexp:
+                value = NIL
+            else:
+                op = sexp[0]
+                form = SPECIAL_FORMS.get(op.val) if isinstance(op, Symbol) else None
+                if form is None:
+                    if isinstance(op, Symbol):
+                        proc = env.find(op.val)
+                        if proc is None:
+                            raise RuntimeError(
+                                f"Error: procedure {op.val} in "
+                                f"{sexp.child_offset(0)} not found"
+                            )
+                        stack.append((CALL, sexp, env, [proc]))
+                    elif isinstance(op, Inlined):
+                        stack.append((CALL, sexp, env, [op.val]))
+                    else:
+                        stack.append((CALL, sexp, env, []))
+                    value = START
+                elif form == IF:
+                    stack.append((IF, sexp, env))
+                    sexp = sexp[1]
+                    continue
+                elif form == DEFINE or form == DEFINE_MEMO:
+                    id = get_symbol(sexp, 1)
+                    stack.append((form, sexp, env))
+                    if not is_lambda(sexp[2]):
+                        sexp = sexp[2]
+                        continue
+                    value = self.procedure(sexp[2], env, id)
+                elif form == SET:
+                    id = get_symbol(sexp, 1)
+                    if env.find(id) is None:
+                        raise RuntimeError(
+                            f"Error: symbol '{id}' in {sexp.child_offset(1)} not found"
+                        )
+                    stack.append((SET, sexp, env))
+                    sexp = sexp[2]
+                    continue
+                elif form == LAMBDA:
+                    value = self.procedure(sexp, env)
+                elif form == QUOTE:
+                    value = datum(sexp[1])
+                elif form == BEGIN:
+                    if len(sexp) == 1:
+                        value = None
+                    else:
+                        if len(sexp) > 2:
+                            stack.append((BEGIN, sexp, env, 1))
+                        sexp = sexp[1]
+                        continue
+                elif form == DELAY:
+                    value = Promise(partial(self.execute, sexp[1], env))
+                elif form == DELAY_FORCE:
+                    value = Promise(partial(self.execute, sexp[1], env), chained=True)
+                else:
+                    stack.append((CONS_STREAM, sexp, env))
+                    sexp = sexp[1]
+                    continue
+
+            # hand `value` to the frames waiting for it, until one of them
+            # continues with another expression
+            while stack:
+                frame = stack.pop()
+                kind, lst = frame[0], frame[1]
+                if kind == CALL:
+                    env, values = frame[2], frame[3]
+                    if value is not START:
+                        values.append(value)
+                    # plain arguments are evaluated here, without a frame
+                    i, n = len(values), len(lst)
+                    while i < n:
+                        arg = lst[i]
+                        if isinstance(arg, List):
+                            break
+                        if isinstance(arg, Symbol):
+                            value = env.find(arg.val)
+                            if value is None:
+                                raise RuntimeError(
+                                    f"Error: symbol '{arg.val}' not found"
+                                )
+                            values.append(value)
+                        else:
+                            values.append(arg.val)
+                        i += 1
+                    if i < n:
+                        stack.append(frame)
+                        sexp = lst[i]
+                        break
+                    proc = values[0]
+                    if type(proc) is MachineFunctionDef:
+                        if profiler:
+                            if stack and stack[-1] is RETURN_FRAME:
+                                profiler.exit()
+                            else:
+                                stack.append(RETURN_FRAME)
+                            profiler.enter(proc.name)
+                        env = proc.bind(values[1:])
+                        sexp = proc.body
+                        break
+                    value = proc(*values[1:])
+                elif kind == IF:
+                    if value or len(lst) > 3:
+                        env = frame[2]
+                        sexp = lst[2] if value else lst[3]
+                        break
+                    # an if without an alternative is None when it fails
+                    value = None
+                elif kind == DEFINE:
+                    frame[2].add(lst[1].val, value)
+                    value = None
+                elif kind == DEFINE_MEMO:
+                    maxsize = (
+                        self.execute(lst[3], frame[2])
+                        if len(lst) > 3
+                        else DEFAULT_MAXSIZE
+                    )
+                    frame[2].add(lst[1].val, Memoized(value, maxsize))
+                    value = None
+                elif kind == SET:
+                    frame[2].set(lst[1].val, value)
+                    value = None
+                elif kind == BEGIN:
+                    # the last expression is left without a frame, in tail
+                    # position
+                    env, i = frame[2], frame[3] + 1
+                    if i < len(lst) - 1:
+                        stack.append((BEGIN, lst, env, i))
+                    sexp = lst[i]
+                    break
+                elif kind == RETURN:
+                    profiler.exit()
+                else:
+                    # no local keeps the promise, or this loop would hold on
+                    # to every element forced from it
+                    thunk = partial(self.execute, lst[2], frame[2])
+                    value = Pair(value, Promise(thunk))
+            else:
+                return value
@@ -0,0 +1,308 @@
+"""Macros, expanded before a form is evaluated.
+
+Every top-level form goes through `Expander.expand` before evaluation, so
+each macro use is expanded once, and its expansion replaces it in the
+tree that every engine then runs. A procedure whose body uses a macro
+does not expand it again when it is called.
+
+`(define-macro (name params...) body...)`, or
+`(defmacro name (params...) body...)`, defines a macro whose transformer
+is an ordinary procedure. A `. rest` parameter takes any further
+arguments as a list. The transformer gets the forms of the use as data,
+lists as lists and symbols as symbols. What it returns is turned back
+into syntax. Forms passed through unchanged keep their source positions,
+and new forms get the position of the macro use.
+
+`(quasiquote template)` is a list template: `(unquote x)` inserts the
+value of `x` and `(unquote-splicing xs)` the items of the list `xs`.
+
+`let`, `let*`, `cond`, `and` and `or` are macros shipped with the
+interpreter. `let` expands to an immediately applied lambda, which the
+engines run in place without making a procedure.
+"""
+
+from typing import Any, Callable, Optional
+
+from pythonlisp.optimizer import Inlined, inlined
+from pythonlisp.parser_ import (FALSE, NIL, TRUE, List, Nil, Number, Pair, SExp,
+                                String, Symbol)
+
+Macro = Callable[[List], SExp]
+
+BEGIN, DEFINE_MACROS = Symbol("begin"), ("define-macro", "defmacro")
+DOT, ELSE, IF, LAMBDA = Symbol("."), Symbol("else"), Symbol("if"), Symbol("lambda")
+QUOTE, QUASIQUOTE = Symbol("quote"), Symbol("quasiquote")
+UNQUOTE, UNQUOTE_SPLICING = Symbol("unquote"), Symbol("unquote-splicing")
+LET, LET_STAR, OR, SET = Symbol("let"), Symbol("let*"), Symbol("or"), Symbol("set!")
+# a space never appears in a parsed symbol, so no user code can refer to it
+OR_VALUE = Symbol(" or")
+
+
+def make(items: list, at: List) -> List:
+    """A new list, placed where `at` is for error messages."""
+    if at.source is None:
+        return List(items)
+    offset = at.offset
+    positions = [offset.lineno, offset.column] * (len(items) + 1)  # type: ignore
+    return List(items, at.source, at.source.add(positions))
+
+
+def body(lst: List, start: int) -> SExp:
+    """The expressions from `start` on, as one expression."""
+    if len(lst) == start + 1:
+        return lst[start]
+    return make([BEGIN, *lst[start:]], lst)
+
+
+def expect_list(lst: List, index: int, what: str) -> List:
+    item = lst[index] if len(lst) > index else None
+    if not isinstance(item, List):
+        raise RuntimeError(
+            f"Error: expect {what} in {lst.child_offset(index)}, found: {type(item)}"
+        )
+    return item
+
+
+def let(lst: List) -> SExp:
+    if isinstance(lst[1], Symbol):
+        return named_let(lst)
+    bindings = expect_list(lst, 1, "bindings")
+    names, values = [], []
+    for binding in bindings:
+        if not isinstance(binding, List) or len(binding) != 2:
+            raise RuntimeError(f"Error: expect (name value) in {bindings.offset}")
+        names.append(binding[0])
+        values.append(binding[1])
+    procedure = make([LAMBDA, make(names, bindings), body(lst, 2)], lst)
+    return make([procedure, *values], lst)
+
+
+def named_let(lst: List) -> SExp:
+    # (let loop ((i 0)) body) binds loop to a procedure of i, then calls it
+    name, bindings = lst[1], expect_list(lst, 2, "bindings")
+    names = make([b[0] for b in bindings], bindings)
+    procedure = make([LAMBDA, names, body(lst, 3)], lst)
+    call = make([name, *(b[1] for b in bindings)], lst)
+    init = make([SET, name, procedure], lst)
+    return make([LET, make([make([name, FALSE], lst)], lst), init, call], lst)
+
+
+def let_star(lst: List) -> SExp:
+    bindings = expect_list(lst, 1, "bindings")
+    if len(bindings) < 2:
+        return make([LET, bindings, *lst[2:]], lst)
+    rest = make([LET_STAR, make(bindings[1:], bindings), *lst[2:]], lst)
+    return make([LET, make([bindings[0]], bindings), rest], lst)
+
+
+def cond(lst: List) -> SExp:
+    result: SExp = make([QUOTE, make([], lst)], lst)
+    for i in range(len(lst) - 1, 0, -1):
+        clause = expect_list(lst, i, "clause")
+        if clause and clause[0] is ELSE:
+            result = body(clause, 1)
+        elif len(clause) == 1:
+            result = make([OR, clause[0], result], clause)
+        else:
+            result = make([IF, clause[0], body(clause, 1), result], clause)
+    return result
+
+
+def and_(lst: List) -> SExp:
+    if len(lst) == 1:
+        return TRUE
+    if len(lst) == 2:
+        return lst[1]
+    return make([IF, lst[1], make([lst[0], *lst[2:]], lst), FALSE], lst)
+
+
+def or_(lst: List) -> SExp:
+    if len(lst) == 1:
+        return FALSE
+    if len(lst) == 2:
+        return lst[1]
+    test = make([IF, OR_VALUE, OR_VALUE, make([lst[0], *lst[2:]], lst)], lst)
+    return make([LET, make([make([OR_VALUE, lst[1]], lst)], lst), test], lst)
+
+
+CORE: dict[str, Macro] = {
+    "let": let,
+    "let*": let_star,
+    "cond": cond,
+    "and": and_,
+    "or": or_,
+}
+
+
+def unquoted(sexp: SExp) -> bool:
+    stack = [sexp]
+    while stack:
+        sexp = stack.pop()
+        if isinstance(sexp, List) and sexp:
+            if sexp[0] is UNQUOTE or sexp[0] is UNQUOTE_SPLICING:
+                return True
+            stack.extend(sexp)
+    return False
+
+
+def quasiquote(lst: List) -> SExp:
+    """`(quasiquote template)` as calls building the list at run time."""
+    return template(lst[1], lst)
+
+
+def template(sexp: SExp, at: List) -> SExp:
+    if not unquoted(sexp):
+        if isinstance(sexp, (List, Symbol)):
+            return make([QUOTE, sexp], at)
+        return sexp
+    lst: List = sexp  # type: ignore
+    if lst[0] is UNQUOTE:
+        return lst[1]
+    items, tail = list(lst), None
+    if len(items) >= 3 and items[-2] is DOT:
+        tail = template(items.pop(), lst)
+        items.pop()
+    # runs of plain items become (list ...), spliced lists are joined to
+    # them with (append ...)
+    parts: list[SExp] = []
+    run: list[SExp] = []
+    for item in items:
+        if isinstance(item, List) and item and item[0] is UNQUOTE_SPLICING:
+            if run:
+                parts.append(make([inlined("list"), *run], lst))
+                run = []
+            parts.append(item[1])
+        else:
+            run.append(template(item, lst))
+    if run:
+        parts.append(make([inlined("list"), *run], lst))
+    if tail is not None:
+        parts.append(tail)
+    elif len(parts) == 1 and run:
+        return parts[0]
+    return make([inlined("append"), *parts], lst)
+
+
+def to_datum(sexp: SExp, originals: dict[int, tuple[Pair, List]]) -> Any:
+    """`sexp` as data, recording which lists the pairs were made from."""
+    if isinstance(sexp, List):
+        items, tail = list(sexp), NIL
+        if len(items) >= 3 and items[-2] is DOT:
+            tail = to_datum(items.pop(), originals)
+            items.pop()
+        pair = Pair.from_iterable([to_datum(x, originals) for x in items], tail)
+        if isinstance(pair, Pair):
+            originals[id(pair)] = (pair, sexp)
+        return pair
+    if isinstance(sexp, (Symbol, Inlined)):
+        return sexp
+    return sexp.val  # type: ignore
+
+
+def to_syntax(value: Any, at: List, originals: dict[int, tuple[Pair, List]]) -> SExp:
+    if isinstance(value, Pair):
+        original = originals.get(id(value))
+        if original is not None:
+            return original[1]
+        items = []
+        while isinstance(value, Pair):
+            items.append(to_syntax(value.car, at, originals))
+            value = value.cdr
+        if value is not NIL:
+            items += [DOT, to_syntax(value, at, originals)]
+        return make(items, at)
+    if isinstance(value, Nil):
+        return make([], at)
+    if isinstance(value, (Symbol, Inlined)):
+        return value
+    if isinstance(value, bool):
+        return TRUE if value else FALSE
+    if isinstance(value, (int, float)):
+        return Number(value)
+    if isinstance(value, str):
+        return String(value)
+    raise RuntimeError(
+        f"Error: macro {at[0]} in {at.offset} expanded to {type(value)}, "
+        "expect syntax"
+    )
+
+
+class LispMacro:
+    """A macro whose transformer is a Lisp procedure."""
+
+    def __init__(self, name: str, proc: Callable, nparams: int, rest: bool):
+        self.name = name
+        self.proc = proc
+        self.nparams = nparams
+        self.rest = rest
+
+    def __call__(self, lst: List) -> SExp:
+        originals: dict[int, tuple[Pair, List]] = {}
+        args = [to_datum(x, originals) for x in lst[1:]]
+        if len(args) < self.nparams or (len(args) > self.nparams and not self.rest):
+            raise RuntimeError(
+                f"Error: macro {self.name} in {lst.offset} expects "
+                f"{self.nparams} arguments, found: {len(args)}"
+            )
+        if self.rest:
+            args[self.nparams :] = [Pair.from_iterable(args[self.nparams :])]
+        return to_syntax(self.proc(*args), lst, originals)
+
+
+class Expander:
+    macros: dict[str, Macro]
+
+    def __init__(self, evaluate: Callable[[SExp], Any]) -> None:
+        # evaluates the transformers of macros being defined
+        self.evaluate = evaluate
+        self.macros = dict(CORE)
+
+    def expand(self, sexp: SExp) -> SExp:
+        while isinstance(sexp, List) and sexp and isinstance(sexp[0], Symbol):
+            head = sexp[0]
+            if head is QUOTE:
+                return sexp
+            if head is QUASIQUOTE:
+                sexp = quasiquote(sexp)
+                continue
+            if head.val in DEFINE_MACROS:
+                return self.define_macro(sexp)
+            macro = self.macros.get(head.val)
+            if macro is None:
+                break
+            sexp = macro(sexp)
+        if not isinstance(sexp, List):
+            return sexp
+        # the parameters of a lambda are not expressions
+        start = 2 if sexp and sexp[0] is LAMBDA else 0
+        items = list(sexp)
+        changed = False
+        for i in range(start, len(items)):
+            item = items[i]
+            if isinstance(item, List):
+                items[i] = self.expand(item)
+                changed = changed or items[i] is not item
+        return List(items, sexp.source, sexp.base) if changed else sexp
+
+    def define_macro(self, lst: List) -> SExp:
+        if lst[0].val == "defmacro":
+            name = lst[1]
+            params, start = expect_list(lst, 2, "parameters"), 3
+        else:
+            signature = expect_list(lst, 1, "(name parameters...)")
+            name = signature[0] if signature else None
+            params, start = make(signature[1:], signature), 2
+        if not isinstance(name, Symbol):
+            raise RuntimeError(f"Error: expect macro name in {lst.offset}")
+        names = list(params)
+        rest: Optional[SExp] = None
+        if len(names) >= 2 and names[-2] is DOT:
+            rest = names.pop()
+            names.pop()
+        nparams = len(names)
+        if rest is not None:
+            names.append(rest)
+        transformer = make([LAMBDA, make(names, params), body(lst, start)], lst)
+        proc = self.evaluate(transformer)
+        self.macros[name.val] = LispMacro(name.val, proc, nparams, rest is not None)
+        return make([QUOTE, name], lst)
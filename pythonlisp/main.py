@@ -1,18 +1,87 @@
 import argparse
+import asyncio
 import importlib.metadata
+import sys
 from datetime import datetime
 
-from pythonlisp.interpreter import Interpreter
+from pythonlisp import bench, cache, image
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.profiler import Profiler
+from pythonlisp.server import Server
+from pythonlisp.stats import Stats
+from pythonlisp.watch import Watcher
 
 
 def get_args():
     parser = argparse.ArgumentParser("pythonlisp")
     parser.add_argument("-f", "--filename", required=False)
+    parser.add_argument("--engine", choices=ENGINES, default="compile")
+    parser.add_argument(
+        "-O",
+        "--optimize",
+        action="store_true",
+        help="fold constants and inline builtins before evaluating",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="do not read or write __lispcache__"
+    )
+    parser.add_argument(
+        "--clear-cache", action="store_true", help="remove __lispcache__ first"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="print time spent per procedure"
+    )
+    parser.add_argument(
+        "--profile-stacks",
+        metavar="FILE",
+        help="write collapsed stacks for flamegraph tools to FILE",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print phase timings, call and lookup counts and peak memory",
+    )
+    parser.add_argument("--image", help="start from the globals saved in this image")
+    parser.add_argument(
+        "--save-image",
+        metavar="FILE",
+        help="after running --filename, save its globals as an image",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running --filename, re-evaluating the forms that change",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="ADDRESS",
+        help="serve sessions on [HOST:]PORT or unix:PATH instead of a repl",
+    )
+    commands = parser.add_subparsers(dest="command")
+    bench_parser = commands.add_parser("bench", help="run the benchmark suite")
+    bench_parser.add_argument("--engine", choices=ENGINES, default="compile")
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    bench_parser.add_argument(
+        "--only",
+        action="append",
+        choices=[workload.name for workload in bench.WORKLOADS],
+        help="run only this workload, may be repeated",
+    )
+    bench_parser.add_argument("--json", help="write the results to this file")
+    bench_parser.add_argument("--baseline", help="compare against a saved --json")
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown counted as a regression, default 0.1 (10%%)",
+    )
     return parser.parse_args()
 
 
-def repl():
-    interpreter = Interpreter()
+def repl(engine="compile", image_file=None, optimize=False):
+    interpreter = Interpreter(engine, optimize=optimize)
+    if image_file:
+        image.load(interpreter, image_file)
     print()
     print("*" * 50)
     print("*" + " " * 48 + "*")
@@ -41,21 +110,89 @@ def repl():
             print(e)
 
 
-def run(filename):
-    with open(filename, "r") as f:
-        program = f.read()
-        try:
-            Interpreter().interpret(program)
-        except Exception as e:
-            print(e)
+def run(
+    filename,
+    engine="compile",
+    use_cache=True,
+    profiler=None,
+    image_file=None,
+    save_image=None,
+    optimize=False,
+    stats=None,
+):
+    try:
+        interpreter = Interpreter(engine, profiler, optimize, stats)
+        if image_file:
+            image.load(interpreter, image_file)
+        interpreter.interpret_file(filename, use_cache)
+        if save_image:
+            image.save(interpreter, save_image)
+    except Exception as e:
+        print(e)
+
+
+def run_bench(args) -> int:
+    report = bench.run_suite(args.engine, args.repeat, args.only)
+    baseline = bench.load(args.baseline) if args.baseline else None
+    print(bench.format_report(report, baseline))
+    if args.json:
+        bench.save(report, args.json)
+    if baseline is None:
+        return 0
+    regressions = bench.compare(report, baseline, args.threshold)
+    for regression in regressions:
+        print(f"regression: {regression}")
+    return 1 if regressions else 0
 
 
 def main():
     args = get_args()
+    if args.command == "bench":
+        sys.exit(run_bench(args))
+    if args.clear_cache:
+        cache.clear(args.filename)
+        if not args.filename:
+            return
+    if args.serve:
+        server = Server(args.engine)
+        try:
+            asyncio.run(server.serve(args.serve))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+        return
     if not args.filename:
-        repl()
-    else:
-        run(args.filename)
+        repl(args.engine, args.image, args.optimize)
+        return
+    if args.watch:
+        interpreter = Interpreter(args.engine, optimize=args.optimize)
+        if args.image:
+            image.load(interpreter, args.image)
+        try:
+            Watcher(args.filename, interpreter).watch()
+        except KeyboardInterrupt:
+            pass
+        return
+    profiler = Profiler() if args.profile or args.profile_stacks else None
+    stats = Stats() if args.stats else None
+    run(
+        args.filename,
+        args.engine,
+        not args.no_cache,
+        profiler,
+        args.image,
+        args.save_image,
+        args.optimize,
+        stats,
+    )
+    if stats:
+        print(stats.table(), file=sys.stderr)
+    if profiler and args.profile:
+        print(profiler.table(), file=sys.stderr)
+    if profiler and args.profile_stacks:
+        with open(args.profile_stacks, "w") as f:
+            profiler.write_collapsed(f)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+"""Memoization of pure procedures, for the `memoize` primitive and the
+`define-memo` form."""
+
+from collections import OrderedDict
+from typing import Any, Callable
+
+from pythonlisp.parser_ import Pair
+
+DEFAULT_MAXSIZE = 1024
+
+
+def cache_key(value: Any) -> Any:
+    """`value` tagged with its type, and lists item by item, since `1`,
+    `1.0` and `#t` are equal in Python but not to a procedure."""
+    if type(value) is Pair:
+        items = []
+        while type(value) is Pair:
+            items.append(cache_key(value.car))
+            value = value.cdr
+        return (Pair, tuple(items), cache_key(value))
+    return (type(value), value)
+
+
+class Memoized:
+    """Caches the results of `proc` by argument tuple, keeping the
+    `maxsize` most recently used. Lists are keys by structure."""
+
+    def __init__(self, proc: Callable, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        if not callable(proc):
+            raise RuntimeError(f"Error: expect procedure, found: {type(proc)}")
+        if not isinstance(maxsize, int) or isinstance(maxsize, bool) or maxsize < 1:
+            raise RuntimeError(f"Error: expect positive cache size, found: {maxsize}")
+        self.proc = proc
+        self.maxsize = maxsize
+        self.cache: OrderedDict[tuple, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, *args) -> Any:
+        cache = self.cache
+        key = tuple(map(cache_key, args))
+        try:
+            result = cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # an argument that cannot be hashed is never cached
+            self.misses += 1
+            return self.proc(*args)
+        else:
+            self.hits += 1
+            cache.move_to_end(key)
+            return result
+        self.misses += 1
+        result = self.proc(*args)
+        cache[key] = result
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+        return result
+
+
+def memo_stats(proc: Memoized) -> Pair:
+    """`(hits misses size maxsize)` of a memoized procedure."""
+    if not isinstance(proc, Memoized):
+        raise RuntimeError(f"Error: expect memoized procedure, found: {type(proc)}")
+    return Pair.from_iterable([proc.hits, proc.misses, len(proc.cache), proc.maxsize])
@@ -0,0 +1,171 @@
+"""Optional optimisation pass between parsing and evaluation.
+
+Each top-level form is rewritten before it is evaluated:
+
+* calls of pure builtins on literal arguments are folded into their
+  value, so `(* 2 (+ 3 4))` becomes `14`;
+* an `if` with a literal condition is replaced by the branch it takes;
+* the procedure of a call to a builtin is looked up once, here, instead
+  of on every call.
+
+Only builtins that still have their original value are touched, and not
+in a form that binds or assigns their name. Later redefining a builtin
+does not change forms optimised before it. Rewritten lists keep the
+source positions of the lists they replace, so errors are reported at
+the same place as without the optimiser.
+"""
+
+from typing import Any, Callable, Mapping, Optional
+
+from pythonlisp.env import Env
+from pythonlisp.parser_ import (FALSE, TRUE, Atom, Boolean, List, Number, SExp,
+                                String, Symbol)
+
+# builtins without side effects, safe to call while optimising
+PURE = frozenset(
+    [
+        "+",
+        "-",
+        "*",
+        "/",
+        ">",
+        "<",
+        ">=",
+        "<=",
+        "=",
+        "abs",
+        "max",
+        "min",
+        "mod",
+        "round",
+        "floor",
+        "ceil",
+        "sqrt",
+    ]
+)
+BINDING_FORMS = frozenset(["define", "define-memo", "set!"])
+QUOTE, LAMBDA, IF = Symbol("quote"), Symbol("lambda"), Symbol("if")
+
+
+def builtins() -> Mapping[str, Any]:
+    if Env.builtins is None:
+        Env()
+    return Env.builtins  # type: ignore
+
+
+def inlined(name: str) -> "Inlined":
+    return Inlined(name, builtins()[name])
+
+
+class Inlined(Atom):
+    """A builtin procedure in place of the symbol naming it."""
+
+    __slots__ = ("name",)
+    val: Callable
+
+    def __init__(self, name: str, val: Callable) -> None:
+        super().__init__(val)
+        self.name = name
+
+    def __reduce__(self):
+        return (inlined, (self.name,))
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+def literal(value: Any) -> Optional[SExp]:
+    if isinstance(value, bool):
+        return TRUE if value else FALSE
+    if isinstance(value, (int, float)):
+        return Number(value)
+    if isinstance(value, str):
+        return String(value)
+    return None
+
+
+def bound_names(sexp: SExp, names: set[str], assigned: set[str]) -> None:
+    """Collect the lambda parameters in `sexp` into `names` and the names
+    it defines or sets into `assigned`."""
+    stack = [sexp]
+    while stack:
+        sexp = stack.pop()
+        if not isinstance(sexp, List) or not sexp or sexp[0] is QUOTE:
+            continue
+        head = sexp[0]
+        if head is LAMBDA and len(sexp) > 1 and isinstance(sexp[1], List):
+            names.update(x.val for x in sexp[1] if isinstance(x, Symbol))
+        elif isinstance(head, Symbol) and head.val in BINDING_FORMS:
+            if len(sexp) > 1 and isinstance(sexp[1], Symbol):
+                assigned.add(sexp[1].val)
+        stack.extend(sexp)
+
+
+class Optimizer:
+    globals: dict[str, Any]
+    # builtin names defined or set anywhere so far, never inlined again
+    assigned: set[str]
+    # names bound by a lambda in the form being optimised
+    shadowed: set[str]
+
+    def __init__(self, globals_: dict[str, Any]) -> None:
+        self.globals = globals_
+        self.assigned = set()
+        self.shadowed = set()
+
+    def optimize(self, sexp: SExp) -> SExp:
+        if not isinstance(sexp, List):
+            return sexp
+        self.shadowed = set()
+        bound_names(sexp, self.shadowed, self.assigned)
+        return self.rewrite(sexp)
+
+    def builtin(self, name: str) -> Optional[Callable]:
+        if name in self.shadowed or name in self.assigned:
+            return None
+        value = builtins().get(name)
+        if value is None or self.globals.get(name) is not value:
+            return None
+        return value
+
+    def rewrite(self, sexp: SExp) -> SExp:
+        if not isinstance(sexp, List) or not sexp:
+            return sexp
+        head = sexp[0]
+        if head is QUOTE:
+            return sexp
+        binds = isinstance(head, Symbol) and head.val in BINDING_FORMS
+        if head is LAMBDA or binds:
+            # keep the parameter list or the defined name as it is
+            items = list(sexp[:2]) + [self.rewrite(x) for x in sexp[2:]]
+            return List(items, sexp.source, sexp.base)
+        items = [head] + [self.rewrite(x) for x in sexp[1:]]
+        if head is IF:
+            return self.if_(sexp, items)
+        if isinstance(head, List):
+            items[0] = self.rewrite(head)
+        elif isinstance(head, Symbol):
+            return self.call(sexp, items)
+        return List(items, sexp.source, sexp.base)
+
+    def if_(self, sexp: List, items: list[SExp]) -> SExp:
+        if len(items) == 4 and isinstance(items[1], Atom):
+            return items[2] if items[1].val else items[3]
+        return List(items, sexp.source, sexp.base)
+
+    def call(self, sexp: List, items: list[SExp]) -> SExp:
+        name = items[0].val  # type: ignore
+        proc = self.builtin(name)
+        if proc is None:
+            return List(items, sexp.source, sexp.base)
+        args = items[1:]
+        if name in PURE and all(isinstance(x, (Number, String, Boolean)) for x in args):
+            try:
+                value = literal(proc(*(x.val for x in args)))  # type: ignore
+            except Exception:
+                # leave the error to be raised where the call is evaluated
+                value = None
+            if value is not None:
+                return value
+        items[0] = Inlined(name, proc)
+        return List(items, sexp.source, sexp.base)
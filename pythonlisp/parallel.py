@@ -0,0 +1,76 @@
+"""`pmap`: map a pure procedure over a list in worker processes.
+
+The procedure is pickled once per call (see `pythonlisp.pickling`) and
+sent with every chunk of the list. Workers compile it again, map it
+over their chunk, and the chunks are joined back in order. Short lists,
+a single CPU, and procedures that cannot be pickled are mapped serially
+instead, with the same result.
+"""
+
+import os
+import pickle  # nosec B403: only exchanged with our own workers
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from pythonlisp.parser_ import Pair
+
+# below this many items the processes cost more than they save
+MIN_PARALLEL_ITEMS = 64
+CHUNKS_PER_WORKER = 4
+
+_executor: Optional[ProcessPoolExecutor] = None
+_workers = 0
+
+
+def cpu_count() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def executor(workers: int) -> ProcessPoolExecutor:
+    global _executor, _workers
+    if _executor is None or _workers != workers:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = ProcessPoolExecutor(workers)
+        _workers = workers
+    return _executor
+
+
+def map_chunk(payload: bytes, chunk: list) -> list:
+    proc = pickle.loads(payload)  # nosec B301
+    return [proc(x) for x in chunk]
+
+
+def split(items: list, parts: int) -> list[list]:
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (i < extra)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def pmap(
+    proc: Callable,
+    xs,
+    workers: Optional[int] = None,
+    min_items: int = MIN_PARALLEL_ITEMS,
+) -> Pair:
+    items = list(xs)
+    workers = workers or cpu_count()
+    if len(items) < min_items or workers < 2:
+        return Pair.from_iterable(map(proc, items))
+    try:
+        payload = pickle.dumps(proc, pickle.HIGHEST_PROTOCOL)
+    except (TypeError, AttributeError, pickle.PicklingError, RecursionError):
+        return Pair.from_iterable(map(proc, items))
+    chunks = split(items, min(len(items), workers * CHUNKS_PER_WORKER))
+    pool = executor(workers)
+    futures = [pool.submit(map_chunk, payload, chunk) for chunk in chunks]
+    results: list = []
+    for future in futures:
+        results.extend(future.result())
+    return Pair.from_iterable(results)
@@ -7,90 +7,356 @@ List        := LeftParen { SExp } RightParen
 Atom        := Number | String | Symbol
 """
 
-from dataclasses import dataclass
-from typing import Generator, NewType, Optional, Union
+import weakref
+from array import array
+from typing import Generator, Iterable, Iterator, Optional
 
 from pythonlisp.tokenizer import Offset, Token, Tokenizer, TokenKind
 
 
 class SExp:
-    pass
+    __slots__ = ()
+
+
+class Atom(SExp):
+    __slots__ = ("val",)
+
+    def __init__(self, val) -> None:
+        self.val = val
 
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and other.val == self.val
 
-@dataclass(frozen=True)
-class Number(SExp):
+    def __hash__(self) -> int:
+        return hash((type(self), self.val))
+
+
+class Number(Atom):
+    __slots__ = ()
     val: int | float
-    pos: Offset
 
     def __repr__(self) -> str:
         return f"{self.val}"
 
 
-@dataclass(frozen=True)
-class String(SExp):
+class String(Atom):
+    __slots__ = ()
     val: str
-    pos: Offset
 
     def __repr__(self) -> str:
         return f"{self.val}"
 
 
-@dataclass(frozen=True)
-class Boolean(SExp):
+class Boolean(Atom):
+    __slots__ = ()
     val: bool
-    pos: Offset
 
     def __repr__(self) -> str:
         return f"{self.val})"
 
 
-@dataclass(frozen=True)
+TRUE = Boolean(True)
+FALSE = Boolean(False)
+
+
 class Symbol(SExp):
+    """Symbols are interned: there is one object per name, so they compare
+    by identity."""
+
+    __slots__ = ("val", "__weakref__")
     val: str
-    pos: Offset
+    # weak, so that names nothing refers to any more, such as those a
+    # long-running server was sent, do not stay in it
+    table: "weakref.WeakValueDictionary[str, Symbol]" = weakref.WeakValueDictionary()
+
+    def __new__(cls, val: str) -> "Symbol":
+        symbol = cls.table.get(val)
+        if symbol is None:
+            symbol = super().__new__(cls)
+            symbol.val = val
+            cls.table[val] = symbol
+        return symbol
+
+    def __reduce__(self):
+        return (Symbol, (self.val,))
 
     def __repr__(self) -> str:
         return f"Symbol({self.val})"
 
 
+class SourceMap:
+    """Line and column of parsed nodes, kept apart from the nodes in one
+    flat array and only read when an error is reported."""
+
+    __slots__ = ("positions",)
+
+    def __init__(self) -> None:
+        self.positions = array("L")
+
+    def add(self, positions: list[int]) -> int:
+        index = len(self.positions) // 2
+        self.positions.extend(positions)
+        return index
+
+    def offset(self, index: int) -> Offset:
+        return Offset(self.positions[2 * index], self.positions[2 * index + 1])
+
+
 class List(list, SExp):
+    """A parsed list. Its own position and those of its items are entries
+    `base`, `base + 1`, ... of its `source` map."""
+
+    __slots__ = ("source", "base")
+
+    def __init__(
+        self, items=(), source: Optional[SourceMap] = None, base: int = 0
+    ) -> None:
+        super().__init__(items)
+        self.source = source
+        self.base = base
+
+    @property
+    def offset(self) -> Optional[Offset]:
+        if self.source is None:
+            return None
+        return self.source.offset(self.base)
+
+    def child_offset(self, index: int) -> Optional[Offset]:
+        if self.source is None:
+            return None
+        return self.source.offset(self.base + 1 + index)
+
     def __repr__(self) -> str:
         return super().__repr__().replace("[", "(").replace("]", ")").replace(",", "")
 
 
+class Nil(SExp):
+    """The empty list, shared by every list that ends."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __reduce__(self):
+        return "NIL"
+
+    def __repr__(self) -> str:
+        return "()"
+
+
+NIL = Nil()
+
+
+class Pair(SExp):
+    """A cons cell. Lists are chains of pairs ending in `NIL`, so `car`,
+    `cdr` and `cons` are O(1) and tails are shared, not copied."""
+
+    __slots__ = ("car", "cdr")
+
+    def __init__(self, car, cdr) -> None:
+        self.car = car
+        self.cdr = cdr
+
+    @staticmethod
+    def from_iterable(items, tail=NIL):
+        res = tail
+        if not isinstance(items, (list, tuple)):
+            items = list(items)
+        for item in reversed(items):
+            res = Pair(item, res)
+        return res
+
+    def __iter__(self):
+        node = self
+        while isinstance(node, Pair):
+            yield node.car
+            node = node.cdr
+
+    def __len__(self) -> int:
+        size = 0
+        node = self
+        while isinstance(node, Pair):
+            size += 1
+            node = node.cdr
+        return size
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Pair):
+            return NotImplemented
+        a, b = self, other
+        while isinstance(a, Pair) and isinstance(b, Pair):
+            if a is b:
+                return True
+            if a.car != b.car:
+                return False
+            a, b = a.cdr, b.cdr
+        return a == b
+
+    def __hash__(self) -> int:
+        # by structure, to agree with __eq__; cells are never mutated
+        items = []
+        node = self
+        while isinstance(node, Pair):
+            items.append(node.car)
+            node = node.cdr
+        return hash((Pair, tuple(items), node))
+
+    def __reduce__(self):
+        # flat, so long lists do not pickle one nested call per cell
+        items = []
+        node = self
+        while isinstance(node, Pair):
+            items.append(node.car)
+            node = node.cdr
+        return (Pair.from_iterable, (items, node))
+
+    def __repr__(self) -> str:
+        items = []
+        node = self
+        while isinstance(node, Pair):
+            items.append(show(node.car))
+            node = node.cdr
+        if node is not NIL:
+            items.extend([".", show(node)])
+        return "(" + " ".join(items) + ")"
+
+
+def show(value) -> str:
+    if isinstance(value, Symbol):
+        return value.val
+    elif isinstance(value, bool):
+        return "#t" if value else "#f"
+    elif isinstance(value, str):
+        return '"' + value.replace('"', '\\"') + '"'
+    return repr(value)
+
+
+def datum(sexp: SExp):
+    """Convert quoted syntax into runtime data: lists become pairs and
+    literal atoms their Python values. Symbols stay as they are."""
+    if isinstance(sexp, Atom):
+        return sexp.val
+    if not isinstance(sexp, List):
+        return sexp
+    # convert innermost lists first so deep nesting needs no recursion
+    pending: list[List] = [sexp]
+    order: list[List] = []
+    while pending:
+        lst = pending.pop()
+        order.append(lst)
+        pending.extend(x for x in lst if isinstance(x, List))
+    done: dict[int, object] = {}
+    for lst in reversed(order):
+        items = []
+        for x in lst:
+            if isinstance(x, List):
+                items.append(done[id(x)])
+            else:
+                items.append(x if isinstance(x, Symbol) else x.val)
+        tail: object = NIL
+        if len(items) >= 3 and isinstance(lst[-2], Symbol) and lst[-2].val == ".":
+            tail = items.pop()
+            items.pop()
+        done[id(lst)] = Pair.from_iterable(items, tail)
+    return done[id(sexp)]
+
+
 class ParserError(Exception):
     pass
 
 
 class Parser:
     tokenizer: Tokenizer
-    tokens: Generator[Token, None, None]
+    tokens: Iterator[Token]
 
     def __init__(self) -> None:
         self.tokenizer = Tokenizer()
 
-    def parse(self, source: str) -> list[SExp]:
-        self.tokens = self.tokenizer.tokenize(source)
-        res = []
-        nxt = next(self.tokens)
+    def parse(
+        self, source: str, pos: int = 0, endpos: Optional[int] = None
+    ) -> list[SExp]:
+        tokens = self.tokenizer.tokenize(source, pos, endpos)
+        return list(self.parse_tokens(tokens, SourceMap()))
+
+    def parse_stream(self, chunks: Iterable[str]) -> Generator[SExp, None, None]:
+        """Parse text arriving in chunks, yielding each top-level form as
+        soon as it is complete. Every form gets its own source map."""
+        return self.parse_tokens(self.tokenizer.tokenize_stream(chunks))
+
+    def parse_tokens(
+        self, tokens: Iterator[Token], source_map: Optional[SourceMap] = None
+    ) -> Generator[SExp, None, None]:
+        nxt = next(tokens)
         while nxt.kind != TokenKind.EOF:
-            s_exp = self.parse_sexp(nxt)
-            res.append(s_exp)
-            nxt = next(self.tokens)
-        return res
+            # forms evaluated between yields may parse with this parser too
+            self.tokens = tokens
+            yield self.parse_sexp(nxt, source_map or SourceMap())
+            nxt = next(tokens)
 
-    def parse_sexp(self, token: Token):
-        offset = token.offset
+    def parse_atom(self, token: Token) -> SExp:
         if token.kind == TokenKind.NUMBER:
-            return Number(token.value, offset)
+            return Number(token.value)
         elif token.kind == TokenKind.STRING:
-            return String(token.value, offset)
-        elif token.kind == TokenKind.SYMBOL:
-            if token.lexeme == "#t":
-                return Boolean(True, offset)
-            elif token.lexeme == "#f":
-                return Boolean(False, offset)
-            return Symbol(token.lexeme, offset)
+            return String(token.value)
+        if token.lexeme == "#t":
+            return TRUE
+        elif token.lexeme == "#f":
+            return FALSE
+        return Symbol(token.lexeme)
+
+    def parse_sexp(self, token: Token, source_map: Optional[SourceMap] = None):
+        """Parse one form starting at `token`. Open lists are kept on an
+        explicit stack, so nesting depth is not limited by recursion."""
+        if source_map is None:
+            source_map = SourceMap()
+        # each open list: its items, the positions of the list and its
+        # items as flat (line, column) pairs, and the token after its "("
+        stack: list[tuple[list[SExp], list[int], Token]] = []
+        while True:
+            kind = token.kind
+            if kind == TokenKind.LEFTPAREN:
+                offset = token.offset
+                token = next(self.tokens)
+                stack.append(([], [offset.lineno, offset.column], token))
+                continue
+            elif kind == TokenKind.RIGHTPAREN:
+                if not stack:
+                    raise ParserError(f"Error: unexpected ')' found in {token.offset}")
+                items, positions, _ = stack.pop()
+                node: SExp = List(items, source_map, source_map.add(positions))
+                lineno, column = positions[0], positions[1]
+            elif kind == TokenKind.EOF:
+                first = stack[-1][2]
+                raise ParserError(
+                    f"Error: unclosed parenthesis found in {first.offset}"
+                )
+            else:
+                node = self.parse_atom(token)
+                if not stack:
+                    return node
+                offset = token.offset
+                lineno, column = offset.lineno, offset.column
+            if not stack:
+                return node
+            items, positions, _ = stack[-1]
+            items.append(node)
+            positions.append(lineno)
+            positions.append(column)
+            token = next(self.tokens)
+
+
+class RecursiveParser(Parser):
+    """The original recursive descent parser, kept as a reference. Its
+    lists carry no source positions."""
+
+    def parse_sexp(self, token: Token, source_map: Optional[SourceMap] = None):
+        offset = token.offset
+        if token.kind in (TokenKind.NUMBER, TokenKind.STRING, TokenKind.SYMBOL):
+            return self.parse_atom(token)
         elif token.kind == TokenKind.RIGHTPAREN:
             raise ParserError(f"Error: unexpected ')' found in {offset}")
         elif token.kind == TokenKind.LEFTPAREN:
@@ -0,0 +1,166 @@
+"""Pickling of Lisp procedures.
+
+Compiled procedures are Python closures and cannot be pickled as they
+are. A procedure is pickled as the source of its lambda together with
+the current values of the variables the lambda uses, and is compiled
+again when it is unpickled. Builtins are left out and looked up in the
+unpickling process. Captured procedures, including the procedure itself
+when it is recursive, are pickled the same way.
+
+A variable that procedures share, such as a counter they `set!`, is
+pickled as one `Cell` however many of them capture it, so the rebuilt
+procedures share it again.
+"""
+
+from typing import Any, Optional, Sequence
+
+from pythonlisp.compiler import CompiledFunctionDef, Compiler, Scope
+from pythonlisp.env import Env, FunctionDef, Procedure
+from pythonlisp.parser_ import List, SExp, Symbol
+
+BUILTINS = frozenset(Env().env)
+LAMBDA, QUOTE = Symbol("lambda"), Symbol("quote")
+
+_compiler: Optional[Compiler] = None
+
+
+class Cell:
+    """A shared variable. Once unpickled it is made into one compiled cell
+    or one `Env` dict, used by every procedure rebuilt with it."""
+
+    __slots__ = ("value", "store")
+
+    def __init__(self, value: Any = None) -> None:
+        self.value = value
+        self.store: Any = None
+
+    def __reduce__(self):
+        # the value goes in the state, which may refer back to this cell
+        return Cell, (), (self.value,)
+
+    def __setstate__(self, state: tuple[Any]) -> None:
+        (self.value,) = state
+
+    def cell(self) -> list[Any]:
+        if self.store is None:
+            self.store = [self.value]
+        return self.store
+
+    def frame(self, name: str) -> dict[str, Any]:
+        if self.store is None:
+            self.store = {name: self.value}
+        return self.store
+
+
+def free_variables(lst: List) -> list[str]:
+    """Names a lambda expression uses without binding them itself. Special
+    form names are included; they are simply never found as variables."""
+    names: dict[str, None] = {}
+    params = frozenset(x.val for x in lst[1] if isinstance(x, Symbol))
+    stack: list[tuple[SExp, frozenset]] = [(x, params) for x in lst[2:]]
+    while stack:
+        sexp, bound = stack.pop()
+        if isinstance(sexp, Symbol):
+            if sexp.val not in bound:
+                names[sexp.val] = None
+        elif isinstance(sexp, List) and sexp:
+            head = sexp[0]
+            if head is QUOTE:
+                continue
+            if head is LAMBDA and len(sexp) > 2 and isinstance(sexp[1], List):
+                inner = bound | {x.val for x in sexp[1] if isinstance(x, Symbol)}
+                stack.extend((x, inner) for x in sexp[2:])
+                continue
+            stack.extend((x, bound) for x in sexp)
+    return list(names)
+
+
+def capturable(name: str, value: Any) -> bool:
+    # builtins exist wherever the procedure is unpickled, unless redefined
+    if value is None:
+        return False
+    return name not in BUILTINS or isinstance(value, Procedure)
+
+
+def reduce_procedure(
+    proc: Procedure,
+    capture_globals: bool = True,
+    cells: Optional[dict[tuple[int, str], Cell]] = None,
+):
+    """Reduce `proc` for pickle. Without `capture_globals` the globals it
+    uses are looked up where it is unpickled, as when saving an image.
+    Shared variables become the `Cell` kept for them in `cells`, so that
+    procedures pickled together share them."""
+    if proc.source is None:
+        raise TypeError(f"cannot pickle procedure {proc.name} without its source")
+    names = free_variables(proc.source)
+    captured = proc.captured(names, capture_globals)
+    values = {
+        name: value for name, value in captured.items() if capturable(name, value)
+    }
+    if cells is None:
+        cells = {}
+    shared = []
+    for name, key in proc.shared(names).items():
+        if name in values:
+            cell = cells.get((key, name))
+            if cell is None:
+                cell = cells[key, name] = Cell(values[name])
+            values[name] = cell
+            shared.append(name)
+    return (
+        rebuild_procedure,
+        (proc.source, proc.name, list(values), shared),
+        values,
+        None,
+        None,
+        fill_captured,
+    )
+
+
+def compiler() -> Compiler:
+    global _compiler
+    if _compiler is None:
+        _compiler = Compiler(Env())
+    return _compiler
+
+
+def rebuild_procedure(
+    source: List,
+    name: str,
+    names: list[str],
+    cells: Sequence[str] = (),
+    target: Optional[Compiler] = None,
+) -> Procedure:
+    """Compile `source` as if inside a lambda binding `names`, those in
+    `cells` to cells. Their values are filled in afterwards, so they may
+    refer back to the procedure. Other globals are those of `target`, by
+    default a fresh environment."""
+    frame = [None] * (len(names) + 1)
+    target = target or compiler()
+    scope = Scope(list(names), None, set(cells))
+    return target.procedure(source, scope, False, name)(frame)
+
+
+def fill_captured(proc: Procedure, values: dict[str, Any]) -> None:
+    if isinstance(proc, FunctionDef):
+        # made in a frame of its own when loading an image, under which
+        # every shared variable gets a frame whose dict is the shared one
+        env = proc.env
+        for name, value in values.items():
+            if isinstance(value, Cell):
+                frame = type(env)(env.parent)
+                frame.env = value.frame(name)
+                env.parent = frame
+            else:
+                env.env[name] = value
+        return
+    assert isinstance(proc, CompiledFunctionDef)
+    # the rebuilt procedure owns its captured list, whose cells are those
+    # of the shared variables, see rebuild_procedure
+    captures = proc.info.scope.captures  # type: ignore
+    for name, value in values.items():
+        index = captures.get(name)
+        if index is not None:
+            stored = value.cell() if isinstance(value, Cell) else value
+            proc.env[index] = stored  # type: ignore
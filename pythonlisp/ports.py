@@ -0,0 +1,172 @@
+"""File ports.
+
+An input port is a buffered text file. `read-line` returns its lines one
+at a time and `read` the data forms written in it, parsed by `Parser` as
+the file is read in chunks. A port is read either by lines or by forms:
+`read` reads ahead of the forms it returns.
+
+`(file-lines path)` is a stream of the lines of a file, read as the
+stream is walked, so a file of any size is processed in constant memory
+as long as nothing keeps the head of the stream. `read-file` returns a
+whole file as a string, decoded straight from a memory map when the
+file is large.
+
+Output ports write through a large buffer, which is flushed when the port
+is closed.
+"""
+
+import mmap
+import os
+import sys
+from typing import Any, Iterator, Optional, TextIO, Union
+
+from pythonlisp.parser_ import NIL, Pair, Parser, SExp, datum, show
+from pythonlisp.streams import Promise
+from pythonlisp.tokenizer import read_chunks
+
+BUFFER_SIZE = 1 << 16
+# files at least this large are read through a memory map
+MMAP_THRESHOLD = 1 << 20
+
+
+class Eof:
+    def __repr__(self) -> str:
+        return "#<eof>"
+
+
+EOF = Eof()
+
+
+class Port:
+    __slots__ = ("file", "forms")
+
+    def __init__(self, file: TextIO) -> None:
+        self.file = file
+        self.forms: Optional[Iterator[SExp]] = None
+
+    def __repr__(self) -> str:
+        kind = "input" if isinstance(self, InputPort) else "output"
+        return f"#<{kind}-port {self.file.name}>"
+
+
+class InputPort(Port):
+    __slots__ = ()
+
+
+class OutputPort(Port):
+    __slots__ = ()
+
+
+def open_input_file(path: str) -> InputPort:
+    try:
+        return InputPort(open(path, encoding="utf-8", buffering=BUFFER_SIZE))
+    except OSError as e:
+        raise RuntimeError(f"Error: cannot open {path}: {e.strerror}") from None
+
+
+def open_output_file(path: str) -> OutputPort:
+    try:
+        return OutputPort(open(path, "w", encoding="utf-8", buffering=BUFFER_SIZE))
+    except OSError as e:
+        raise RuntimeError(f"Error: cannot open {path}: {e.strerror}") from None
+
+
+def input_port(port: Any) -> InputPort:
+    if not isinstance(port, InputPort):
+        raise RuntimeError(f"Error: expect input port, found: {type(port)}")
+    if port.file.closed:
+        raise RuntimeError(f"Error: {port} is closed")
+    return port
+
+
+def output_file(port: Any) -> TextIO:
+    if port is None:
+        return sys.stdout
+    if not isinstance(port, OutputPort):
+        raise RuntimeError(f"Error: expect output port, found: {type(port)}")
+    if port.file.closed:
+        raise RuntimeError(f"Error: {port} is closed")
+    return port.file
+
+
+def close_port(port: Port) -> None:
+    if not isinstance(port, Port):
+        raise RuntimeError(f"Error: expect port, found: {type(port)}")
+    port.forms = None
+    port.file.close()
+
+
+def read_line(port: InputPort) -> Union[str, Eof]:
+    line = input_port(port).file.readline()
+    if not line:
+        return EOF
+    return line[:-1] if line[-1] == "\n" else line
+
+
+def read(port: InputPort) -> Any:
+    """The next data form in `port`, as `quote` would give it."""
+    port = input_port(port)
+    if port.forms is None:
+        port.forms = Parser().parse_stream(read_chunks(port.file))
+    sexp = next(port.forms, None)
+    return EOF if sexp is None else datum(sexp)
+
+
+def lines(file: TextIO) -> Any:
+    line = file.readline()
+    if not line:
+        file.close()
+        return NIL
+    if line[-1] == "\n":
+        line = line[:-1]
+    return Pair(line, Promise(lambda: lines(file)))
+
+
+def file_lines(source: Union[str, InputPort]) -> Any:
+    """The lines of a file, or of the rest of an input port, as a stream."""
+    if isinstance(source, str):
+        source = open_input_file(source)
+    return lines(input_port(source).file)
+
+
+def read_file(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+                return f.read().decode("utf-8")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return str(m, "utf-8")
+    except OSError as e:
+        raise RuntimeError(f"Error: cannot read {path}: {e.strerror}") from None
+
+
+def write(x: Any, port: Optional[OutputPort] = None) -> None:
+    output_file(port).write(show(x))
+
+
+def display(x: Any, port: Optional[OutputPort] = None) -> None:
+    output_file(port).write(x if isinstance(x, str) else show(x))
+
+
+def newline(port: Optional[OutputPort] = None) -> None:
+    output_file(port).write("\n")
+
+
+PRIMITIVES = {
+    "open-input-file": open_input_file,
+    "open-output-file": open_output_file,
+    "close-port": close_port,
+    "close-input-port": close_port,
+    "close-output-port": close_port,
+    "input-port?": lambda x: isinstance(x, InputPort),
+    "output-port?": lambda x: isinstance(x, OutputPort),
+    "read-line": read_line,
+    "read": read,
+    "file-lines": file_lines,
+    "read-file": read_file,
+    "eof-object": lambda: EOF,
+    "eof-object?": lambda x: x is EOF,
+    "write": write,
+    "display": display,
+    "newline": newline,
+}
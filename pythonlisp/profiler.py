@@ -0,0 +1,128 @@
+"""Per-procedure profiler for Lisp programs.
+
+An interpreter created with a `Profiler` builds its lambdas as profiled
+function definitions, which time every call of the lambda. Lambdas are
+named after their `define`, or after where they are written. Without a
+profiler plain `FunctionDef`s are built and nothing is recorded.
+
+A tail call replaces the caller's entry on the profiled stack, the same
+way it replaces the caller's frame when run.
+"""
+
+import time
+from collections import Counter
+from typing import Any, Callable, Optional, TextIO
+
+from pythonlisp.compiler import CompiledFunctionDef
+from pythonlisp.env import FunctionDef, Procedure, TailCall
+
+
+class ProcedureStats:
+    __slots__ = ("calls", "inclusive", "exclusive")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+
+
+class Profiler:
+    stats: dict[str, ProcedureStats]
+    stacks: Counter[str]
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.stats = {}
+        # exclusive seconds spent in each distinct call stack
+        self.stacks = Counter()
+        # open calls: name, start time and time spent in callees
+        self.frames: list[list[Any]] = []
+        self.active: Counter[str] = Counter()
+
+    def function_def(self, cls: type) -> Callable[..., Procedure]:
+        """A constructor for profiled instances of `cls`, a `Procedure`
+        class, reporting to this profiler."""
+        profiled = PROFILED[cls]
+
+        def make(*args) -> Procedure:
+            proc = profiled(*args)
+            proc.profiler = self
+            return proc
+
+        return make
+
+    def enter(self, name: str) -> None:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ProcedureStats()
+        stats.calls += 1
+        self.active[name] += 1
+        self.frames.append([name, self.clock(), 0.0])
+
+    def exit(self) -> None:
+        now = self.clock()
+        name, start, callees = self.frames[-1]
+        elapsed = now - start
+        stats = self.stats[name]
+        stats.exclusive += elapsed - callees
+        # recursive calls are already inside the outermost one's time
+        self.active[name] -= 1
+        if not self.active[name]:
+            stats.inclusive += elapsed
+        self.stacks[";".join(frame[0] for frame in self.frames)] += elapsed - callees
+        self.frames.pop()
+        if self.frames:
+            self.frames[-1][2] += elapsed
+
+    def table(self, limit: Optional[int] = None) -> str:
+        total = sum(stats.exclusive for stats in self.stats.values()) or 1.0
+        rows = sorted(self.stats.items(), key=lambda item: -item[1].exclusive)
+        header = f"{'calls':>10} {'inclusive':>12} {'exclusive':>12} {'excl%':>6}"
+        lines = [header + "  procedure"]
+        for name, stats in rows[:limit]:
+            lines.append(
+                f"{stats.calls:>10} {stats.inclusive * 1000:10.2f}ms"
+                f" {stats.exclusive * 1000:10.2f}ms"
+                f" {stats.exclusive / total:6.1%}  {name}"
+            )
+        return "\n".join(lines)
+
+    def write_collapsed(self, out: TextIO) -> None:
+        """Write the stacks in the collapsed format read by flamegraph.pl
+        and speedscope, weighted by microseconds."""
+        for stack, seconds in sorted(self.stacks.items()):
+            out.write(f"{stack} {round(seconds * 1_000_000)}\n")
+
+
+class ProfiledCall(Procedure):
+    """`Procedure.__call__`, recording every procedure the trampoline
+    runs."""
+
+    profiler: Profiler
+
+    def __call__(self, *args) -> Any:
+        profiler = self.profiler
+        proc: Procedure = self
+        while True:
+            profiler.enter(proc.name)
+            try:
+                result = proc.eval(proc.body, proc.bind(args))
+            finally:
+                profiler.exit()
+            if type(result) is not TailCall:
+                return result
+            proc, args = result.proc, result.args
+
+
+class ProfiledFunctionDef(ProfiledCall, FunctionDef):
+    pass
+
+
+class ProfiledCompiledFunctionDef(ProfiledCall, CompiledFunctionDef):
+    pass
+
+
+PROFILED: dict[type, type] = {
+    FunctionDef: ProfiledFunctionDef,
+    CompiledFunctionDef: ProfiledCompiledFunctionDef,
+}
@@ -0,0 +1,121 @@
+"""Multi-session evaluation server.
+
+Every connection is a session with its own interpreter. All sessions
+share the prebuilt builtins, and each starts with a private copy of
+them as its global environment. The protocol is line based: every line
+received is Lisp source to evaluate. Each line gets one JSON line back,
+either `{"ok": true, "value": "<printed result>"}` or
+`{"ok": false, "error": "<message>"}`.
+
+Evaluation runs in a thread pool, so the event loop keeps accepting
+connections and serving other sessions while a long computation runs.
+The requests of a single session are evaluated in order. A line that is
+too long or is not UTF-8 gets an error back and the session goes on.
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from pythonlisp.interpreter import Interpreter
+
+# the longest line read, in bytes
+LIMIT = 1 << 16
+
+
+def parse_address(address: str) -> tuple[Optional[str], Optional[int], Optional[str]]:
+    """`unix:PATH`, `HOST:PORT` or `PORT` as (host, port, path)."""
+    if address.startswith("unix:"):
+        return None, None, address[len("unix:") :]
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port), None
+
+
+async def reply(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+async def skip_line(reader: asyncio.StreamReader) -> None:
+    """Skip the rest of a line longer than the reader's limit."""
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+
+class Server:
+    engine: str
+    sessions: int
+
+    def __init__(self, engine: str = "compile", workers: Optional[int] = None):
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="lisp-eval")
+        self.sessions = 0
+
+    def evaluate(self, interpreter: Interpreter, source: str) -> dict:
+        try:
+            return {"ok": True, "value": str(interpreter.interpret(source))}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.sessions += 1
+        interpreter = Interpreter(self.engine)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # the last line, without a newline
+                    line = e.partial
+                except asyncio.LimitOverrunError:
+                    await skip_line(reader)
+                    error = f"Error: line longer than {LIMIT} bytes"
+                    await reply(writer, {"ok": False, "error": error})
+                    continue
+                if not line:
+                    break
+                try:
+                    source = line.decode().strip()
+                except UnicodeDecodeError as e:
+                    await reply(writer, {"ok": False, "error": f"Error: {e}"})
+                    continue
+                if not source:
+                    continue
+                result = await loop.run_in_executor(
+                    self.executor, self.evaluate, interpreter, source
+                )
+                await reply(writer, result)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, address: str) -> asyncio.Server:
+        host, port, path = parse_address(address)
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path, limit=LIMIT)
+        return await asyncio.start_server(self.handle, host, port, limit=LIMIT)
+
+    async def serve(self, address: str) -> None:
+        server = await self.start(address)
+        names = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"serving on {names}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
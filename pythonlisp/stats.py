@@ -0,0 +1,201 @@
+"""Interpreter statistics.
+
+An interpreter created with a `Stats` times each phase of running a
+program (tokenizing, parsing, macro expansion, optimising, compiling and
+evaluating) and counts tokens, parsed nodes, procedure calls and the
+frames made for them. The tree and machine engines look variables up
+through a chain of `Env` frames, and every lookup records how far up the
+chain its name was found. The compile engine resolves local and captured
+variables once, when a lambda is compiled, and only looks globals up
+while running, so it records how its symbols were resolved instead.
+
+Without a `Stats` none of this code is on the interpreter's path.
+"""
+
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from pythonlisp.env import Env, Procedure
+from pythonlisp.parser_ import List, SExp
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None  # type: ignore
+
+PHASES = ("tokenize", "parse", "expand", "optimize", "compile", "evaluate")
+RESOLVED = ("local", "captured", "global")
+# the end of the items given to `Stats.timed`
+DONE = object()
+
+T = TypeVar("T")
+
+
+class Stats:
+    phases: Counter[str]
+    depths: Counter[int]
+    resolved: Counter[str]
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        # seconds spent in each phase, leaving out the phases inside it
+        self.phases = Counter()
+        self.tokens = 0
+        self.nodes = 0
+        self.calls = 0
+        self.frames = 0
+        # Env lookups by how many frames up the name was found
+        self.depths = Counter()
+        self.global_hits = 0
+        self.misses = 0
+        # symbols compiled into a local, captured or global reference
+        self.resolved = Counter()
+        # open phases: name, start time and time spent in nested phases
+        self.open: list[list[Any]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        frame: list[Any] = [name, self.clock(), 0.0]
+        self.open.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - frame[1]
+            self.phases[name] += elapsed - frame[2]
+            self.open.pop()
+            if self.open:
+                self.open[-1][2] += elapsed
+
+    def timed(self, name: str, items: Iterator[T]) -> Iterator[T]:
+        """`items`, with the time taken to produce each counted in phase
+        `name`, so that streamed phases are timed apart."""
+        while True:
+            with self.phase(name):
+                item = next(items, DONE)
+            if item is DONE:
+                return
+            yield item  # type: ignore
+
+    def env(self) -> "CountedEnv":
+        """A global environment whose frames report to these stats."""
+        return CountedEnv(stats=self)
+
+    def function_def(self, make: Callable[..., Procedure], frames: bool = False):
+        """A constructor of procedures built by `make` whose calls are
+        counted. With `frames`, every call also counts as a frame, for
+        procedures binding their arguments in something else than an
+        `Env`."""
+        stats = self
+
+        def counted(*args) -> Procedure:
+            proc = make(*args)
+            bind = proc.bind
+
+            def counted_bind(args):
+                stats.calls += 1
+                if frames:
+                    stats.frames += 1
+                return bind(args)
+
+            # the engines call `bind` once per call, trampolined or not
+            proc.bind = counted_bind  # type: ignore
+            return proc
+
+        return counted
+
+    def count_nodes(self, sexp: SExp) -> None:
+        stack = [sexp]
+        while stack:
+            sexp = stack.pop()
+            self.nodes += 1
+            if isinstance(sexp, List):
+                stack.extend(sexp)
+
+    @property
+    def lookups(self) -> int:
+        return sum(self.depths.values()) + self.misses
+
+    def peak_memory(self) -> Optional[int]:
+        """The peak resident memory of the process in bytes, if known."""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes, except on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.lookups
+        return {
+            "phases": {name: self.phases[name] for name in PHASES},
+            "tokens": self.tokens,
+            "nodes": self.nodes,
+            "calls": self.calls,
+            "frames": self.frames,
+            "lookups": lookups,
+            "lookup_depths": dict(sorted(self.depths.items())),
+            "lookup_misses": self.misses,
+            "local_hit_rate": self.depths[0] / lookups if lookups else None,
+            "global_hit_rate": self.global_hits / lookups if lookups else None,
+            "resolved": {kind: self.resolved[kind] for kind in RESOLVED},
+            "peak_memory": self.peak_memory(),
+        }
+
+    def table(self) -> str:
+        stats = self.as_dict()
+        total = sum(stats["phases"].values()) or 1.0
+        lines = [f"{'phase':<10} {'time':>12} {'share':>6}"]
+        for name, seconds in stats["phases"].items():
+            lines.append(f"{name:<10} {seconds * 1000:10.2f}ms {seconds / total:6.1%}")
+        lines.append(f"tokens {stats['tokens']}, nodes {stats['nodes']}")
+        lines.append(f"calls {stats['calls']}, frames {stats['frames']}")
+        lookups = stats["lookups"]
+        if lookups:
+            lines.append(
+                f"lookups {lookups}: {stats['local_hit_rate']:.1%} in the"
+                f" innermost frame, {stats['global_hit_rate']:.1%} global,"
+                f" {stats['lookup_misses']} not found"
+            )
+            width = max(stats["lookup_depths"].values())
+            for depth, count in stats["lookup_depths"].items():
+                bar = "#" * max(1, round(count / width * 40))
+                lines.append(f"{depth:>6} {count:>10} {bar}")
+        resolved = stats["resolved"]
+        if any(resolved.values()):
+            lines.append(
+                "symbols compiled: "
+                + ", ".join(f"{count} {kind}" for kind, count in resolved.items())
+            )
+        peak = stats["peak_memory"]
+        if peak is not None:
+            lines.append(f"peak memory {peak / (1 << 20):.1f}MiB")
+        return "\n".join(lines)
+
+
+class CountedEnv(Env):
+    """An `Env` recording its frames and lookups into `stats`."""
+
+    def __init__(
+        self, parent: Optional["CountedEnv"] = None, stats: Optional[Stats] = None
+    ) -> None:
+        super().__init__(parent)
+        self.stats: Stats = parent.stats if parent else stats  # type: ignore
+        if parent:
+            self.stats.frames += 1
+
+    def find(self, key: str) -> Optional[Any]:
+        env: Optional[Env] = self
+        depth = 0
+        while env:
+            var = env.env.get(key)
+            if var is not None:
+                self.stats.depths[depth] += 1
+                if env.parent is None:
+                    self.stats.global_hits += 1
+                return var
+            env = env.parent
+            depth += 1
+        self.stats.misses += 1
+        return None
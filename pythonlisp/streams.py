@@ -0,0 +1,119 @@
+"""Promises and lazy streams.
+
+`(delay expr)` makes a promise, and `force` evaluates it once and keeps
+the value. `(delay-force expr)` is for an `expr` that itself evaluates
+to a promise. Forcing it forces that promise in the same loop, so a
+chain of them runs in constant Python stack.
+
+A stream is either `NIL` or a pair whose cdr is a promise of the rest of
+the stream, as made by `(cons-stream a b)`. The stream primitives here
+are written as loops in Python, so a stream is only forced as far as its
+elements are asked for.
+"""
+
+from typing import Any, Callable
+
+from pythonlisp.parser_ import NIL, Pair
+
+
+class Promise:
+    # [done, value or thunk, chained], shared by promises forced together
+    __slots__ = ("box",)
+
+    def __init__(self, thunk: Callable[[], Any], chained: bool = False) -> None:
+        self.box: list[Any] = [False, thunk, chained]
+
+    def __repr__(self) -> str:
+        return "#<promise>"
+
+
+def force(promise: Any) -> Any:
+    if not isinstance(promise, Promise):
+        return promise
+    while True:
+        box = promise.box
+        done, content, chained = box
+        if done:
+            return content
+        value = content()
+        box = promise.box
+        if box[0]:
+            # forced again while running the thunk
+            return box[1]
+        if chained and isinstance(value, Promise):
+            # continue with the inner promise, sharing its state so both
+            # end up with the value
+            box[:] = value.box
+            value.box = box
+        else:
+            box[0], box[1] = True, value
+            return value
+
+
+def stream_car(s: Pair) -> Any:
+    try:
+        return s.car
+    except AttributeError:
+        raise RuntimeError(f"Error: expect stream, found: {type(s)}") from None
+
+
+def stream_cdr(s: Pair) -> Any:
+    try:
+        return force(s.cdr)
+    except AttributeError:
+        raise RuntimeError(f"Error: expect stream, found: {type(s)}") from None
+
+
+def stream_map(f: Callable, s: Any) -> Any:
+    if s is NIL:
+        return NIL
+    return Pair(f(s.car), Promise(lambda: stream_map(f, stream_cdr(s))))
+
+
+def stream_filter(pred: Callable, s: Any) -> Any:
+    while s is not NIL and not pred(s.car):
+        s = stream_cdr(s)
+    if s is NIL:
+        return NIL
+    return Pair(s.car, Promise(lambda: stream_filter(pred, stream_cdr(s))))
+
+
+def stream_take(s: Any, n: int) -> Any:
+    if n <= 0 or s is NIL:
+        return NIL
+    return Pair(s.car, Promise(lambda: stream_take(stream_cdr(s), n - 1)))
+
+
+def stream_ref(s: Any, n: int) -> Any:
+    for _ in range(n):
+        s = stream_cdr(s)
+    try:
+        return s.car
+    except AttributeError:
+        raise RuntimeError(f"Error: stream shorter than {n + 1}") from None
+
+
+def stream_to_list(s: Any, n: int = -1) -> Pair:
+    """The elements of `s`, or its first `n`, as a list."""
+    items = []
+    while s is not NIL and n != 0:
+        items.append(s.car)
+        s = stream_cdr(s)
+        n -= 1
+    return Pair.from_iterable(items)
+
+
+PRIMITIVES = {
+    "force": force,
+    "promise?": lambda x: isinstance(x, Promise),
+    "the-empty-stream": NIL,
+    "stream-null?": lambda s: s is NIL,
+    "stream-pair?": lambda s: isinstance(s, Pair) and isinstance(s.cdr, Promise),
+    "stream-car": stream_car,
+    "stream-cdr": stream_cdr,
+    "stream-map": stream_map,
+    "stream-filter": stream_filter,
+    "stream-take": stream_take,
+    "stream-ref": stream_ref,
+    "stream->list": stream_to_list,
+}
@@ -0,0 +1,89 @@
+"""Hash tables.
+
+A `HashTable` is a Python dict, so `hash-ref`, `hash-set!` and
+`hash-remove!` take O(1) time. Keys are compared like `equal?`: strings,
+numbers and lists by value, and symbols by name. Vectors and hash
+tables are mutable and cannot be keys.
+"""
+
+from typing import Any
+
+from pythonlisp.parser_ import Pair, show
+
+# the default of hash-ref when none is given
+MISSING = object()
+
+
+class HashTable:
+    __slots__ = ("table",)
+
+    def __init__(self) -> None:
+        self.table: dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, HashTable):
+            return NotImplemented
+        return self.table == other.table
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        items = " ".join(f"({show(k)} . {show(v)})" for k, v in self.table.items())
+        return f"#hash({items})"
+
+
+def check(table: Any) -> dict[Any, Any]:
+    if type(table) is not HashTable:
+        raise RuntimeError(f"Error: expect hash table, found: {type(table)}")
+    return table.table
+
+
+def hash_ref(table: HashTable, key: Any, default: Any = MISSING) -> Any:
+    try:
+        return check(table)[key]
+    except KeyError:
+        if default is MISSING:
+            raise RuntimeError(f"Error: key {show(key)} not found") from None
+        return default
+    except TypeError:
+        raise RuntimeError(f"Error: {type(key)} cannot be a hash key") from None
+
+
+def hash_set(table: HashTable, key: Any, value: Any) -> None:
+    try:
+        check(table)[key] = value
+    except TypeError:
+        raise RuntimeError(f"Error: {type(key)} cannot be a hash key") from None
+
+
+def hash_remove(table: HashTable, key: Any) -> None:
+    try:
+        check(table).pop(key, None)
+    except TypeError:
+        raise RuntimeError(f"Error: {type(key)} cannot be a hash key") from None
+
+
+def hash_has_key(table: HashTable, key: Any) -> bool:
+    try:
+        return key in check(table)
+    except TypeError:
+        raise RuntimeError(f"Error: {type(key)} cannot be a hash key") from None
+
+
+PRIMITIVES = {
+    "make-hash-table": HashTable,
+    "hash-table?": lambda x: isinstance(x, HashTable),
+    "hash-ref": hash_ref,
+    "hash-set!": hash_set,
+    "hash-remove!": hash_remove,
+    "hash-has-key?": hash_has_key,
+    "hash-count": lambda table: len(check(table)),
+    "hash-keys": lambda table: Pair.from_iterable(list(check(table))),
+    "hash-values": lambda table: Pair.from_iterable(list(check(table).values())),
+    "hash->list": lambda table: Pair.from_iterable(
+        [Pair(k, v) for k, v in check(table).items()]
+    ),
+}
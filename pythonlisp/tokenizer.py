@@ -1,7 +1,11 @@
-from collections import deque, namedtuple
+import codecs
+import re
+from bisect import bisect_right
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Generator, Tuple, Union
+from functools import partial
+from typing import Generator, Iterable, Iterator, Optional, Union
 
 
 @dataclass
@@ -22,18 +26,92 @@ class TokenKind(Enum):
     EOF = auto()
 
 
-@dataclass
+class LineIndex:
+    """Maps a character position in a source to its `Offset`. The line
+    starts are only scanned the first time a position is asked for."""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.starts: Optional[list[int]] = None
+
+    def offset(self, pos: int) -> Offset:
+        if self.starts is None:
+            self.starts = [0]
+            self.starts.extend(m.end() for m in NEWLINE_RE.finditer(self.source))
+        lineno = bisect_right(self.starts, pos)
+        return Offset(lineno, pos - self.starts[lineno - 1] + 1)
+
+
+class Line:
+    """One line of a streamed source; tokens on it locate themselves from
+    its start without an index over the whole input."""
+
+    __slots__ = ("lineno", "start")
+
+    def __init__(self, lineno: int, start: int) -> None:
+        self.lineno = lineno
+        self.start = start
+
+    def offset(self, pos: int) -> Offset:
+        return Offset(self.lineno, pos - self.start + 1)
+
+
 class Token:
+    __slots__ = ("kind", "lexeme", "value", "_offset", "pos", "lines")
+
     kind: TokenKind
     lexeme: str
     value: str | int | float | None
-    offset: Offset
+
+    def __init__(
+        self,
+        kind: TokenKind,
+        lexeme: str,
+        value: str | int | float | None,
+        offset: Optional[Offset] = None,
+        pos: int = 0,
+        lines: Union[LineIndex, Line, None] = None,
+    ) -> None:
+        self.kind = kind
+        self.lexeme = lexeme
+        self.value = value
+        self._offset = offset
+        self.pos = pos
+        self.lines = lines
+
+    @property
+    def offset(self) -> Offset:
+        if self._offset is None and self.lines is not None:
+            self._offset = self.lines.offset(self.pos)
+        return self._offset  # type: ignore
+
+    @offset.setter
+    def offset(self, offset: Offset) -> None:
+        self._offset = offset
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.kind, self.lexeme, self.value, self.offset) == (
+            other.kind,
+            other.lexeme,
+            other.value,
+            other.offset,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Token(kind={self.kind!r}, lexeme={self.lexeme!r}, "
+            f"value={self.value!r}, offset={self.offset!r})"
+        )
 
 
 LINE_BREAKS = " \t\n"
 
 
-class Tokenizer:
+class CharTokenizer:
+    """The original character-at-a-time scanner, kept as a reference."""
+
     def tokenize(self, source: str) -> Generator[Token, None, None]:
         skip = 0
         lineno, column = 1, 1
@@ -112,3 +190,182 @@ class Tokenizer:
                     token.kind = TokenKind.SYMBOL
             yield token
         yield Token(TokenKind.EOF, "", None, Offset(lineno, column))
+
+
+# a token is a paren, a string or an atom, after any whitespace. Atoms that
+# float() can never parse are matched as symbols straight away.
+TOKEN_RE = re.compile(
+    r"""
+    [ \t\n]*
+    (?:
+        (?P<leftparen>\()
+        | (?P<rightparen>\))
+        | (?P<string>"(?:[^"\\]|\\+[^\\])*")
+        | (?P<symbol>[^()"\s0-9+\-.nNiI\x1c-\x1f\x80-\U0010ffff][^() \t\n]*)
+        | (?P<atom>[^()" \t\n][^() \t\n]*)
+        | (?P<unterminated>")
+        | (?P<eof>\Z)
+    )
+    """,
+    re.VERBOSE,
+)
+NEWLINE_RE = re.compile("\n")
+CHUNK_SIZE = 1 << 16
+# kinds whose match may continue into the next chunk
+UNFINISHED = ("symbol", "atom", "unterminated", "eof")
+NUMBER_START = set("0123456789+-.nNiI")
+
+
+def number_value(lexeme: str) -> Optional[int | float]:
+    first = lexeme[0]
+    # float() also accepts "nan", "inf", leading whitespace such as "\r" and
+    # non-ASCII digits, so only rule out what it can never parse
+    if first.isascii() and first not in NUMBER_START and not first.isspace():
+        return None
+    try:
+        return int(lexeme)
+    except ValueError:
+        pass
+    try:
+        return float(lexeme)
+    except ValueError:
+        return None
+
+
+def read_chunks(stream, size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Read a text or binary file, or an mmap, in chunks of text. Any other
+    iterable is taken to yield text already."""
+    if not hasattr(stream, "read"):
+        yield from stream
+        return
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in iter(partial(stream.read, size), type(stream.read(0))()):
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    yield decoder.decode(b"", final=True)
+
+
+class Tokenizer:
+    """Scan whole tokens with one regex match each. Token offsets are
+    computed from a `LineIndex` only when they are read."""
+
+    def tokenize(
+        self, source: str, pos: int = 0, endpos: Optional[int] = None
+    ) -> Generator[Token, None, None]:
+        """The tokens of `source[pos:endpos]`, located in all of `source`."""
+        lines = LineIndex(source)
+        if endpos is None:
+            endpos = len(source)
+        SYMBOL, NUMBER = TokenKind.SYMBOL, TokenKind.NUMBER
+        LEFTPAREN, RIGHTPAREN = TokenKind.LEFTPAREN, TokenKind.RIGHTPAREN
+        # every position starts some token, so the matches are contiguous
+        for m in TOKEN_RE.finditer(source, pos, endpos):
+            # every alternative of TOKEN_RE is a named group
+            kind: str = m.lastgroup  # type: ignore[assignment]
+            start = m.start(kind)
+            if kind == "leftparen":
+                yield Token(LEFTPAREN, "(", None, None, start, lines)
+            elif kind == "rightparen":
+                yield Token(RIGHTPAREN, ")", None, None, start, lines)
+            elif kind == "symbol":
+                yield Token(SYMBOL, m.group(kind), None, None, start, lines)
+            elif kind == "atom":
+                lexeme = m.group(kind)
+                value = number_value(lexeme)
+                if value is None:
+                    yield Token(SYMBOL, lexeme, None, None, start, lines)
+                else:
+                    yield Token(NUMBER, lexeme, value, None, start, lines)
+            elif kind == "string":
+                lexeme = m.group(kind)
+                text = lexeme[1:-1].replace('\\"', '"')
+                yield Token(TokenKind.STRING, lexeme, text, None, start, lines)
+            elif kind == "unterminated":
+                # like the character scanner, a string running into the end
+                # of the source is closed by a final quote, even an escaped one
+                if m.end() == endpos or source[endpos - 1] != '"':
+                    offset = lines.offset(endpos)
+                    raise RuntimeError(
+                        f"unterminated string found in {offset.lineno}:{offset.column}"
+                    )
+                lexeme = source[start:endpos]
+                text = lexeme[1:-1].replace('\\"', '"')
+                yield Token(TokenKind.STRING, lexeme, text, None, start, lines)
+                break
+        yield Token(TokenKind.EOF, "", None, None, endpos, lines)
+
+    def tokenize_stream(self, chunks: Iterable[str]) -> Generator[Token, None, None]:
+        """Tokenize text arriving in chunks, holding back only the token
+        that may continue into the next chunk."""
+        SYMBOL, NUMBER = TokenKind.SYMBOL, TokenKind.NUMBER
+        LEFTPAREN, RIGHTPAREN = TokenKind.LEFTPAREN, TokenKind.RIGHTPAREN
+        buffer, base = "", 0
+        line = Line(1, 0)
+        chunks = iter(chunks)
+        more = True
+        while more:
+            chunk = next(chunks, None)
+            if chunk is None:
+                more = False
+            elif not chunk:
+                continue
+            else:
+                buffer += chunk
+            prev = 0
+            for m in TOKEN_RE.finditer(buffer):
+                kind: str = m.lastgroup  # type: ignore[assignment]
+                if more and kind in UNFINISHED and m.end(kind) == len(buffer):
+                    break
+                if kind == "unterminated" and more:
+                    break
+                start = m.start(kind)
+                newlines = buffer.count("\n", prev, start)
+                if newlines:
+                    line = Line(
+                        line.lineno + newlines,
+                        base + buffer.rindex("\n", prev, start) + 1,
+                    )
+                prev = m.end()
+                pos = base + start
+                if kind == "leftparen":
+                    yield Token(LEFTPAREN, "(", None, None, pos, line)
+                elif kind == "rightparen":
+                    yield Token(RIGHTPAREN, ")", None, None, pos, line)
+                elif kind == "symbol":
+                    yield Token(SYMBOL, m.group(kind), None, None, pos, line)
+                elif kind == "atom":
+                    lexeme = m.group(kind)
+                    value = number_value(lexeme)
+                    if value is None:
+                        yield Token(SYMBOL, lexeme, None, None, pos, line)
+                    else:
+                        yield Token(NUMBER, lexeme, value, None, pos, line)
+                elif kind == "eof":
+                    break
+                else:
+                    if kind == "unterminated":
+                        # a string running into the end of the source is
+                        # closed by a final quote, even an escaped one
+                        if prev == len(buffer) or buffer[-1] != '"':
+                            lineno = line.lineno + buffer.count("\n", start)
+                            if lineno > line.lineno:
+                                line = Line(lineno, base + buffer.rindex("\n") + 1)
+                            offset = line.offset(base + len(buffer))
+                            raise RuntimeError(
+                                "unterminated string found in "
+                                f"{offset.lineno}:{offset.column}"
+                            )
+                        prev = len(buffer)
+                    lexeme = buffer[start:prev]
+                    text = lexeme[1:-1].replace('\\"', '"')
+                    yield Token(TokenKind.STRING, lexeme, text, None, pos, line)
+                    newlines = lexeme.count("\n")
+                    if newlines:
+                        line = Line(
+                            line.lineno + newlines,
+                            base + buffer.rindex("\n", 0, prev) + 1,
+                        )
+                    if kind == "unterminated":
+                        break
+            buffer = buffer[prev:]
+            base += prev
+        yield Token(TokenKind.EOF, "", None, None, base + len(buffer), line)
@@ -0,0 +1,239 @@
+"""Vectors: mutable vectors of any values, and packed vectors of floats
+with bulk arithmetic.
+
+A `Vector` is a Python list, indexed and updated in O(1) with
+`vector-ref` and `vector-set!`.
+
+A `NumVector` stores its elements unboxed, in a NumPy array when NumPy is
+installed and in an `array("d")` otherwise. The primitives here work on
+whole vectors at once instead of calling a procedure per element. Numbers
+given in place of a vector are broadcast. `vector-ref` and `vector-set!`
+work on both kinds.
+"""
+
+import math
+import operator as op
+from array import array
+from itertools import repeat
+from typing import Any, Callable, Iterable, Union
+
+from pythonlisp.parser_ import Pair, show
+
+try:
+    import numpy as np  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+
+class Vector:
+    __slots__ = ("items",)
+
+    def __init__(self, items: list) -> None:
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self.items == other.items
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return "#(" + " ".join(show(x) for x in self.items) + ")"
+
+
+class NumVector:
+    __slots__ = ("data",)
+
+    def __init__(self, data) -> None:
+        self.data = data
+
+    @staticmethod
+    def from_iterable(items: Iterable) -> "NumVector":
+        try:
+            if np is not None:
+                return NumVector(np.fromiter(items, dtype=float))
+            return NumVector(array("d", items))
+        except (TypeError, ValueError):
+            raise RuntimeError("Error: expect numbers in numvector") from None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return (float(x) for x in self.data)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, NumVector):
+            return NotImplemented
+        return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return "#f64(" + " ".join(repr(x) for x in self) + ")"
+
+
+Operand = Union[NumVector, int, float]
+
+
+def check(x) -> Operand:
+    if isinstance(x, NumVector):
+        return x
+    if isinstance(x, (int, float)) and not isinstance(x, bool):
+        return x
+    raise RuntimeError(f"Error: expect numvector or number, found: {type(x)}")
+
+
+def elementwise(operator: Callable[[Any, Any], Any]) -> Callable:
+    """A primitive applying `operator` pairwise, broadcasting numbers."""
+
+    def primitive(a: Operand, b: Operand) -> Operand:
+        a, b = check(a), check(b)
+        if not isinstance(a, NumVector) and not isinstance(b, NumVector):
+            return operator(a, b)
+        if isinstance(a, NumVector) and isinstance(b, NumVector):
+            if len(a) != len(b):
+                raise RuntimeError(
+                    f"Error: numvector lengths differ: {len(a)} and {len(b)}"
+                )
+        if np is not None:
+            x = a.data if isinstance(a, NumVector) else a
+            y = b.data if isinstance(b, NumVector) else b
+            return NumVector(operator(x, y))
+        xs = a.data if isinstance(a, NumVector) else repeat(a)
+        ys = b.data if isinstance(b, NumVector) else repeat(b)
+        return NumVector(array("d", map(operator, xs, ys)))
+
+    return primitive
+
+
+def numvector(*xs) -> NumVector:
+    return NumVector.from_iterable(xs)
+
+
+def make_numvector(size: int, fill: float = 0.0) -> NumVector:
+    if not isinstance(size, int) or size < 0:
+        raise RuntimeError(f"Error: expect non-negative size, found: {size}")
+    if np is not None:
+        return NumVector(np.full(size, fill, dtype=float))
+    return NumVector(array("d", [fill]) * size)
+
+
+def numvector_range(start: float, stop: float, step: float = 1) -> NumVector:
+    if np is not None:
+        return NumVector(np.arange(start, stop, step, dtype=float))
+    if isinstance(start, int) and isinstance(stop, int) and isinstance(step, int):
+        return NumVector(array("d", range(start, stop, step)))
+    size = max(0, math.ceil((stop - start) / step))
+    return NumVector(array("d", (start + i * step for i in range(size))))
+
+
+def make_vector(size: int, fill: Any = 0) -> Vector:
+    if not isinstance(size, int) or size < 0:
+        raise RuntimeError(f"Error: expect non-negative size, found: {size}")
+    return Vector([fill] * size)
+
+
+def check_index(v, index: int) -> None:
+    if not isinstance(index, int) or isinstance(index, bool):
+        raise RuntimeError(f"Error: expect integer index, found: {type(index)}")
+    if not 0 <= index < len(v):
+        raise RuntimeError(f"Error: index {index} out of range for length {len(v)}")
+
+
+def vector_length(v: Vector) -> int:
+    if not isinstance(v, (Vector, NumVector)):
+        raise RuntimeError(f"Error: expect vector, found: {type(v)}")
+    return len(v)
+
+
+def vector_to_list(v: Vector) -> Pair:
+    if not isinstance(v, Vector):
+        raise RuntimeError(f"Error: expect vector, found: {type(v)}")
+    return Pair.from_iterable(v.items)
+
+
+def vector_ref(v: Union[Vector, NumVector], index: int) -> Any:
+    if type(v) is Vector:
+        items = v.items
+        if type(index) is int and 0 <= index < len(items):
+            return items[index]
+        check_index(v, index)
+    if not isinstance(v, NumVector):
+        raise RuntimeError(f"Error: expect vector, found: {type(v)}")
+    check_index(v, index)
+    return float(v.data[index])
+
+
+def vector_set(v: Union[Vector, NumVector], index: int, value: Any) -> None:
+    if type(v) is Vector:
+        items = v.items
+        if type(index) is int and 0 <= index < len(items):
+            items[index] = value
+            return
+        check_index(v, index)
+    if not isinstance(v, NumVector):
+        raise RuntimeError(f"Error: expect vector, found: {type(v)}")
+    check_index(v, index)
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise RuntimeError(f"Error: expect number in numvector, found: {type(value)}")
+    v.data[index] = value
+
+
+def vsum(v: NumVector) -> float:
+    if not isinstance(v, NumVector):
+        raise RuntimeError(f"Error: expect numvector, found: {type(v)}")
+    if np is not None:
+        return float(v.data.sum())
+    return math.fsum(v.data)
+
+
+def vdot(a: NumVector, b: NumVector) -> float:
+    if not isinstance(a, NumVector) or not isinstance(b, NumVector):
+        raise RuntimeError("Error: expect two numvectors")
+    if len(a) != len(b):
+        raise RuntimeError(f"Error: numvector lengths differ: {len(a)} and {len(b)}")
+    if np is not None:
+        return float(np.dot(a.data, b.data))
+    return math.fsum(map(op.mul, a.data, b.data))
+
+
+def list_to_numvector(xs) -> NumVector:
+    return NumVector.from_iterable(xs)
+
+
+def numvector_to_list(v: NumVector) -> Pair:
+    if not isinstance(v, NumVector):
+        raise RuntimeError(f"Error: expect numvector, found: {type(v)}")
+    return Pair.from_iterable(list(v))
+
+
+PRIMITIVES = {
+    "vector": lambda *xs: Vector(list(xs)),
+    "make-vector": make_vector,
+    "vector?": lambda x: isinstance(x, Vector),
+    "vector-length": vector_length,
+    "vector-set!": vector_set,
+    "vector->list": vector_to_list,
+    "list->vector": lambda xs: Vector(list(xs)),
+    "numvector": numvector,
+    "make-numvector": make_numvector,
+    "numvector-range": numvector_range,
+    "list->numvector": list_to_numvector,
+    "numvector->list": numvector_to_list,
+    "numvector?": lambda x: isinstance(x, NumVector),
+    "vector-ref": vector_ref,
+    "v+": elementwise(op.add),
+    "v-": elementwise(op.sub),
+    "v*": elementwise(op.mul),
+    "v/": elementwise(op.truediv),
+    "vsum": vsum,
+    "vdot": vdot,
+}
@@ -0,0 +1,294 @@
+"""Watch mode: re-evaluate a program file as it is edited.
+
+The interpreter is kept between reloads. On every change the file is
+split into its top-level forms, each identified by a hash of its text,
+and only the forms with a new hash are parsed. Only forms that are new
+or edited are evaluated, together with
+the unchanged forms that use a name one of them defines when they are
+evaluated: a `define` of a plain value, a top-level expression, or any
+use of a macro. A procedure looks its globals up when it is called, so
+the definition of one that calls a redefined procedure is kept, but a
+form calling it while being evaluated is evaluated again.
+
+Names whose definition was deleted from the file are removed from the
+globals, or get their builtin back. Forms that failed are tried again
+on the next reload. An unchanged form keeps the source positions of the
+parse it was evaluated from.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Optional, TextIO
+
+from pythonlisp.env import Env
+from pythonlisp.interpreter import Interpreter
+from pythonlisp.macros import CORE
+from pythonlisp.parser_ import List, SExp, Symbol
+from pythonlisp.tokenizer import TOKEN_RE
+
+DEFINITIONS = ("define", "define-memo", "define-macro", "defmacro")
+MACRO_DEFINITIONS = ("define-macro", "defmacro")
+BEGIN, LAMBDA, QUOTE = Symbol("begin"), Symbol("lambda"), Symbol("quote")
+
+Key = tuple[bytes, int]
+
+
+# whitespace, strings and atoms up to the next parenthesis or unterminated
+# string, which is the group of the match. Anything else is left for the
+# parser to report
+PAREN_RE = re.compile(
+    r"""
+    (?:[ \t\n]+ | "(?:[^"\\]|\\+[^\\])*" | [^()"\ \t\n][^()\ \t\n]*)*
+    (?:(?P<left>\() | (?P<right>\)) | (?P<quote>") | \Z)
+    """,
+    re.VERBOSE,
+)
+
+
+def digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def split(source: str) -> list[tuple[bytes, int, int]]:
+    """The top-level forms of `source`, as a hash of their text and where
+    they start and end. Only parentheses and strings are scanned."""
+    forms = []
+    depth = start = end = 0
+    for m in PAREN_RE.finditer(source):
+        kind = m.lastgroup
+        pos = m.start(kind) if kind else m.end()
+        if depth == 0:
+            # atoms between two top-level lists are forms too
+            for atom in TOKEN_RE.finditer(source, end, pos):
+                name = atom.lastgroup
+                if name and name != "eof":
+                    text = atom.group(name)
+                    forms.append((digest(text), atom.start(name), atom.end()))
+            start = pos
+        if kind == "left":
+            depth += 1
+            continue
+        if kind == "right" and depth > 1:
+            depth -= 1
+            continue
+        if kind is None and depth == 0:
+            break
+        # a whole list or a stray ")", or else an unclosed list or string
+        # running to the end, which the parser reports
+        end = m.end() if kind == "right" else len(source)
+        forms.append((digest(source[start:end]), start, end))
+        depth = 0
+        if end == len(source):
+            break
+    return forms
+
+
+class Form:
+    """What reloading needs to know about one top-level form."""
+
+    __slots__ = ("defines", "macros", "eager", "uses")
+
+    def __init__(self, sexp: SExp) -> None:
+        self.defines: set[str] = set()
+        self.macros: set[str] = set()
+        # names used while the form is evaluated, and anywhere in it
+        self.eager: set[str] = set()
+        self.uses: set[str] = set()
+        self.scan(sexp)
+
+    def scan(self, sexp: SExp) -> None:
+        if isinstance(sexp, List) and sexp:
+            self.definition(sexp)
+        stack: list[tuple[SExp, bool]] = [(sexp, True)]
+        while stack:
+            sexp, eager = stack.pop()
+            if isinstance(sexp, Symbol):
+                self.uses.add(sexp.val)
+                if eager:
+                    self.eager.add(sexp.val)
+                continue
+            if not isinstance(sexp, List) or not sexp or sexp[0] is QUOTE:
+                continue
+            if sexp[0] is LAMBDA:
+                stack.extend((x, False) for x in sexp[2:])
+            else:
+                stack.extend((x, eager) for x in sexp)
+        # the name being defined is not used
+        self.eager -= self.defines
+
+    def definition(self, sexp: List) -> None:
+        head = sexp[0]
+        if not isinstance(head, Symbol) or head.val not in DEFINITIONS:
+            if head is BEGIN:
+                for x in sexp[1:]:
+                    if isinstance(x, List) and x:
+                        self.definition(x)
+            return
+        target = sexp[1] if len(sexp) > 1 else None
+        if head.val == "define-macro" and isinstance(target, List) and target:
+            target = target[0]
+        if isinstance(target, Symbol):
+            self.defines.add(target.val)
+            if head.val in MACRO_DEFINITIONS:
+                self.macros.add(target.val)
+
+
+@dataclass
+class Reload:
+    forms: int
+    evaluated: int
+    removed: int
+    errors: int
+    seconds: float
+
+    def __str__(self) -> str:
+        return (
+            f"reloaded: {self.evaluated} of {self.forms} forms evaluated,"
+            f" {self.removed} removed, {self.errors} errors"
+            f" in {self.seconds * 1000:.1f}ms"
+        )
+
+
+class Watcher:
+    # the forms evaluated without error, by the hash of their tokens and
+    # how many forms before them have the same hash
+    forms: dict[Key, Form]
+
+    def __init__(
+        self, filename: str, interpreter: Optional[Interpreter] = None
+    ) -> None:
+        self.filename = filename
+        self.interpreter = interpreter or Interpreter()
+        self.forms = {}
+
+    def reload(self, out: TextIO = sys.stderr) -> Reload:
+        start = time.perf_counter()
+        with open(self.filename) as f:
+            source = f.read()
+        seen: Counter[bytes] = Counter()
+        current: dict[Key, tuple[int, int]] = {}
+        for digest, begin, end in split(source):
+            current[(digest, seen[digest])] = (begin, end)
+            seen[digest] += 1
+
+        kept = {key: form for key, form in self.forms.items() if key in current}
+        removed = [form for key, form in self.forms.items() if key not in current]
+        defined = set().union(*(form.defines for form in kept.values()))
+        changed: set[str] = set()
+        changed_macros: set[str] = set()
+        for form in removed:
+            changed |= form.defines
+            changed_macros |= form.macros
+        self.forget(changed - defined)
+
+        new = [key for key in current if key not in kept]
+        sexps = self.parse(source, new, current, out)
+        errors = len(new) - len(sexps)
+        pending = {key: Form(sexp) for key, sexp in sexps.items()}
+        for form in pending.values():
+            changed |= form.defines
+            changed_macros |= form.macros
+        # a procedure using a changed name behaves differently when called
+        # without being evaluated again, and so do the ones calling it. The
+        # unchanged forms that used any of these names when they were
+        # evaluated are evaluated again, and so on
+        stale = True
+        while stale:
+            stale = False
+            for key, form in list(kept.items()):
+                if form.eager & changed or form.uses & changed_macros:
+                    del kept[key]
+                    pending[key] = form
+                elif not (form.uses & changed) or form.defines <= changed:
+                    continue
+                changed |= form.defines
+                changed_macros |= form.macros
+                stale = True
+        sexps.update(self.parse(source, pending.keys() - sexps.keys(), current, out))
+
+        self.forms = kept
+        evaluated = 0
+        for key in current:
+            sexp = sexps.get(key)
+            if sexp is None:
+                continue
+            try:
+                self.interpreter.evaluate(sexp)
+            except Exception as e:
+                errors += 1
+                print(e, file=out)
+                continue
+            self.forms[key] = pending[key]
+            evaluated += 1
+        return Reload(
+            len(current),
+            evaluated,
+            len(removed),
+            errors,
+            time.perf_counter() - start,
+        )
+
+    def parse(
+        self,
+        source: str,
+        keys: Iterable[Key],
+        current: dict[Key, tuple[int, int]],
+        out: TextIO,
+    ) -> dict[Key, SExp]:
+        """Parse the forms at `keys`, each run of neighbouring forms at
+        once. Forms with syntax errors are reported and left out."""
+        index = {key: i for i, key in enumerate(current)}
+        runs: list[list[Key]] = []
+        for key in sorted(keys, key=index.__getitem__):
+            if runs and index[runs[-1][-1]] == index[key] - 1:
+                runs[-1].append(key)
+            else:
+                runs.append([key])
+        sexps: dict[Key, SExp] = {}
+        parser = self.interpreter.parser
+        for run in runs:
+            try:
+                parsed = parser.parse(source, current[run[0]][0], current[run[-1]][1])
+            except Exception as e:
+                if len(run) > 1:
+                    # find the forms in error
+                    runs.extend([key] for key in run)
+                else:
+                    print(e, file=out)
+                continue
+            sexps.update(zip(run, parsed))
+        return sexps
+
+    def forget(self, names: set[str]) -> None:
+        """Remove definitions that are gone from the file."""
+        globals_ = self.interpreter.env.env
+        builtins = Env.builtins or {}
+        macros = self.interpreter.expander.macros
+        for name in names:
+            if name in builtins:
+                globals_[name] = builtins[name]
+            else:
+                globals_.pop(name, None)
+            if name in CORE:
+                macros[name] = CORE[name]
+            else:
+                macros.pop(name, None)
+
+    def watch(self, interval: float = 0.5, out: TextIO = sys.stderr) -> None:
+        """Reload whenever the file changes, until interrupted."""
+        print(self.reload(out), file=out)
+        last = os.stat(self.filename).st_mtime_ns
+        while True:
+            time.sleep(interval)
+            try:
+                mtime = os.stat(self.filename).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if mtime != last:
+                last = mtime
+                print(self.reload(out), file=out)
@@ -0,0 +1,31 @@
+import pytest
+
+from pythonlisp import bench
+
+
+def test_workloads_return_expected_values():
+    report = bench.run_suite(repeat=1)
+    assert list(report["results"]) == [w.name for w in bench.WORKLOADS]
+    for phases in report["results"].values():
+        assert set(phases) == set(bench.PHASES)
+
+
+def test_wrong_result_is_reported():
+    workload = bench.Workload("broken", "(+ 1 1)", 3)
+    with pytest.raises(RuntimeError, match="broken returned 2"):
+        bench.run_workload(workload, repeat=1)
+
+
+def test_compare_against_baseline(tmp_path):
+    baseline = {"results": {"fib": {"tokenize": 0.01, "parse": 0.01, "eval": 1.0}}}
+    report = {
+        "results": {
+            "fib": {"tokenize": 0.0101, "parse": 0.02, "eval": 1.05},
+            "new": {"tokenize": 1.0, "parse": 1.0, "eval": 1.0},
+        }
+    }
+    assert bench.compare(report, baseline) == ["fib parse: 10.0ms -> 20.0ms (+100%)"]
+    assert bench.compare(report, baseline, threshold=2.0) == []
+    path = str(tmp_path / "baseline.json")
+    bench.save(report, path)
+    assert bench.load(path) == report
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from pythonlisp import cache
+from pythonlisp.interpreter import Interpreter
+from pythonlisp.parser_ import Parser
+
+PROGRAM = """(define fact (lambda (n) (if (= n 0) 1 (* n (fact (- n 1))))))
+(define xs (quote (1 2 "three" #t)))
+(fact 10)
+"""
+
+
+class NoParser(Parser):
+    def parse_stream(self, chunks):
+        raise AssertionError("parsed although the cache is warm")
+
+
+@pytest.fixture
+def program(tmp_path):
+    path = tmp_path / "prog.lsp"
+    path.write_text(PROGRAM)
+    return str(path)
+
+
+def test_cache_is_written_and_reused(program):
+    assert Interpreter().interpret_file(program) == 3628800
+    assert os.path.exists(cache.cache_path(program))
+    cold = Parser().parse(PROGRAM)
+    warm = list(cache.cached_forms(program, NoParser()))
+    assert warm == cold
+    interpreter = Interpreter()
+    interpreter.parser = NoParser()
+    assert interpreter.interpret_file(program) == 3628800
+
+
+def test_changed_source_is_parsed_again(program):
+    Interpreter().interpret_file(program)
+    with open(program, "a") as f:
+        f.write("(fact 5)\n")
+    assert Interpreter().interpret_file(program) == 120
+    assert len(list(cache.cached_forms(program, NoParser()))) == 4
+
+
+def test_cached_forms_keep_positions(tmp_path):
+    path = tmp_path / "error.lsp"
+    path.write_text("(define x 1)\n\n  (nope x)\n")
+    list(cache.cached_forms(str(path), Parser()))
+    assert os.path.exists(cache.cache_path(str(path)))
+    with pytest.raises(RuntimeError, match=r"lineno=3, column=4"):
+        Interpreter().interpret_file(str(path))
+
+
+def test_stopped_run_leaves_no_cache(tmp_path):
+    path = tmp_path / "error.lsp"
+    path.write_text("(nope 1)\n" + "(define x 1)\n" * 100)
+    with pytest.raises(RuntimeError, match="nope"):
+        Interpreter().interpret_file(str(path))
+    directory = os.path.dirname(cache.cache_path(str(path)))
+    assert os.listdir(directory) == []
+
+
+def test_no_cache_and_clear(program):
+    assert Interpreter().interpret_file(program, use_cache=False) == 3628800
+    assert not os.path.exists(os.path.dirname(cache.cache_path(program)))
+    Interpreter().interpret_file(program)
+    cache.clear(program)
+    assert not os.path.exists(os.path.dirname(cache.cache_path(program)))
+
+
+def test_deep_form_is_not_cached(tmp_path):
+    depth = 50_000
+    path = tmp_path / "deep.lsp"
+    path.write_text("(car (quote " + "(" * depth + "1" + ")" * depth + "))")
+    Interpreter().interpret_file(str(path))
+    assert not os.path.exists(cache.cache_path(str(path)))
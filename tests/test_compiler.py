@@ -0,0 +1,148 @@
+import pytest
+
+from pythonlisp.compiler import FREE, LOCAL, Compiler, Scope
+from pythonlisp.env import Env, Procedure
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.parser_ import Parser
+
+
+def compile_one(source: str, env: Env):
+    return Compiler(env).compile(Parser().parse(source)[0])
+
+
+def test_compile_atoms():
+    env = Env()
+    assert compile_one("42", env)(None) == 42
+    assert compile_one('"hi"', env)(None) == "hi"
+    assert compile_one("#t", env)(None) is True
+
+
+def test_compiled_lambda_is_procedure():
+    env = Env()
+    succ = compile_one("(lambda (x) (+ x 1))", env)(None)
+    assert isinstance(succ, Procedure)
+    assert succ(9) == 10
+
+
+def test_compile_is_done_once():
+    env = Env()
+    code = compile_one("(if (> x 1) (quote (1 2)) (* x 10))", env)
+    env.add("x", 2)
+    assert str(code(None)) == "(1 2)"
+    env.add("x", 1)
+    assert code(None) == 10
+
+
+def test_scope_addresses():
+    outer = Scope(["x", "y"], None, {"x"})
+    inner = Scope(["z"], outer)
+    assert inner.resolve("z") == (LOCAL, 1, False)
+    # captured variables are numbered in the order they are first used
+    assert inner.resolve("y") == (FREE, 0, False)
+    assert inner.resolve("x") == (FREE, 1, True)
+    assert inner.resolve("y") == (FREE, 0, False)
+    assert inner.resolve("car") is None
+    assert inner.declare("w") == 2
+    assert inner.resolve("w") == (LOCAL, 2, False)
+    assert inner.fetch[1]([None, ["cell"], 2]) == ["cell"]
+
+
+def test_frames_are_lists():
+    intp = Interpreter()
+    add = intp.interpret("(define add (lambda (x y) (+ x y))) add")
+    assert add.bind((1, 2)) == [None, 1, 2]
+    with pytest.raises(RuntimeError, match="expect 2 arguments"):
+        add(1)
+
+
+def test_set_outer_variable():
+    lisp = """
+    (define make-counter
+      (lambda (n) (lambda () (set! n (+ n 1)))))
+    (define counter (make-counter 0))
+    (define read (lambda (f) (f)))
+    (read counter)
+    (read counter)
+    counter
+    """
+    intp = Interpreter()
+    counter = intp.interpret(lisp)
+    # n is assigned by the closure, so the frame and closure share a cell
+    assert counter.env == [[2]]
+
+
+def test_closures_capture_only_free_variables():
+    intp = Interpreter()
+    intp.interpret(
+        """
+    (define make (lambda (n big) (let ((scratch (list big big))) (lambda (x) (+ x n)))))
+    (define pair (lambda (n) (list (lambda () (set! n (+ n 1))) (lambda () n))))
+    """
+    )
+    adder = intp.interpret("(make 5 (list 1 2 3))")
+    assert adder.env == [5]
+    assert adder(1) == 6
+    # both closures share the cell of n
+    bump, read = intp.interpret("(pair 0)")
+    bump()
+    bump()
+    assert read() == 2
+    assert bump.env[0] is read.env[0]
+
+
+@pytest.mark.parametrize("engine", ["compile", "tree"])
+def test_set_does_not_shadow(engine):
+    lisp = """
+    (define x 1)
+    (define bump (lambda (d) (set! x (+ x d))))
+    (bump 10)
+    (bump 5)
+    x
+    """
+    assert Interpreter(engine).interpret(lisp) == 16
+
+
+def test_internal_define():
+    lisp = """
+    (define f (lambda (x) (g (define y (* x 2)) y)))
+    (define g (lambda (a b) b))
+    (f 21)
+    """
+    assert Interpreter().interpret(lisp) == 42
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_internal_define_forward_references(engine):
+    lisp = """
+    (define f
+      (lambda () (begin (define g (lambda () (h))) (define h (lambda () 1)) (g))))
+    (define parity
+      (lambda (n)
+        (begin
+          (define even? (lambda (n) (if (= n 0) #t (odd? (- n 1)))))
+          (define odd? (lambda (n) (if (= n 0) #f (even? (- n 1)))))
+          (list (even? n) (odd? n)))))
+    (list (f) (parity 7))
+    """
+    assert str(Interpreter(engine).interpret(lisp)) == "(1 (#f #t))"
+
+
+@pytest.mark.parametrize("engine", ["compile", "tree"])
+def test_engines_agree(engine):
+    lisp = """
+    (define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+    (define twice (lambda (x) (* 2 x)))
+    (define repeat (lambda (f) (lambda (x) (f (f x)))))
+    (list (fib 15) ((repeat twice) 10) (map twice (list 1 2 3)))
+    """
+    assert str(Interpreter(engine).interpret(lisp)) == "(610 40 (2 4 6))"
+
+
+def test_unknown_symbol():
+    with pytest.raises(RuntimeError, match="symbol 'nope' not found"):
+        Interpreter().interpret("(+ nope 1)")
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Interpreter("jit")
@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from pythonlisp import image
+from pythonlisp.interpreter import ENGINES, Interpreter
+
+LIBRARY = """
+(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+(define make-adder (lambda (n) (lambda (x) (+ x n))))
+(define add10 (make-adder 10))
+(define scale 2)
+(define scaled (lambda (x) (* x scale)))
+(define-memo slow-square (lambda (x) (* x x)))
+(define data (quote (1 "two" (3 . 4))))
+(define first car)
+(define make-list list)
+(define v (numvector 1 2 3))
+"""
+
+
+@pytest.fixture(params=ENGINES)
+def saved(request, tmp_path):
+    interpreter = Interpreter(request.param)
+    interpreter.interpret(LIBRARY)
+    interpreter.interpret("(slow-square 3)")
+    path = str(tmp_path / "lib.img")
+    assert image.save(interpreter, path) == 10
+    return request.param, path
+
+
+def test_image_restores_globals(saved):
+    engine, path = saved
+    interpreter = Interpreter(engine)
+    assert image.load(interpreter, path) == 10
+    assert interpreter.interpret("(fib 15)") == 610
+    assert interpreter.interpret("(add10 5)") == 15
+    assert str(interpreter.interpret("data")) == '(1 "two" (3 . 4))'
+    assert interpreter.interpret("(first (make-list 7 8))") == 7
+    assert interpreter.interpret("(vdot v v)") == 14.0
+    assert interpreter.interpret("(slow-square 3)") == 9
+    assert str(interpreter.interpret("(memo-stats slow-square)")) == "(1 1 1 1024)"
+
+
+def test_loaded_procedures_see_later_definitions(saved):
+    engine, path = saved
+    interpreter = Interpreter(engine)
+    image.load(interpreter, path)
+    interpreter.interpret("(set! scale 3)")
+    assert interpreter.interpret("(scaled 5)") == 15
+
+
+def test_image_version_is_checked(saved, monkeypatch):
+    _, path = saved
+    monkeypatch.setattr(image, "cache_tag", lambda: "pythonlisp-other")
+    with pytest.raises(image.ImageError, match="was saved by"):
+        image.load(Interpreter(), path)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_loaded_procedures_run_on_the_loading_engine(engine, tmp_path):
+    interpreter = Interpreter(engine)
+    interpreter.interpret(
+        "(define count (lambda (n) (if (= n 0) 0 (+ 1 (count (- n 1))))))"
+    )
+    interpreter.interpret("(define add10 ((lambda (n) (lambda (x) (+ x n))) 10))")
+    path = str(tmp_path / "lib.img")
+    image.save(interpreter, path)
+    loaded = Interpreter(engine)
+    image.load(loaded, path)
+    assert type(loaded.env.env["count"]) is type(interpreter.env.env["count"])
+    assert loaded.interpret("(add10 5)") == 15
+    if engine == "machine":
+        # as deep as before saving
+        assert loaded.interpret("(count 5000)") == 5000
+
+
+def test_failed_save_keeps_the_old_image(saved):
+    engine, path = saved
+    size = os.path.getsize(path)
+    interpreter = Interpreter(engine)
+    # ports cannot be saved
+    interpreter.interpret(f'(define port (open-input-file "{path}"))')
+    with pytest.raises(image.ImageError, match="cannot save image"):
+        image.save(interpreter, path)
+    assert os.path.getsize(path) == size
+    assert os.listdir(os.path.dirname(path)) == ["lib.img"]
+    assert image.load(Interpreter(engine), path) == 10
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_image_restores_macros(engine, tmp_path):
+    interpreter = Interpreter(engine)
+    interpreter.interpret(
+        "(define-macro (twice e) (quasiquote (begin (unquote e) (unquote e))))"
+    )
+    interpreter.interpret("(define n 0)")
+    path = str(tmp_path / "lib.img")
+    image.save(interpreter, path)
+    loaded = Interpreter(engine)
+    image.load(loaded, path)
+    loaded.interpret("(twice (set! n (+ n 1)))")
+    assert loaded.interpret("n") == 2
+    # the builtin macros are not saved
+    assert loaded.interpret("(let ((x 1)) x)") == 1
+
+
+@pytest.mark.parametrize("saving", ENGINES)
+@pytest.mark.parametrize("loading", ENGINES)
+def test_shared_variables_stay_shared(saving, loading, tmp_path):
+    interpreter = Interpreter(saving)
+    interpreter.interpret(
+        """
+        (define make
+          (lambda ()
+            (let ((n 0)) (list (lambda () (set! n (+ n 1))) (lambda () n)))))
+        (define counter (make))
+        (define bump (car counter))
+        (define read (car (cdr counter)))
+        (bump)
+        (bump)
+        """
+    )
+    path = str(tmp_path / "lib.img")
+    for _ in range(2):
+        image.save(interpreter, path)
+        interpreter = Interpreter(loading)
+        image.load(interpreter, path)
+        interpreter.interpret("(bump)")
+    assert interpreter.interpret("(read)") == 4
@@ -1,3 +1,9 @@
+import math
+import mmap
+import tracemalloc
+
+import pytest
+
 from pythonlisp.interpreter import Env, FunctionDef, Interpreter
 
 
@@ -23,3 +29,120 @@ def test_factorial():
 
     intp = Interpreter()
     assert intp.interpret(lisp) == 3628800
+
+
+@pytest.mark.parametrize("engine", ["compile", "tree"])
+def test_tail_call_in_constant_stack(engine):
+    lisp = """
+    (define loop (lambda (i acc) (if (= i 0) acc (loop (- i 1) (+ acc 1)))))
+    (loop 5000 0)
+    """
+    assert Interpreter(engine).interpret(lisp) == 5000
+
+
+def test_tail_loop_million_iterations():
+    lisp = """
+    (define loop (lambda (i acc) (if (= i 0) acc (loop (- i 1) (+ acc i)))))
+    (loop 1000000 0)
+    """
+    assert Interpreter().interpret(lisp) == 500000500000
+
+
+def test_mutual_tail_calls():
+    lisp = """
+    (define even? (lambda (n) (if (= n 0) #t (odd? (- n 1)))))
+    (define odd? (lambda (n) (if (= n 0) #f (even? (- n 1)))))
+    (list (even? 10001) (odd? 10001))
+    """
+    assert str(Interpreter().interpret(lisp)) == "(#f #t)"
+
+
+def test_sample_fact_iter():
+    with open("sample.lsp") as f:
+        program = f.read()
+    intp = Interpreter()
+    intp.interpret(program)
+    assert intp.interpret("(fact 1000)") == math.factorial(1000)
+
+
+@pytest.mark.parametrize("engine", ["compile", "tree"])
+def test_list_primitives(engine):
+    intp = Interpreter(engine)
+    assert str(intp.interpret("(cdr (quote (1 2 3 4 5)))")) == "(2 3 4 5)"
+    assert str(intp.interpret("(cons 0 (list 1 2))")) == "(0 1 2)"
+    assert str(intp.interpret("(cons 1 2)")) == "(1 . 2)"
+    assert str(intp.interpret("(quote (a (b #t) . c))")) == "(a (b #t) . c)"
+    assert intp.interpret("(length (quote (1 2 3)))") == 3
+    assert intp.interpret("(null? (cdr (list 1)))") is True
+    assert intp.interpret("(+ 1 (car (quote (41))))") == 42
+    assert intp.interpret("(number? (car (quote (1))))") is True
+    assert intp.interpret("(reduce + (map (lambda (x) (* x x)) (list 1 2 3)))") == 14
+    assert intp.interpret("(equal? (list 1 (list 2)) (quote (1 (2))))") is True
+
+
+def test_cdr_shares_structure():
+    intp = Interpreter()
+    intp.interpret("(define xs (list 1 2 3))")
+    assert intp.interpret("(eq? (cdr xs) (cdr xs))") is True
+    assert intp.interpret("(eq? (cdr (cons 0 xs)) xs)") is True
+
+
+def test_recursive_sum_100k():
+    lisp = """
+    (define build (lambda (n acc) (if (= n 0) acc (build (- n 1) (cons n acc)))))
+    (define sum (lambda (xs acc) (if (null? xs) acc (sum (cdr xs) (+ acc (car xs))))))
+    (sum (build 100000 (quote ())) 0)
+    """
+    assert Interpreter().interpret(lisp) == 5000050000
+
+
+def test_interpret_stream_chunks():
+    chunks = [
+        "(define fa",
+        "ct (lambda (n) (if (= n 0) 1\n (* n (fa",
+        "ct (- n 1))))))",
+        "\n(fact 10)",
+    ]
+    assert Interpreter().interpret_stream(chunks) == 3628800
+
+
+def test_interpret_stream_files(tmp_path):
+    path = tmp_path / "prog.lsp"
+    path.write_text('(define s "λ string")\n(define n 41)\n(+ n 1)\n')
+    with open(path) as f:
+        assert Interpreter().interpret_stream(f) == 42
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        intp = Interpreter()
+        assert intp.interpret_stream(m) == 42
+        assert intp.interpret("s") == "λ string"
+
+
+def test_interpret_stream_evaluates_forms_as_they_arrive():
+    seen = []
+
+    def chunks():
+        for i in range(3):
+            seen.append(i)
+            yield f"(define x{i} {i})\n"
+            assert intp.interpret(f"x{i}") == i
+
+    intp = Interpreter()
+    intp.interpret_stream(chunks())
+    assert seen == [0, 1, 2]
+
+
+def test_interpret_stream_memory_is_bounded():
+    form = "(define x (+ 1 (* 2 3)))\n"
+
+    def chunks(count):
+        for _ in range(count):
+            yield form * 50
+
+    def peak(count):
+        tracemalloc.start()
+        Interpreter().interpret_stream(chunks(count))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    assert peak(100) < peak(10) * 1.5
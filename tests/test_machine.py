@@ -0,0 +1,63 @@
+import sys
+
+import pytest
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.machine import MachineFunctionDef
+
+DEPTH = """
+(define nest (lambda (n) (if (= n 0) (quote ()) (cons (nest (- n 1)) (quote ())))))
+(define depth (lambda (x) (if (null? x) 0 (+ 1 (depth (car x))))))
+"""
+
+
+def test_deep_non_tail_recursion():
+    interpreter = Interpreter("machine")
+    interpreter.interpret(
+        "(define fact (lambda (n) (if (= n 0) 1 (* n (fact (- n 1))))))"
+    )
+    fact = interpreter.interpret("(fact 3000)")
+    assert fact == interpreter.interpret("(fact 2999)") * 3000
+    interpreter.interpret(DEPTH)
+    n = sys.getrecursionlimit() * 20
+    assert interpreter.interpret(f"(depth (nest {n}))") == n
+
+
+def test_tree_engine_is_limited_by_the_python_stack():
+    interpreter = Interpreter("tree")
+    interpreter.interpret(DEPTH)
+    with pytest.raises(RecursionError):
+        interpreter.interpret("(nest 5000)")
+
+
+def test_tail_calls_and_python_callers():
+    interpreter = Interpreter("machine")
+    interpreter.interpret(
+        "(define loop (lambda (i acc) (if (= i 0) acc (loop (- i 1) (+ acc i)))))"
+    )
+    assert interpreter.interpret("(loop 100000 0)") == 5000050000
+    square = interpreter.interpret("(lambda (x) (* x x))")
+    assert type(square) is MachineFunctionDef
+    assert square(7) == 49
+    result = interpreter.interpret("(map (lambda (x) (loop x 0)) (list 1 2 3))")
+    assert str(result) == "(1 3 6)"
+
+
+def test_errors_match_the_tree_engine():
+    source = "(define f (lambda (n) (if (= n 0) (g) (+ 1 (f (- n 1))))))\n(f 3)"
+    messages = []
+    for engine in ("tree", "machine"):
+        with pytest.raises(RuntimeError) as e:
+            Interpreter(engine).interpret(source)
+        messages.append(str(e.value))
+    assert messages[0] == messages[1]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_if_without_alternative(engine):
+    interpreter = Interpreter(engine)
+    assert interpreter.interpret("(if #t 1)") == 1
+    assert interpreter.interpret("(if #f 1)") is None
+    interpreter.interpret("(define f (lambda (n) (if (= n 0) (+ n 2))))")
+    assert interpreter.interpret("(f 1)") is None
+    assert interpreter.interpret("(f 0)") == 2
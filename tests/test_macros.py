@@ -0,0 +1,78 @@
+import pytest
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.macros import Expander
+from pythonlisp.parser_ import Parser
+
+SWAP = """
+(define-macro (swap! a b)
+  (quasiquote
+    (let ((tmp (unquote a))) (set! (unquote a) (unquote b)) (set! (unquote b) tmp))))
+"""
+
+
+@pytest.fixture(params=ENGINES)
+def interpreter(request):
+    return Interpreter(request.param)
+
+
+def test_derived_forms(interpreter):
+    interpreter.interpret(
+        """
+(define classify
+  (lambda (n)
+    (let* ((a (* n 2)) (b (+ a 1)))
+      (cond ((> a 10) (quote big)) ((= a 4) (quote four)) (else b)))))
+(define sum
+  (lambda (n) (let loop ((i n) (acc 0)) (if (= i 0) acc (loop (- i 1) (+ acc i))))))"""
+    )
+    result = interpreter.interpret(
+        "(list (classify 1) (classify 2) (classify 9) (sum 100000)"
+        " (and 1 2 3) (and 1 #f 3) (or #f #f 7) (or) (begin 1 2))"
+    )
+    assert str(result) == "(3 four big 5000050000 3 #f 7 #f 2)"
+
+
+def test_define_macro_and_quasiquote(interpreter):
+    interpreter.interpret(SWAP)
+    interpreter.interpret(
+        "(defmacro unless (test . body)"
+        " (quasiquote (if (unquote test) #f (begin (unquote-splicing body)))))"
+    )
+    interpreter.interpret("(define x 1) (define y 2) (swap! x y)")
+    assert str(interpreter.interpret("(list x y)")) == "(2 1)"
+    assert interpreter.interpret("(unless #f 1 2)") == 2
+    built = interpreter.interpret(
+        "(quasiquote (1 (unquote (+ 1 1)) (unquote-splicing (list 3 4)) . 5))"
+    )
+    assert str(built) == "(1 2 3 4 . 5)"
+
+
+def test_uses_are_expanded_once():
+    calls = []
+    interpreter = Interpreter()
+    interpreter.interpret("(define-macro (twice x) (quasiquote (* 2 (unquote x))))")
+    twice = interpreter.expander.macros["twice"]
+    interpreter.expander.macros["twice"] = lambda lst: calls.append(1) or twice(lst)
+    interpreter.interpret("(define f (lambda (n) (twice n)))")
+    assert interpreter.interpret("(list (f 1) (f 2) (f 3))").car == 2
+    assert calls == [1]
+
+
+def test_expansion_keeps_positions():
+    expander = Expander(Interpreter().evaluate)
+    form = Parser().parse("(let ((a 1))\n  (g a))")[0]
+    expanded = expander.expand(form)
+    # ((lambda (a) (g a)) 1): the body is the parsed list, placed as before
+    assert expanded[0][2] is form[2]
+    assert str(expanded.offset) == "Offset(lineno=1, column=1)"
+    message = "procedure g in Offset\\(lineno=2, column=4\\)"
+    with pytest.raises(RuntimeError, match=message):
+        Interpreter("tree").interpret("(let ((a 1))\n  (g a))")
+
+
+def test_bad_macro_use():
+    interpreter = Interpreter()
+    interpreter.interpret(SWAP)
+    with pytest.raises(RuntimeError, match="macro swap! .* expects 2 arguments"):
+        interpreter.interpret("(swap! x)")
@@ -0,0 +1,65 @@
+import pytest
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.memo import Memoized
+from pythonlisp.parser_ import NIL, Pair
+
+FIB = "(lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2)))))"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_define_memo_makes_fib_linear(engine):
+    interpreter = Interpreter(engine)
+    interpreter.interpret(f"(define-memo fib {FIB})")
+    assert interpreter.interpret("(fib 30)") == 832040
+    # one miss per n, every other call is a hit
+    assert str(interpreter.interpret("(memo-stats fib)")) == "(28 31 31 1024)"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_memoize_primitive(engine):
+    interpreter = Interpreter(engine)
+    interpreter.interpret(f"(define fib (memoize {FIB} 5))")
+    assert interpreter.interpret("(fib 40)") == 102334155
+    assert str(interpreter.interpret("(memo-stats fib)")) == "(38 41 5 5)"
+
+
+def test_lru_eviction():
+    calls = []
+    square = Memoized(lambda x: calls.append(x) or x * x, maxsize=2)
+    for x in (1, 2, 1, 3, 2, 1):
+        square(x)
+    # 2 is evicted by 3 since 1 was used after it, then 1 by 2
+    assert calls == [1, 2, 3, 2, 1]
+    assert (square.hits, square.misses) == (1, 5)
+    assert list(square.cache) == [((int, 2),), ((int, 1),)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_equal_values_of_other_types_are_other_keys(engine):
+    interpreter = Interpreter(engine)
+    interpreter.interpret("(define-memo ident (lambda (x) x))")
+    result = interpreter.interpret("(list (ident 1) (ident #t) (ident 1.0))")
+    assert [(type(x), x) for x in result] == [(int, 1), (bool, True), (float, 1.0)]
+    interpreter.interpret("(define-memo bool? (lambda (x) (boolean? x)))")
+    assert str(interpreter.interpret("(list (bool? 0) (bool? #f))")) == "(#f #t)"
+    result = interpreter.interpret("(list (ident (list 1 0)) (ident (list #t #f)))")
+    assert str(result) == "((1 0) (#t #f))"
+
+
+def test_lists_are_keys_by_structure():
+    interpreter = Interpreter()
+    interpreter.interpret("(define-memo total (lambda (xs) (reduce + xs)))")
+    assert interpreter.interpret("(total (list 1 2 3))") == 6
+    assert interpreter.interpret("(total (quote (1 2 3)))") == 6
+    assert str(interpreter.interpret("(memo-stats total)")) == "(1 1 1 1024)"
+    assert hash(Pair.from_iterable([1, 2])) == hash(Pair(1, Pair(2, NIL)))
+
+
+def test_bad_arguments():
+    with pytest.raises(RuntimeError, match="expect procedure"):
+        Interpreter().interpret("(memoize 1)")
+    with pytest.raises(RuntimeError, match="positive cache size"):
+        Interpreter().interpret("(define-memo f (lambda (x) x) 0)")
+    with pytest.raises(RuntimeError, match="memoized procedure"):
+        Interpreter().interpret("(memo-stats car)")
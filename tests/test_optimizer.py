@@ -0,0 +1,61 @@
+import pickle
+
+import pytest
+
+from pythonlisp.env import Env
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.optimizer import Inlined, Optimizer
+from pythonlisp.parser_ import Number, Parser, Symbol
+
+
+def optimize(source: str, optimizer=None):
+    optimizer = optimizer or Optimizer(Env().env)
+    return optimizer.optimize(Parser().parse(source)[0])
+
+
+def test_constant_folding_and_dead_branches():
+    assert optimize("(* 2 (+ 3 4))") == Number(14)
+    assert optimize("(if (< 1 2) a b)") is Symbol("a")
+    assert optimize("(if #f a (- 10 3))") == Number(7)
+    # quoted lists are data, and errors are left for run time
+    assert optimize("(quote (+ 1 2))")[1][0] is Symbol("+")
+    assert isinstance(optimize("(/ 1 0)")[0], Inlined)
+
+
+def test_shadowed_and_assigned_builtins_are_kept():
+    assert optimize("(lambda (+) (+ 1 2))")[2][0] is Symbol("+")
+    optimizer = Optimizer(Env().env)
+    optimize("(define f (lambda () (set! - +)))", optimizer)
+    assert optimize("(- 3 1)", optimizer)[0] is Symbol("-")
+    assert isinstance(optimize("(+ x 1)", optimizer)[0], Inlined)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_optimized_programs_behave_the_same(engine):
+    interpreter = Interpreter(engine, optimize=True)
+    interpreter.interpret(
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))"
+    )
+    assert interpreter.interpret("(fib 15)") == 610
+    assert interpreter.interpret("(if (> 2 1) (* 2 (+ 3 4)) (undefined))") == 14
+    interpreter.interpret("(define + -)")
+    assert interpreter.interpret("(+ 5 2)") == 3
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_errors_keep_their_positions(engine):
+    source = "(define f (lambda (x) (if #t (+ 1 (g x)) 0)))\n(f 1)"
+    messages = []
+    for optimize_ in (False, True):
+        with pytest.raises(RuntimeError) as e:
+            Interpreter(engine, optimize=optimize_).interpret(source)
+        messages.append(str(e.value))
+    assert messages[0] == messages[1]
+    assert "lineno=1, column=36" in messages[1]
+
+
+def test_inlined_procedures_pickle():
+    interpreter = Interpreter(optimize=True)
+    interpreter.interpret("(define double (lambda (x) (* x 2)))")
+    double = pickle.loads(pickle.dumps(interpreter.interpret("double")))
+    assert double(21) == 42
@@ -0,0 +1,59 @@
+import pickle
+
+import pytest
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.parallel import pmap, split
+from pythonlisp.parser_ import Parser
+from pythonlisp.pickling import free_variables
+
+PROGRAM = """
+(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+(define make-adder (lambda (n) (lambda (x) (+ x (fib n)))))
+(define add55 (make-adder 10))
+"""
+
+
+@pytest.fixture(params=ENGINES)
+def interpreter(request):
+    interpreter = Interpreter(request.param)
+    interpreter.interpret(PROGRAM)
+    return interpreter
+
+
+def test_free_variables():
+    (lst,) = Parser().parse("(lambda (x) (f x (quote (y)) (lambda (z) (g z x))))")
+    assert sorted(free_variables(lst)) == ["f", "g"]
+
+
+def test_procedures_pickle_with_captured_values(interpreter):
+    add55 = pickle.loads(pickle.dumps(interpreter.interpret("add55")))
+    assert add55(1) == 56
+    assert add55.name == "lambda@3:32"
+    fib = pickle.loads(pickle.dumps(interpreter.interpret("fib")))
+    # the recursive reference is the rebuilt procedure itself
+    assert fib.env[0] is fib
+    assert fib(15) == 610
+
+
+def test_pmap_matches_map(interpreter):
+    add55 = interpreter.interpret("add55")
+    numbers = " ".join(map(str, range(100)))
+    expected = interpreter.interpret(f"(map add55 (quote ({numbers})))")
+    assert str(pmap(add55, range(100), workers=2, min_items=1)) == str(expected)
+    assert str(interpreter.interpret("(pmap fib (list 1 2 3 4 5))")) == "(1 1 2 3 5)"
+
+
+def test_pmap_falls_back_for_unpicklable_procedures():
+    list_ = Interpreter().interpret("list")
+    assert str(pmap(list_, [1, 2], workers=2, min_items=1)) == "((1) (2))"
+
+
+def test_pmap_reraises_worker_errors(interpreter):
+    car = interpreter.interpret("(lambda (x) (car x))")
+    with pytest.raises(RuntimeError, match="expect pair"):
+        pmap(car, range(10), workers=2, min_items=1)
+
+
+def test_split_keeps_order():
+    assert split(list(range(7)), 3) == [[0, 1, 2], [3, 4], [5, 6]]
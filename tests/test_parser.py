@@ -1,6 +1,10 @@
+import re
+
 import pytest
 
-from pythonlisp.parser_ import Boolean, List, Number, Parser, ParserError, Symbol
+from pythonlisp.interpreter import Interpreter
+from pythonlisp.parser_ import (NIL, Boolean, Number, Pair, Parser, ParserError,
+                                RecursiveParser, Symbol, datum)
 from pythonlisp.tokenizer import Offset
 
 
@@ -8,32 +12,19 @@ from pythonlisp.tokenizer import Offset
     "input,expexted",
     [
         ("", []),
-        ("x", [Symbol("x", Offset(1, 1))]),
+        ("x", [Symbol("x")]),
         ("()", [[]]),
-        (
-            "(define x 100)",
-            [
-                [
-                    Symbol("define", Offset(1, 2)),
-                    Symbol("x", Offset(1, 9)),
-                    Number(100, Offset(1, 11)),
-                ]
-            ],
-        ),
+        ("(define x 100)", [[Symbol("define"), Symbol("x"), Number(100)]]),
         (
             "(define f (lambda (x y) (+ x y)))",
             [
                 [
-                    Symbol("define", Offset(1, 2)),
-                    Symbol("f", Offset(1, 9)),
+                    Symbol("define"),
+                    Symbol("f"),
                     [
-                        Symbol("lambda", Offset(1, 12)),
-                        [Symbol("x", Offset(1, 20)), Symbol("y", Offset(1, 22))],
-                        [
-                            Symbol("+", Offset(1, 26)),
-                            Symbol("x", Offset(1, 28)),
-                            Symbol("y", Offset(1, 30)),
-                        ],
+                        Symbol("lambda"),
+                        [Symbol("x"), Symbol("y")],
+                        [Symbol("+"), Symbol("x"), Symbol("y")],
                     ],
                 ]
             ],
@@ -44,21 +35,9 @@ from pythonlisp.tokenizer import Offset
 (define y 10)
 (define b #t)""",
             [
-                [
-                    Symbol("define", Offset(2, 2)),
-                    Symbol("x", Offset(2, 9)),
-                    Number(10, Offset(2, 11)),
-                ],
-                [
-                    Symbol("define", Offset(3, 2)),
-                    Symbol("y", Offset(3, 9)),
-                    Number(10, Offset(3, 11)),
-                ],
-                [
-                    Symbol("define", Offset(4, 2)),
-                    Symbol("b", Offset(4, 9)),
-                    Boolean(True, Offset(4, 11)),
-                ],
+                [Symbol("define"), Symbol("x"), Number(10)],
+                [Symbol("define"), Symbol("y"), Number(10)],
+                [Symbol("define"), Symbol("b"), Boolean(True)],
             ],
         ),
     ],
@@ -68,6 +47,36 @@ def test_parser_success(input, expexted):
     assert parser.parse(input) == expexted
 
 
+def test_parser_positions():
+    (lst,) = Parser().parse("(define f\n  (lambda (x y) (+ x y)))")
+    assert lst.offset == Offset(1, 1)
+    assert lst.child_offset(1) == Offset(1, 9)
+    assert lst.child_offset(2) == Offset(2, 3)
+    assert lst[2][1].child_offset(1) == Offset(2, 14)
+    (lst,) = Parser().parse_stream(["(define x", " 100)"])
+    assert lst.child_offset(2) == Offset(1, 11)
+
+
+def test_symbols_are_interned():
+    (lst,) = Parser().parse("(f x x)")
+    assert lst[1] is lst[2] is Symbol("x")
+    assert not hasattr(lst[1], "__dict__")
+    assert not hasattr(Number(1), "__dict__")
+
+
+def test_unused_symbols_are_dropped():
+    Parser().parse("(only-parsed-here 1)")
+    assert "only-parsed-here" not in Symbol.table
+    assert "define" in Symbol.table
+
+
+def test_errors_report_positions():
+    with pytest.raises(RuntimeError, match=r"Offset\(lineno=2, column=2\)"):
+        Interpreter().interpret("(define x 1)\n(nope x)")
+    with pytest.raises(RuntimeError, match=r"Offset\(lineno=1, column=9\)"):
+        Interpreter(engine="tree").interpret("(define 1 2)")
+
+
 def test_parser_unexpected_rightpar():
     with pytest.raises(ParserError):
         parser = Parser()
@@ -78,3 +87,46 @@ def test_parser_unclosed_list():
     with pytest.raises(ParserError):
         parser = Parser()
         parser.parse("(define x 100")
+
+
+def test_datum():
+    parser = Parser()
+    data = datum(parser.parse('(1 "s" #f (x 2.5) . y)')[0])
+    assert isinstance(data, Pair)
+    assert data.car == 1
+    assert list(data)[:3] == [1, "s", False]
+    assert str(data) == '(1 "s" #f (x 2.5) . y)'
+    assert datum(parser.parse("()")[0]) is NIL
+
+
+def test_pair_equality_and_length():
+    xs = Pair.from_iterable([1, 2, 3])
+    assert xs == Pair(1, Pair(2, Pair(3, NIL)))
+    assert xs != Pair.from_iterable([1, 2])
+    assert len(xs) == 3
+    assert len(NIL) == 0
+
+
+@pytest.mark.parametrize(
+    "source",
+    [")", "(a))", "(define x 100", "(f (g 1)\n (h", "(", "(())) x"],
+)
+def test_parser_errors_match_recursive_parser(source):
+    with pytest.raises(ParserError) as expected:
+        RecursiveParser().parse(source)
+    with pytest.raises(ParserError, match=re.escape(str(expected.value))):
+        Parser().parse(source)
+
+
+def test_parser_deep_nesting():
+    depth = 100_000
+    (tree,) = Parser().parse("(" * depth + "x" + ")" * depth)
+    for _ in range(depth - 1):
+        (tree,) = tree
+    assert tree == [Symbol("x")]
+
+
+def test_deeply_nested_quote():
+    depth = 50_000
+    lisp = "(car (quote " + "(" * depth + "1" + ")" * depth + "))"
+    assert isinstance(Interpreter().interpret(lisp), Pair)
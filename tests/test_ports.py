@@ -0,0 +1,68 @@
+import tracemalloc
+
+import pytest
+
+from pythonlisp import ports
+from pythonlisp.interpreter import ENGINES, Interpreter
+
+
+@pytest.fixture(params=ENGINES)
+def interpreter(request):
+    return Interpreter(request.param)
+
+
+def test_read_lines_and_forms(interpreter, tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text('first line\n(1 "two" (three))\nlast')
+    interpreter.interpret(f'(define p (open-input-file "{path}"))')
+    assert interpreter.interpret("(read-line p)") == "first line"
+    assert str(interpreter.interpret("(read p)")) == '(1 "two" (three))'
+    assert interpreter.interpret("(read p)").val == "last"
+    assert interpreter.interpret("(eof-object? (read p))") is True
+    interpreter.interpret("(close-port p)")
+    with pytest.raises(RuntimeError, match="closed"):
+        interpreter.interpret("(read-line p)")
+
+
+def test_write_to_an_output_file(interpreter, tmp_path):
+    path = tmp_path / "out.txt"
+    interpreter.interpret(
+        f"""
+(define out (open-output-file "{path}"))
+(write (list 1 "a \\"b\\"" (quote c) #f) out)
+(newline out)
+(display "plain" out)
+(close-port out)"""
+    )
+    assert path.read_text() == '(1 "a \\"b\\"" c #f)\nplain'
+    assert interpreter.interpret(f'(read-file "{path}")') == path.read_text()
+
+
+def test_large_files_are_read_through_a_memory_map(tmp_path, monkeypatch):
+    path = tmp_path / "big.txt"
+    path.write_text("λ\n" * 1000)
+    monkeypatch.setattr(ports, "MMAP_THRESHOLD", 100)
+    assert ports.read_file(str(path)) == "λ\n" * 1000
+    with pytest.raises(RuntimeError, match="cannot read"):
+        ports.read_file(str(tmp_path / "missing.txt"))
+
+
+def test_file_lines_run_in_constant_memory(interpreter, tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("".join(f"{i} {'x' * 90}\n" for i in range(5000)))
+    # the stream is made inside count-lines, so its head is not kept
+    interpreter.interpret(
+        """
+(define count
+  (lambda (s n chars)
+    (if (stream-null? s)
+        (list n chars)
+        (count (stream-cdr s) (+ n 1) (+ chars (length (stream-car s)))))))
+(define count-lines (lambda (path) (count (file-lines path) 0 0)))"""
+    )
+    tracemalloc.start()
+    result = interpreter.interpret(f'(count-lines "{path}")')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert list(result) == [5000, path.stat().st_size - 5000]
+    assert peak < 1_000_000
@@ -0,0 +1,74 @@
+import io
+from itertools import count
+
+import pytest
+
+from pythonlisp.compiler import CompiledFunctionDef
+from pythonlisp.env import FunctionDef
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.profiler import Profiler, ProfiledCall
+
+PROGRAM = """
+(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+(define loop (lambda (i acc) (if (= i 0) acc (loop (- i 1) (+ acc (fib 3))))))
+(loop 10 0)
+(map (lambda (x) (* x x)) (list 1 2 3))
+"""
+
+
+def profile(engine):
+    ticks = count()
+    profiler = Profiler(clock=lambda: next(ticks))
+    Interpreter(engine, profiler).interpret(PROGRAM)
+    return profiler
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_calls_per_procedure(engine):
+    profiler = profile(engine)
+    assert {name: stats.calls for name, stats in profiler.stats.items()} == {
+        "fib": 50,
+        "loop": 11,
+        "lambda@5:6": 3,
+    }
+    fib, loop = profiler.stats["fib"], profiler.stats["loop"]
+    # the tail calls of loop are one entry, fib is called from inside it
+    assert loop.inclusive == loop.exclusive + fib.exclusive
+    assert fib.inclusive == fib.exclusive
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_collapsed_stacks(engine):
+    profiler = profile(engine)
+    out = io.StringIO()
+    profiler.write_collapsed(out)
+    stacks = dict(line.rsplit(" ", 1) for line in out.getvalue().splitlines())
+    assert set(stacks) == {
+        "lambda@5:6",
+        "loop",
+        "loop;fib",
+        "loop;fib;fib",
+        "loop;fib;fib;fib",
+    }
+    assert all(int(weight) > 0 for weight in stacks.values())
+    assert profiler.table().splitlines()[1].endswith("fib")
+
+
+def test_profiling_off_builds_plain_procedures():
+    interpreter = Interpreter()
+    fact = interpreter.interpret("(define f (lambda (x) x)) f")
+    assert type(fact) is CompiledFunctionDef
+    assert fact.name == "f"
+    tree = Interpreter("tree").interpret("(lambda (x) x)")
+    assert type(tree) is FunctionDef
+    assert tree.name == "lambda@1:1"
+    profiled = Interpreter(profiler=Profiler()).interpret("(lambda () 1)")
+    assert isinstance(profiled, ProfiledCall)
+
+
+def test_profile_survives_errors():
+    profiler = Profiler()
+    with pytest.raises(RuntimeError):
+        Interpreter(profiler=profiler).interpret("(define f (lambda () (nope))) (f)")
+    assert profiler.frames == []
+    assert profiler.stats["f"].calls == 1
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from pythonlisp.env import Env
+from pythonlisp.server import LIMIT, Server, parse_address
+
+
+async def request(reader, writer, source):
+    writer.write(source.encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def with_server(client):
+    server = Server()
+    listener = await server.start("127.0.0.1:0")
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        return await client(port)
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        server.close()
+
+
+def test_sessions_have_private_globals():
+    async def client(port):
+        a = await asyncio.open_connection("127.0.0.1", port)
+        b = await asyncio.open_connection("127.0.0.1", port)
+        assert await request(*a, "(define car 42) car") == {"ok": True, "value": "42"}
+        assert await request(*b, "(car (list 1 2))") == {"ok": True, "value": "1"}
+        reply = await request(*b, "(undefined-proc 1)")
+        assert not reply["ok"] and "undefined-proc" in reply["error"]
+        for _, writer in (a, b):
+            writer.close()
+
+    asyncio.run(with_server(client))
+    assert Env.builtins is not None and Env.builtins["car"] != 42
+
+
+def test_long_evaluation_does_not_block_other_sessions():
+    slow = "(define loop (lambda (i) (if (= i 0) 0 (loop (- i 1))))) (loop 300000)"
+
+    async def client(port):
+        a = await asyncio.open_connection("127.0.0.1", port)
+        b = await asyncio.open_connection("127.0.0.1", port)
+        slow_reply = asyncio.create_task(request(*a, slow))
+        await asyncio.sleep(0.01)
+        assert await request(*b, "(+ 1 2)") == {"ok": True, "value": "3"}
+        assert not slow_reply.done()
+        assert await slow_reply == {"ok": True, "value": "0"}
+        for _, writer in (a, b):
+            writer.close()
+
+    asyncio.run(with_server(client))
+
+
+def test_bad_lines_get_an_error_and_the_session_goes_on():
+    async def client(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        reply = await request(reader, writer, "(+ 1 2)" + " " * LIMIT)
+        assert not reply["ok"] and "longer than" in reply["error"]
+        writer.write(b'"\xff"\n')
+        reply = json.loads(await reader.readline())
+        assert not reply["ok"] and "utf-8" in reply["error"]
+        assert await request(reader, writer, "(+ 1 2)") == {"ok": True, "value": "3"}
+        writer.close()
+
+    asyncio.run(with_server(client))
+
+
+@pytest.mark.parametrize(
+    "address,expected",
+    [
+        ("7777", ("127.0.0.1", 7777, None)),
+        ("0.0.0.0:80", ("0.0.0.0", 80, None)),
+        ("unix:/tmp/lisp.sock", (None, None, "/tmp/lisp.sock")),
+    ],
+)
+def test_parse_address(address, expected):
+    assert parse_address(address) == expected
@@ -0,0 +1,103 @@
+from itertools import count
+
+import pytest
+
+from pythonlisp.env import Env
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.stats import PHASES, Stats
+
+PROGRAM = """
+(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+(define make-adder (lambda (n) (lambda (x) (+ x n))))
+((make-adder 1) (fib 5))
+"""
+
+
+def collect(engine, **kwargs):
+    stats = Stats(**kwargs)
+    assert Interpreter(engine, stats=stats).interpret(PROGRAM) == 6
+    return stats
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_counts(engine):
+    stats = collect(engine).as_dict()
+    assert stats["tokens"] == 69
+    # atoms and lists, (+ x n) is 4 nodes
+    assert stats["nodes"] == 50
+    # fib 15 times, make-adder and the adder once each
+    assert stats["calls"] == 17
+    assert stats["frames"] == 17
+    assert stats["peak_memory"] > 0
+
+
+@pytest.mark.parametrize("engine", ["tree", "machine"])
+def test_lookup_depths(engine):
+    stats = collect(engine).as_dict()
+    assert stats["lookup_misses"] == 0
+    # from the adder's frame n is one frame up, and + two
+    assert stats["lookup_depths"][2] == 1
+    assert stats["lookups"] == sum(stats["lookup_depths"].values())
+    assert 0 < stats["local_hit_rate"] < 1
+    assert stats["resolved"] == {"local": 0, "captured": 0, "global": 0}
+
+
+def test_compile_resolves_symbols():
+    stats = collect("compile").as_dict()
+    assert stats["resolved"] == {"local": 5, "captured": 1, "global": 9}
+    assert stats["lookups"] == 0
+    assert stats["local_hit_rate"] is None
+
+
+def test_phases_exclude_nested_phases():
+    ticks = count()
+    stats = Stats(clock=lambda: next(ticks))
+    with stats.phase("evaluate"):
+        with stats.phase("expand"):
+            pass
+    assert stats.phases == {"evaluate": 2, "expand": 1}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_every_phase_is_timed(engine):
+    stats = Stats()
+    Interpreter(engine, optimize=True, stats=stats).interpret(PROGRAM)
+    phases = stats.as_dict()["phases"]
+    assert list(phases) == list(PHASES)
+    timed = {name for name, seconds in phases.items() if seconds > 0}
+    expected = set(PHASES) if engine == "compile" else set(PHASES) - {"compile"}
+    assert timed == expected
+    assert "evaluate" in stats.table()
+
+
+def test_disabled_by_default():
+    interpreter = Interpreter("tree")
+    assert type(interpreter.env) is Env
+    assert interpreter.interpret(PROGRAM) == 6
+
+
+def test_file(tmp_path):
+    path = tmp_path / "program.lsp"
+    path.write_text(PROGRAM)
+    stats = Stats()
+    interpreter = Interpreter(stats=stats)
+    assert interpreter.interpret_file(str(path)) == 6
+    assert stats.tokens == 69
+    # nothing was cached, so every run is measured from the source
+    assert not (tmp_path / "__lispcache__").exists()
+
+
+def test_streams_are_timed_while_streaming():
+    def chunks():
+        yield "(define x 1)\n"
+        yield "(define y (+ x 1))\n"
+        raise RuntimeError("Error: connection lost")
+
+    stats = Stats()
+    interpreter = Interpreter(stats=stats)
+    with pytest.raises(RuntimeError, match="connection lost"):
+        interpreter.interpret_stream(chunks())
+    # both forms were tokenized and the first evaluated before the error
+    assert stats.tokens == 14
+    assert interpreter.interpret("x") == 1
+    assert stats.phases["tokenize"] > 0 and stats.phases["parse"] > 0
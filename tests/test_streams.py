@@ -0,0 +1,84 @@
+import tracemalloc
+
+import pytest
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.streams import Promise, force
+
+INTEGERS = """
+(define integers (lambda (n) (cons-stream n (integers (+ n 1)))))
+(define counter 0)
+"""
+
+
+@pytest.fixture(params=ENGINES)
+def interpreter(request):
+    interpreter = Interpreter(request.param)
+    interpreter.interpret(INTEGERS)
+    return interpreter
+
+
+def test_delay_is_forced_once(interpreter):
+    interpreter.interpret("(define p (delay (set! counter (+ counter 1))))")
+    assert interpreter.interpret("counter") == 0
+    interpreter.interpret("(force p)")
+    interpreter.interpret("(force p)")
+    assert interpreter.interpret("counter") == 1
+    assert interpreter.interpret("(force 5)") == 5
+    assert interpreter.interpret("(promise? p)") is True
+
+
+def test_pipeline_over_an_unbounded_stream(interpreter):
+    result = interpreter.interpret(
+        """
+(stream->list
+  (stream-take
+    (stream-map (lambda (x) (* x x))
+                (stream-filter (lambda (x) (= (mod x 3) 0)) (integers 1)))
+    5))"""
+    )
+    assert str(result) == "(9 36 81 144 225)"
+    assert str(interpreter.interpret("(stream->list (integers 0) 3)")) == "(0 1 2)"
+    assert interpreter.interpret("(stream-ref (integers 0) 10)") == 10
+    assert interpreter.interpret("(stream-null? (stream-take (integers 0) 0))")
+
+
+def test_long_streams_run_in_constant_stack(interpreter):
+    # a filter skipping 50k elements and a 50k long delay-force chain
+    found = interpreter.interpret(
+        "(stream-car (stream-filter (lambda (x) (= x 50000)) (integers 0)))"
+    )
+    assert found == 50000
+    interpreter.interpret(
+        """
+(define countdown
+  (lambda (n) (delay-force (if (= n 0) (delay 0) (countdown (- n 1))))))"""
+    )
+    assert interpreter.interpret("(force (countdown 50000))") == 0
+
+
+def test_stream_memory_stays_constant(interpreter):
+    # the stream is made inside sum-from, so no caller holds on to its head
+    # and the forced elements can be freed as the loop moves on
+    interpreter.interpret(
+        """
+(define sum-stream
+  (lambda (s n acc)
+    (if (= n 0) acc (sum-stream (stream-cdr s) (- n 1) (+ acc (stream-car s))))))
+(define sum-from (lambda (start n) (sum-stream (integers start) n 0)))"""
+    )
+    tracemalloc.start()
+    total = interpreter.interpret("(sum-from 0 20000)")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert total == 199990000
+    assert peak < 1_000_000
+
+
+def test_chained_promises_share_their_value():
+    calls = []
+    inner = Promise(lambda: calls.append(1) or 42)
+    outer = Promise(lambda: inner, chained=True)
+    assert force(outer) == 42
+    assert force(inner) == 42
+    assert calls == [1]
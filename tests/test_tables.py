@@ -0,0 +1,74 @@
+import pickle
+
+import pytest
+
+from pythonlisp.interpreter import ENGINES, Interpreter
+
+
+@pytest.fixture(params=ENGINES)
+def interpreter(request):
+    interpreter = Interpreter(request.param)
+    interpreter.interpret("(define t (make-hash-table))")
+    return interpreter
+
+
+def test_keys_are_compared_by_value(interpreter):
+    interpreter.interpret('(hash-set! t "a" 1)')
+    interpreter.interpret("(hash-set! t (quote b) 2)")
+    interpreter.interpret("(hash-set! t (list 1 2) 3)")
+    interpreter.interpret('(hash-set! t "a" 4)')
+    assert interpreter.interpret('(hash-ref t "a")') == 4
+    assert interpreter.interpret("(hash-ref t (quote b))") == 2
+    assert interpreter.interpret("(hash-ref t (cons 1 (list 2)))") == 3
+    assert interpreter.interpret("(hash-count t)") == 3
+    assert str(interpreter.interpret("t")) == '#hash(("a" . 4) (b . 2) ((1 2) . 3))'
+    assert str(interpreter.interpret("(hash-keys t)")) == '("a" b (1 2))'
+    pairs = interpreter.interpret("(hash->list t)")
+    assert str(pairs) == '(("a" . 4) (b . 2) ((1 2) . 3))'
+
+
+def test_defaults_and_removal(interpreter):
+    interpreter.interpret("(hash-set! t 1 (quote one))")
+    assert interpreter.interpret("(hash-ref t 2 0)") == 0
+    assert interpreter.interpret("(hash-has-key? t 1)") is True
+    interpreter.interpret("(hash-remove! t 1)")
+    interpreter.interpret("(hash-remove! t 1)")
+    assert interpreter.interpret("(hash-has-key? t 1)") is False
+    with pytest.raises(RuntimeError, match="key 1 not found"):
+        interpreter.interpret("(hash-ref t 1)")
+
+
+def test_word_count(interpreter):
+    interpreter.interpret(
+        """
+(define count-words
+  (lambda (words)
+    (if (null? words)
+        t
+        (begin
+          (hash-set! t (car words) (+ 1 (hash-ref t (car words) 0)))
+          (count-words (cdr words))))))"""
+    )
+    interpreter.interpret('(count-words (list "a" "b" "a" "c" "a"))')
+    assert str(interpreter.interpret("(hash-values t)")) == "(3 1 1)"
+
+
+@pytest.mark.parametrize(
+    "source,message",
+    [
+        ("(hash-set! t (vector 1) 1)", "cannot be a hash key"),
+        ("(hash-ref t (make-hash-table))", "cannot be a hash key"),
+        ("(hash-ref (list 1) 1)", "expect hash table"),
+    ],
+)
+def test_errors(interpreter, source, message):
+    with pytest.raises(RuntimeError, match=message):
+        interpreter.interpret(source)
+
+
+def test_tables_pickle():
+    interpreter = Interpreter()
+    interpreter.interpret("(define t (make-hash-table))")
+    interpreter.interpret('(hash-set! t "v" (vector 1 2))')
+    table = pickle.loads(pickle.dumps(interpreter.interpret("t")))
+    assert table == interpreter.interpret("t")
@@ -1,4 +1,7 @@
-from pythonlisp.tokenizer import Offset, Token, Tokenizer, TokenKind
+import pytest
+
+from pythonlisp.tokenizer import (CharTokenizer, Offset, Token, Tokenizer,
+                                  TokenKind)
 
 
 def test_tokenize():
@@ -53,3 +56,49 @@ s
         Token(TokenKind.EOF, "", None, Offset(lineno=8, column=1)),
     ]
     assert list(tokenizer.tokenize(test1)) == expect1
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "",
+        "  \n\t",
+        '(print "multi\nline" x)\n  (f 1e3 -2 .5 inf abc"d)',
+        '"escaped \\" quote" "\\\\"',
+        "\r1 ١٢ inf-x +",
+        "(a \"b\" . c)x\"y",
+    ],
+)
+def test_tokenize_matches_char_tokenizer(source):
+    assert list(Tokenizer().tokenize(source)) == list(CharTokenizer().tokenize(source))
+
+
+@pytest.mark.parametrize(
+    "source,position",
+    [('(print "oops)', "1:14"), ('(f\n "a\nbc', "3:3")],
+)
+def test_tokenize_unterminated_string(source, position):
+    for tokenizer in (Tokenizer(), CharTokenizer()):
+        message = f"unterminated string found in {position}"
+        with pytest.raises(RuntimeError, match=message):
+            list(tokenizer.tokenize(source))
+
+
+def test_offsets_are_computed_lazily():
+    tokens = list(Tokenizer().tokenize("(a\n  b)"))
+    assert tokens[0].lines.starts is None
+    assert tokens[2].offset == Offset(2, 3)
+    assert tokens[2].lines.starts == [0, 3]
+
+
+def test_tokenize_stream_matches_tokenize():
+    source = '(define s "a\nb \\" c")\n(f 12.5 -x)  "q"\n  (g)'
+    expected = list(Tokenizer().tokenize(source))
+    for size in (1, 2, 3, 7, len(source)):
+        chunks = [source[i : i + size] for i in range(0, len(source), size)]
+        assert list(Tokenizer().tokenize_stream(chunks)) == expected
+
+
+def test_tokenize_stream_unterminated_string():
+    with pytest.raises(RuntimeError, match="unterminated string found in 2:5"):
+        list(Tokenizer().tokenize_stream(['(f "a', "\nbc)", ")"]))
@@ -0,0 +1,87 @@
+import pytest
+
+from pythonlisp import vectors
+from pythonlisp.interpreter import ENGINES, Interpreter
+from pythonlisp.vectors import NumVector
+
+
+@pytest.fixture(params=["array", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "array":
+        monkeypatch.setattr(vectors, "np", None)
+    elif vectors.np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        ("(numvector 1 2 3)", "#f64(1.0 2.0 3.0)"),
+        ("(v+ (numvector 1 2) (numvector 10 20))", "#f64(11.0 22.0)"),
+        ("(v* (numvector 1 2) 3)", "#f64(3.0 6.0)"),
+        ("(v- 10 (numvector 1 2))", "#f64(9.0 8.0)"),
+        ("(v/ (numvector 1 2) 2)", "#f64(0.5 1.0)"),
+        ("(make-numvector 2 1.5)", "#f64(1.5 1.5)"),
+        ("(numvector-range 0 3)", "#f64(0.0 1.0 2.0)"),
+        ("(numvector-range 0 1 0.25)", "#f64(0.0 0.25 0.5 0.75)"),
+        ("(list->numvector (list 1 2))", "#f64(1.0 2.0)"),
+        ("(numvector->list (numvector 1 2))", "(1.0 2.0)"),
+        ("(list (numvector 1))", "(#f64(1.0))"),
+        ("(vsum (numvector-range 0 1001))", "500500.0"),
+        ("(vdot (numvector 1 2 3) (numvector 4 5 6))", "32.0"),
+        ("(vector-ref (numvector 1 2 3) 2)", "3.0"),
+        ("(length (numvector 1 2 3))", "3"),
+        ("(numvector? (numvector))", "True"),
+        ("(numvector? (list 1))", "False"),
+        ('(vector 1 "a" (quote b) (list 2))', '#(1 "a" b (2))'),
+        ("(make-vector 2 #f)", "#(#f #f)"),
+        ("(list->vector (vector->list (vector 1 2)))", "#(1 2)"),
+        ("(vector-ref (vector 1 2 3) 2)", "3"),
+        ("(vector-length (make-numvector 4))", "4"),
+        ("(vector? (vector))", "True"),
+        ("(vector? (numvector))", "False"),
+    ],
+)
+def test_vector_primitives(backend, source, expected):
+    for engine in ENGINES:
+        assert str(Interpreter(engine).interpret(source)) == expected
+
+
+@pytest.mark.parametrize(
+    "source,message",
+    [
+        ("(v+ (numvector 1 2) (numvector 1))", "lengths differ: 2 and 1"),
+        ("(vdot (numvector 1 2) (numvector 1))", "lengths differ: 2 and 1"),
+        ("(v+ (numvector 1) (list 1))", "expect numvector or number"),
+        ("(vector-ref (numvector 1) 1)", "index 1 out of range for length 1"),
+        ('(numvector 1 "x")', "expect numbers in numvector"),
+        ("(vsum (list 1))", "expect numvector"),
+        ("(vector-ref (vector 1) -1)", "index -1 out of range for length 1"),
+        ("(vector-ref (vector 1 2) #t)", "expect integer index"),
+        ("(vector-set! (numvector 1 2) #f 0)", "expect integer index"),
+        ("(vector-set! (list 1) 0 1)", "expect vector"),
+        ('(vector-set! (numvector 1) 0 "x")', "expect number in numvector"),
+    ],
+)
+def test_vector_errors(backend, source, message):
+    with pytest.raises(RuntimeError, match=message):
+        Interpreter().interpret(source)
+
+
+def test_bulk_primitives_do_not_call_procedures(backend):
+    v = NumVector.from_iterable(range(100_000))
+    assert vectors.vsum(vectors.PRIMITIVES["v*"](v, v)) == vectors.vdot(v, v)
+    assert v == NumVector.from_iterable(range(100_000))
+    assert v != vectors.PRIMITIVES["v+"](v, 1)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_vector_set(backend, engine):
+    interpreter = Interpreter(engine)
+    interpreter.interpret("(define v (make-vector 3 0))")
+    interpreter.interpret("(define n (make-numvector 3))")
+    interpreter.interpret("(vector-set! v 1 (quote x))")
+    interpreter.interpret("(vector-set! n 2 5)")
+    assert str(interpreter.interpret("v")) == "#(0 x 0)"
+    assert str(interpreter.interpret("n")) == "#f64(0.0 0.0 5.0)"
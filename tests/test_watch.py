@@ -0,0 +1,96 @@
+import io
+
+from pythonlisp.watch import Watcher, split
+
+PROGRAM = """\
+(define a 1)
+(define b (+ a 1))
+(define f (lambda (x) (+ x b)))
+(define g (lambda (x) (f x)))
+(define result (g 1))
+"""
+
+
+def watcher(tmp_path, source):
+    path = tmp_path / "program.lsp"
+    path.write_text(source)
+    return Watcher(str(path)), path
+
+
+def test_forms_are_split_and_hashed_by_their_text():
+    source = '(define x (f "(")) 42\n\n  (define x (f "("))'
+    forms = split(source)
+    assert [source[start:end] for _, start, end in forms] == [
+        '(define x (f "("))',
+        "42",
+        '(define x (f "("))',
+    ]
+    assert forms[0][0] == forms[2][0]
+    assert split("(f")[0][1:] == (0, 2)
+
+
+def test_only_changed_forms_and_their_dependents_are_evaluated(tmp_path):
+    w, path = watcher(tmp_path, PROGRAM)
+    assert w.reload().evaluated == 5
+    assert w.interpreter.interpret("result") == 3
+    f = w.interpreter.interpret("f")
+
+    path.write_text(PROGRAM.replace("(define a 1)", "(define a 10)"))
+    reload = w.reload()
+    # a, b which uses it, and result which calls g, which calls f, which
+    # uses b. f and g are kept
+    assert (reload.evaluated, reload.removed) == (3, 1)
+    assert w.interpreter.interpret("f") is f
+    assert w.interpreter.interpret("result") == 12
+    assert w.reload().evaluated == 0
+
+
+def test_changed_procedure_reevaluates_its_eager_users(tmp_path):
+    w, path = watcher(tmp_path, PROGRAM)
+    w.reload()
+    path.write_text(PROGRAM.replace("(+ x b)", "(* x b)"))
+    # f, then result, which calls g when it is defined
+    assert w.reload().evaluated == 2
+    assert w.interpreter.interpret("result") == 2
+
+
+def test_deleted_definitions_are_forgotten(tmp_path):
+    w, path = watcher(tmp_path, "(define + -)\n(define x 1)\n")
+    w.reload()
+    assert w.interpreter.interpret("(+ 3 1)") == 2
+    path.write_text("")
+    assert w.reload().removed == 2
+    assert w.interpreter.interpret("(+ 3 1)") == 4
+    assert w.interpreter.env.find("x") is None
+
+
+def test_macro_users_are_reexpanded(tmp_path):
+    source = (
+        "(define-macro (twice x) (list (quote *) 2 x))\n"
+        "(define f (lambda (x) (twice x)))\n"
+    )
+    w, path = watcher(tmp_path, source)
+    w.reload()
+    assert w.interpreter.interpret("(f 5)") == 10
+    path.write_text(source.replace("(quote *) 2", "(quote +) 2"))
+    assert w.reload().evaluated == 2
+    assert w.interpreter.interpret("(f 5)") == 7
+
+
+def test_failed_forms_are_retried(tmp_path):
+    w, path = watcher(tmp_path, "(define y (+ x 1))\n")
+    out = io.StringIO()
+    reload = w.reload(out)
+    assert (reload.evaluated, reload.errors) == (0, 1)
+    assert "'x' not found" in out.getvalue()
+    path.write_text("(define x 1)\n(define y (+ x 1))\n")
+    assert w.reload(out).evaluated == 2
+    assert w.interpreter.interpret("y") == 2
+
+
+def test_syntax_errors_are_reported(tmp_path):
+    w, path = watcher(tmp_path, "(define x 1)\n(define y (+ x 1)\n")
+    out = io.StringIO()
+    assert w.reload(out).errors == 1
+    assert "unclosed parenthesis" in out.getvalue()
+    assert w.interpreter.interpret("x") == 1